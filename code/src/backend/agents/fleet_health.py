@@ -0,0 +1,125 @@
+"""
+Fleet-wide component health sweeps.
+
+Checks every component known to the monitoring and service-management
+clients concurrently, at most ``concurrency`` at a time and each within
+``component_timeout``, so a sweep over thousands of components takes a
+predictable time and one slow component cannot stall it. Results are
+cached for ``ttl`` seconds, and callers arriving while a sweep is running
+wait for that sweep instead of starting another.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from .incident_agent import HEALTH_CHECK_METRICS, determine_health_status, metric_results
+
+logger = logging.getLogger(__name__)
+
+
+class FleetHealthSweeper:
+    """Health-checks all components with bounded concurrency, a short-lived cache and single flight."""
+
+    def __init__(
+        self,
+        monitoring_service,
+        service_manager,
+        concurrency: int = 64,
+        ttl: float = 10.0,
+        component_timeout: float = 2.0
+    ):
+        """Initialize the sweeper.
+
+        Args:
+            monitoring_service: Client with async list_components() and query_many(metrics, filter)
+            service_manager: Client with async list_components() and get_service_info(service)
+            concurrency (int): Components checked at the same time
+            ttl (float): Seconds a sweep result is served from cache
+            component_timeout (float): Seconds before a component is reported as timed out
+        """
+        self.monitoring_service = monitoring_service
+        self.service_manager = service_manager
+        self.concurrency = concurrency
+        self.ttl = ttl
+        self.component_timeout = component_timeout
+        self._result: Optional[Dict[str, Any]] = None
+        self._result_at = 0.0
+        self._inflight: Optional[asyncio.Task] = None
+
+    async def components(self) -> List[str]:
+        """Components known to either client."""
+        monitored, managed = await asyncio.gather(
+            self.monitoring_service.list_components(),
+            self.service_manager.list_components()
+        )
+        return sorted(set(monitored) | set(managed))
+
+    async def sweep(self, refresh: bool = False) -> Dict[str, Any]:
+        """Health of every component, from cache when fresh.
+
+        Args:
+            refresh (bool): Ignore a cached result (a running sweep is still shared)
+        """
+        if not refresh and self._result is not None and time.monotonic() - self._result_at < self.ttl:
+            return dict(self._result, cached=True)
+
+        if self._inflight is None:
+            self._inflight = asyncio.create_task(self._run_sweep())
+            self._inflight.add_done_callback(self._sweep_done)
+        # Shielded so a caller that disconnects does not cancel the sweep for the others
+        result = await asyncio.shield(self._inflight)
+        return dict(result, cached=False)
+
+    def _sweep_done(self, task: asyncio.Task):
+        self._inflight = None
+        if not task.cancelled() and task.exception() is None:
+            self._result = task.result()
+            self._result_at = time.monotonic()
+
+    async def _run_sweep(self) -> Dict[str, Any]:
+        started = time.perf_counter()
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def bounded(component: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await self._check(component)
+
+        components = await self.components()
+        results = await asyncio.gather(*(bounded(component) for component in components))
+
+        summary: Dict[str, int] = {}
+        for result in results:
+            summary[result["status"]] = summary.get(result["status"], 0) + 1
+        return {
+            "checked_at": datetime.now().isoformat(),
+            "duration": round(time.perf_counter() - started, 4),
+            "summary": summary,
+            "components": dict(zip(components, results))
+        }
+
+    async def _check(self, component: str) -> Dict[str, Any]:
+        try:
+            service_info, results = await asyncio.wait_for(
+                asyncio.gather(
+                    self.service_manager.get_service_info(component),
+                    self.monitoring_service.query_many(
+                        metrics=HEALTH_CHECK_METRICS.get(component, []),
+                        filter={"service": component}
+                    )
+                ),
+                self.component_timeout
+            )
+            metrics = metric_results(results)
+            return {
+                "status": determine_health_status(component, metrics),
+                "service_status": service_info.get("status"),
+                "metrics": metrics
+            }
+        except asyncio.TimeoutError:
+            return {"status": "unknown", "error": f"Timed out after {self.component_timeout}s"}
+        except Exception as e:
+            logger.warning("Health check of %s failed: %s", component, e)
+            return {"status": "unknown", "error": str(e)}
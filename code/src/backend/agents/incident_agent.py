@@ -2,19 +2,19 @@
 Agent module for analyzing and resolving IT platform incidents.
 
 This agent integrates with monitoring, service management, and knowledge base
-systems to provide automated incident resolution capabilities.
+systems to provide automated incident resolution capabilities. Its operations
+are coroutines: the service clients do network I/O, and independent lookups
+run concurrently.
 """
 
 from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
+import asyncio
 import re
+import time
 
-from .mocks.service_mocks import (
-    MockMonitoringService,
-    MockServiceManager,
-    MockIncidentManager,
-    MockKnowledgeBase
-)
+from .services import ServiceRegistry, get_services
+from ..utils.metrics import AGENT_ACTION_LATENCY
 
 
 class ActionResult:
@@ -34,46 +34,142 @@ class ActionResult:
         }
 
 
+# Metrics fetched by a health check, per component type
+HEALTH_CHECK_METRICS: Dict[str, List[str]] = {
+    "api-gateway": [
+        "cpu_usage", "memory_usage", "request_rate", "error_rate", "response_time_ms"
+    ],
+    "database": [
+        "cpu_usage", "memory_usage", "connection_pool.used", "connection_pool.max",
+        "active_queries", "query_execution_time_ms"
+    ],
+    "message-queue": [
+        "cpu_usage", "memory_usage", "queue_depth", "consumer_lag", "publish_rate", "consume_rate"
+    ],
+}
+
+# Action types that change component state, after which the cached analysis is stale
+STATE_CHANGING_ACTIONS = {"restart", "scale", "update_config"}
+
+# Seconds a cached analysis is reused even if the component's state version is unchanged
+# (metrics drift without any recorded state change)
+ANALYSIS_TTL = 60.0
+
+
 class IncidentAgent:
     """Agent for analyzing and resolving IT platform incidents."""
     
-    def __init__(self, incident_data: Dict[str, Any]):
-        """Initialize with incident data."""
+    def __init__(self, incident_data: Dict[str, Any], services: Optional[ServiceRegistry] = None):
+        """Initialize with incident data.
+        
+        Args:
+            incident_data (Dict): The incident, as stored by the incident manager
+            services (ServiceRegistry, optional): Service clients; defaults to the
+                process-wide registry shared by all agents
+        """
         self.incident = incident_data
         self.component = incident_data.get("component")
         self.issue_type = incident_data.get("title")
         self.severity = incident_data.get("severity", "medium")
         self.affected_service = incident_data.get("affected_service")
         
-        # Initialize mock services
-        # In a real implementation, these would be connections to actual services
-        self.monitoring_service = MockMonitoringService()
-        self.service_manager = MockServiceManager()
-        self.incident_manager = MockIncidentManager()
-        self.knowledge_base = MockKnowledgeBase()
+        # Shared service clients (mocks unless another backend is configured)
+        services = services or get_services()
+        self.monitoring_service = services.monitoring
+        self.service_manager = services.service_manager
+        self.incident_manager = services.incident_manager
+        self.knowledge_base = services.knowledge_base
         
         # Track actions performed
         self.actions_history = []
-    
-    def analyze_incident(self) -> Dict[str, Any]:
-        """Analyze the incident and recommend actions."""
-        # Get component health metrics
-        component_health = self._get_component_health()
-        
-        # Find relevant KB articles
-        kb_articles = self._find_relevant_kb_articles()
-        
-        # Get relevant historical incidents
-        historical_incidents = self._find_similar_incidents()
-        
-        # Extract potential resolution steps from KB articles
-        resolution_steps = self._extract_resolution_steps(kb_articles)
         
-        # Map steps to executable actions
-        executable_actions = self._map_steps_to_actions(resolution_steps)
-        
-        # Determine automation level
-        automation_level = self._determine_automation_level(executable_actions)
+        # Latest analysis and its actions by ID, until the component state changes
+        self._analysis: Optional[Dict[str, Any]] = None
+        self._actions_by_id: Dict[str, Dict[str, Any]] = {}
+        self._analysis_version = 0
+        # Monitoring state version the analysis was computed from, and when
+        self._analysis_state_version: Optional[int] = None
+        self._analyzed_at = 0.0
+        self._analysis_lock = asyncio.Lock()
+    
+    async def analyze_incident(self, refresh: bool = False) -> Dict[str, Any]:
+        """Analyze the incident and recommend actions.
+        
+        The analysis is cached until the component's state version in the
+        shared monitoring service changes (by this agent's actions or any
+        other's), and for at most ANALYSIS_TTL seconds; concurrent callers
+        share one computation.
+        
+        Args:
+            refresh (bool): Recompute even if a cached analysis is available
+        """
+        if refresh:
+            self.invalidate_analysis()
+        state_version = await self.monitoring_service.state_version(self.component)
+        if self._analysis_is_current(state_version):
+            return self._analysis
+        
+        async with self._analysis_lock:
+            if not self._analysis_is_current(state_version):
+                version = self._analysis_version
+                analysis = await self._run_analysis()
+                # An action of this agent that changed state meanwhile makes this result stale already;
+                # a change by another agent bumps the state version and is caught on the next call
+                if version == self._analysis_version:
+                    self._analysis = analysis
+                    self._analysis_state_version = state_version
+                    self._analyzed_at = time.monotonic()
+                    self._actions_by_id = {
+                        action["id"]: action for action in analysis["recommended_actions"]
+                    }
+                return analysis
+            return self._analysis
+    
+    def _analysis_is_current(self, state_version: int) -> bool:
+        return (
+            self._analysis is not None
+            and self._analysis_state_version == state_version
+            and time.monotonic() - self._analyzed_at < ANALYSIS_TTL
+        )
+    
+    def invalidate_analysis(self):
+        """Drop the cached analysis, e.g. after the component's state changed."""
+        self._analysis_version += 1
+        self._analysis = None
+        self._actions_by_id = {}
+    
+    async def get_action(self, action_id: str) -> Optional[Dict[str, Any]]:
+        """Look up a recommended action by ID, re-analyzing first if the analysis is outdated."""
+        analysis = await self.analyze_incident()
+        if self._analysis is not analysis:
+            # Invalidated while analyzing; use that result for this lookup only
+            return next((a for a in analysis["recommended_actions"] if a["id"] == action_id), None)
+        return self._actions_by_id.get(action_id)
+    
+    async def _run_analysis(self) -> Dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            # Component health and KB articles come from different services; fetch both at once
+            component_health, kb_articles = await asyncio.gather(
+                self._get_component_health(),
+                self._find_relevant_kb_articles()
+            )
+            
+            # Get relevant historical incidents
+            historical_incidents = self._find_similar_incidents()
+            
+            # Extract potential resolution steps from KB articles
+            resolution_steps = await self._extract_resolution_steps(kb_articles)
+            
+            # Map steps to executable actions
+            executable_actions = self._map_steps_to_actions(resolution_steps)
+            
+            # Determine automation level
+            automation_level = self._determine_automation_level(executable_actions)
+        except Exception:
+            AGENT_ACTION_LATENCY.labels("analyze", "failed").observe(time.perf_counter() - started)
+            raise
+        AGENT_ACTION_LATENCY.labels("analyze", "completed").observe(time.perf_counter() - started)
         
         return {
             "incident_summary": self._generate_summary(),
@@ -87,22 +183,17 @@ class IncidentAgent:
             "historical_incidents": historical_incidents
         }
     
-    def execute_action(self, action_id: str, params: Optional[Dict[str, Any]] = None) -> ActionResult:
+    async def execute_action(self, action_id: str, params: Optional[Dict[str, Any]] = None) -> ActionResult:
         """Execute a specific action related to incident resolution."""
         params = params or {}
+        started = time.perf_counter()
         
         # Find the action in our recommended actions
         # In a real implementation, you'd probably store these in a database
-        analysis = self.analyze_incident()
-        actions = analysis.get("recommended_actions", [])
-        
-        target_action = None
-        for action in actions:
-            if action["id"] == action_id:
-                target_action = action
-                break
+        target_action = await self.get_action(action_id)
         
         if not target_action:
+            AGENT_ACTION_LATENCY.labels("unknown", "not_found").observe(time.perf_counter() - started)
             return ActionResult(
                 success=False,
                 output="",
@@ -123,13 +214,13 @@ class IncidentAgent:
         
         try:
             if target_action["action_type"] == "restart":
-                result = self._execute_restart_action(params)
+                result = await self._execute_restart_action(params)
             elif target_action["action_type"] == "scale":
-                result = self._execute_scale_action(params)
+                result = await self._execute_scale_action(params)
             elif target_action["action_type"] == "update_config":
-                result = self._execute_update_config_action(params)
+                result = await self._execute_update_config_action(params)
             elif target_action["action_type"] == "diagnostic":
-                result = self._execute_diagnostic_action(params)
+                result = await self._execute_diagnostic_action(params)
             else:
                 result = ActionResult(
                     success=False,
@@ -143,6 +234,10 @@ class IncidentAgent:
                 error=f"Error executing action: {str(e)}"
             )
         
+        if result.success and target_action["action_type"] in STATE_CHANGING_ACTIONS:
+            # Health and recommendations were computed for the old state
+            self.invalidate_analysis()
+        
         # Update action record with result
         action_record["result"] = result.to_dict()
         self.actions_history.append(action_record)
@@ -155,51 +250,29 @@ class IncidentAgent:
                 result.to_dict()
             )
         
+        AGENT_ACTION_LATENCY.labels(
+            target_action["action_type"], "success" if result.success else "failure"
+        ).observe(time.perf_counter() - started)
         return result
     
-    def run_health_check(self) -> Dict[str, Any]:
+    async def run_health_check(self) -> Dict[str, Any]:
         """Run automated health check for affected component."""
         if not self.component:
             return {"error": "No component specified"}
+        started = time.perf_counter()
         
-        # Get basic service info
-        service_info = self.service_manager.get_service_info(self.component)
-        
-        # Get monitoring metrics
-        metrics = {}
-        
-        if self.component == "api-gateway":
-            metrics["cpu_usage"] = self._get_metric("cpu_usage")
-            metrics["memory_usage"] = self._get_metric("memory_usage")
-            metrics["request_rate"] = self._get_metric("request_rate")
-            metrics["error_rate"] = self._get_metric("error_rate")
-            metrics["response_time_ms"] = self._get_metric("response_time_ms")
-        
-        elif self.component == "database":
-            metrics["cpu_usage"] = self._get_metric("cpu_usage")
-            metrics["memory_usage"] = self._get_metric("memory_usage")
-            metrics["connection_pool.used"] = self._get_metric("connection_pool.used")
-            metrics["connection_pool.max"] = self._get_metric("connection_pool.max")
-            metrics["active_queries"] = self._get_metric("active_queries")
-            metrics["query_execution_time_ms"] = self._get_metric("query_execution_time_ms")
-        
-        elif self.component == "message-queue":
-            metrics["cpu_usage"] = self._get_metric("cpu_usage")
-            metrics["memory_usage"] = self._get_metric("memory_usage")
-            metrics["queue_depth"] = self._get_metric("queue_depth")
-            metrics["consumer_lag"] = self._get_metric("consumer_lag")
-            metrics["publish_rate"] = self._get_metric("publish_rate")
-            metrics["consume_rate"] = self._get_metric("consume_rate")
-        
-        # Get recent logs
-        logs_result = self.service_manager.execute_command(
-            self.component, "logs", {"lines": 20}
+        # Service info, metrics (one multi-metric query) and logs are independent
+        service_info, metrics, logs_result = await asyncio.gather(
+            self.service_manager.get_service_info(self.component),
+            self._get_metrics(HEALTH_CHECK_METRICS.get(self.component, [])),
+            self.service_manager.execute_command(self.component, "logs", {"lines": 20})
         )
         
         logs = logs_result.get("output", "") if logs_result.get("success", False) else "Unable to retrieve logs"
         
         # Determine health status based on metrics
         health_status = self._determine_health_status(metrics)
+        AGENT_ACTION_LATENCY.labels("health_check", health_status).observe(time.perf_counter() - started)
         
         return {
             "component": self.component,
@@ -214,29 +287,29 @@ class IncidentAgent:
         """Get history of actions performed by this agent."""
         return self.actions_history
     
-    def _get_component_health(self) -> Dict[str, Any]:
+    async def _get_component_health(self) -> Dict[str, Any]:
         """Get health metrics for the component."""
-        return self.run_health_check()
+        return await self.run_health_check()
     
-    def _find_relevant_kb_articles(self) -> List[Dict[str, Any]]:
+    async def _find_relevant_kb_articles(self) -> List[Dict[str, Any]]:
         """Find knowledge base articles relevant to this incident."""
         # First try with component and issue type
         if self.component and self.issue_type:
             # Extract the main issue from the title if possible
             issue_keywords = self.issue_type.lower()
-            articles = self.knowledge_base.search_articles(issue_keywords, self.component)
+            articles = await self.knowledge_base.search_articles(issue_keywords, self.component)
             if articles:
                 return articles
         
         # Try with just the component
         if self.component:
-            articles = self.knowledge_base.get_articles_by_component(self.component)
+            articles = await self.knowledge_base.get_articles_by_component(self.component)
             if articles:
                 return articles
         
         # Try with general search in description
         if "description" in self.incident:
-            articles = self.knowledge_base.search_articles(self.incident["description"])
+            articles = await self.knowledge_base.search_articles(self.incident["description"])
             if articles:
                 return articles
         
@@ -249,14 +322,14 @@ class IncidentAgent:
             return self.incident_manager.list_incidents(component=self.component)
         return []
     
-    def _extract_resolution_steps(self, kb_articles: List[Dict[str, Any]]) -> List[str]:
+    async def _extract_resolution_steps(self, kb_articles: List[Dict[str, Any]]) -> List[str]:
         """Extract resolution steps from KB articles."""
         if not kb_articles:
             return self._get_default_resolution_steps()
         
         # Get the most relevant article
         article_id = kb_articles[0]["id"]
-        article = self.knowledge_base.get_article(article_id)
+        article = await self.knowledge_base.get_article(article_id)
         
         if not article or "content" not in article:
             return self._get_default_resolution_steps()
@@ -416,7 +489,7 @@ class IncidentAgent:
         """Generate incident summary."""
         return f"{self.issue_type} affecting {self.component} - {self.severity.upper()} severity"
     
-    def _execute_restart_action(self, params: Dict[str, Any]) -> ActionResult:
+    async def _execute_restart_action(self, params: Dict[str, Any]) -> ActionResult:
         """Execute a restart action."""
         if not self.component:
             return ActionResult(
@@ -426,18 +499,18 @@ class IncidentAgent:
             )
         
         # Execute restart command
-        result = self.service_manager.execute_command(self.component, "restart")
+        result = await self.service_manager.execute_command(self.component, "restart")
         
         if result.get("success", False):
             # Update monitoring service to reflect improvement
             if self.component == "api-gateway":
-                self.monitoring_service.update_state(self.component, {
+                await self.monitoring_service.update_state(self.component, {
                     "cpu_usage": 45,  # Reduced from 87
                     "error_rate": 1.2,  # Reduced from 8.2
                     "status": "healthy"
                 })
             elif self.component == "database":
-                self.monitoring_service.update_state(self.component, {
+                await self.monitoring_service.update_state(self.component, {
                     "connection_pool.used": 90,  # Reduced from 180
                     "connection_pool.wait_time_ms": 50,  # Reduced from 250
                     "status": "healthy"
@@ -454,7 +527,7 @@ class IncidentAgent:
                 error=result.get("error", "Unknown error restarting service")
             )
     
-    def _execute_scale_action(self, params: Dict[str, Any]) -> ActionResult:
+    async def _execute_scale_action(self, params: Dict[str, Any]) -> ActionResult:
         """Execute a scaling action."""
         if not self.component:
             return ActionResult(
@@ -466,7 +539,7 @@ class IncidentAgent:
         amount = params.get("amount", 1)
         
         # Execute scale command
-        result = self.service_manager.execute_command(
+        result = await self.service_manager.execute_command(
             self.component,
             "scale",
             {"amount": amount}
@@ -476,14 +549,14 @@ class IncidentAgent:
             # Update monitoring service to reflect improvement
             if self.component == "api-gateway":
                 # Scale up generally improves CPU and response time
-                self.monitoring_service.update_state(self.component, {
+                await self.monitoring_service.update_state(self.component, {
                     "cpu_usage": max(30, 87 / (1 + amount * 0.5)),  # Reduced based on scale
                     "response_time_ms": max(100, 350 / (1 + amount * 0.3)),  # Reduced based on scale
                     "status": "healthy"
                 })
             elif self.component == "message-queue":
                 # Scaling consumers improves queue metrics
-                self.monitoring_service.update_state(self.component, {
+                await self.monitoring_service.update_state(self.component, {
                     "queue_depth": max(1000, 10500 / (1 + amount * 0.4)),  # Reduced based on scale
                     "consumer_lag": max(500, 3200 / (1 + amount * 0.4)),  # Reduced based on scale
                     "status": "healthy"
@@ -500,7 +573,7 @@ class IncidentAgent:
                 error=result.get("error", "Unknown error scaling service")
             )
     
-    def _execute_update_config_action(self, params: Dict[str, Any]) -> ActionResult:
+    async def _execute_update_config_action(self, params: Dict[str, Any]) -> ActionResult:
         """Execute a configuration update action."""
         if not self.component:
             return ActionResult(
@@ -518,7 +591,7 @@ class IncidentAgent:
             )
         
         # Execute update config command
-        result = self.service_manager.execute_command(
+        result = await self.service_manager.execute_command(
             self.component,
             "update_config",
             {"config": config}
@@ -528,14 +601,14 @@ class IncidentAgent:
             # Update monitoring service to reflect improvement
             if self.component == "database" and "max_connections" in config:
                 # Update connection pool max
-                self.monitoring_service.update_state(self.component, {
+                await self.monitoring_service.update_state(self.component, {
                     "connection_pool.max": config["max_connections"],
                     "connection_pool.wait_time_ms": 30,  # Reduced from 250
                     "status": "healthy"
                 })
             elif self.component == "api-gateway" and "rate_limit" in config:
                 # Update rate limiting
-                self.monitoring_service.update_state(self.component, {
+                await self.monitoring_service.update_state(self.component, {
                     "error_rate": 0.5,  # Reduced from 8.2
                     "status": "healthy"
                 })
@@ -551,10 +624,10 @@ class IncidentAgent:
                 error=result.get("error", "Unknown error updating configuration")
             )
     
-    def _execute_diagnostic_action(self, params: Dict[str, Any]) -> ActionResult:
+    async def _execute_diagnostic_action(self, params: Dict[str, Any]) -> ActionResult:
         """Execute a diagnostic action."""
         # Run health check
-        health_data = self.run_health_check()
+        health_data = await self.run_health_check()
         
         # Extract relevant metrics based on component
         metrics_output = []
@@ -606,52 +679,63 @@ class IncidentAgent:
     
     def _determine_health_status(self, metrics: Dict[str, Any]) -> str:
         """Determine component health status based on metrics."""
-        # Check for critical metrics based on component type
-        if self.component == "api-gateway":
-            cpu = metrics.get("cpu_usage", {}).get("current", 0)
-            error_rate = metrics.get("error_rate", {}).get("current", 0)
-            
-            if cpu > 80 or error_rate > 5:
-                return "critical"
-            elif cpu > 60 or error_rate > 2:
-                return "warning"
-            else:
-                return "healthy"
-        
-        elif self.component == "database":
-            conn_used = metrics.get("connection_pool.used", {}).get("current", 0)
-            conn_max = metrics.get("connection_pool.max", {}).get("current", 1)
-            
-            usage_percent = (conn_used / conn_max * 100) if conn_max else 0
-            
-            if usage_percent > 90:
-                return "critical"
-            elif usage_percent > 70:
-                return "warning"
-            else:
-                return "healthy"
-        
-        elif self.component == "message-queue":
-            queue_depth = metrics.get("queue_depth", {}).get("current", 0)
-            
-            if queue_depth > 10000:
-                return "critical"
-            elif queue_depth > 5000:
-                return "warning"
-            else:
-                return "healthy"
-        
-        # Default for unknown components
-        return "unknown"
+        return determine_health_status(self.component, metrics)
     
-    def _get_metric(self, metric_name: str) -> Dict[str, Any]:
-        """Get a specific metric from the monitoring service."""
-        result = self.monitoring_service.query(
-            metric=metric_name,
+    async def _get_metrics(self, metric_names: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get several metrics of the component from the monitoring service in one query."""
+        if not metric_names:
+            return {}
+        results = await self.monitoring_service.query_many(
+            metrics=metric_names,
             filter={"service": self.component}
         )
-        
-        if result.get("status") == "error":
-            return {"current": "N/A", "error": result.get("error")}
-        
-        return result 
\ No newline at end of file
+        return metric_results(results)
+
+
+def determine_health_status(component: Optional[str], metrics: Dict[str, Any]) -> str:
+    """Determine component health status from health-check metrics."""
+    # Check for critical metrics based on component type
+    if component == "api-gateway":
+        cpu = metrics.get("cpu_usage", {}).get("current", 0)
+        error_rate = metrics.get("error_rate", {}).get("current", 0)
+
+        if cpu > 80 or error_rate > 5:
+            return "critical"
+        elif cpu > 60 or error_rate > 2:
+            return "warning"
+        else:
+            return "healthy"
+
+    elif component == "database":
+        conn_used = metrics.get("connection_pool.used", {}).get("current", 0)
+        conn_max = metrics.get("connection_pool.max", {}).get("current", 1)
+
+        usage_percent = (conn_used / conn_max * 100) if conn_max else 0
+
+        if usage_percent > 90:
+            return "critical"
+        elif usage_percent > 70:
+            return "warning"
+        else:
+            return "healthy"
+
+    elif component == "message-queue":
+        queue_depth = metrics.get("queue_depth", {}).get("current", 0)
+
+        if queue_depth > 10000:
+            return "critical"
+        elif queue_depth > 5000:
+            return "warning"
+        else:
+            return "healthy"
+
+    # Default for unknown components
+    return "unknown"
+
+
+def metric_results(results: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Monitoring query results with errors reduced to an "N/A" value."""
+    return {
+        name: {"current": "N/A", "error": result.get("error")} if result.get("status") == "error" else result
+        for name, result in results.items()
+    }
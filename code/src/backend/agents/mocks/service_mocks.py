@@ -4,12 +4,16 @@ Mock services for simulating IT infrastructure components and services.
 These mock services provide simulated data and responses for different IT components
 that would normally be accessed via APIs or direct connections in a real environment.
 They allow demonstrating agent functionality without requiring actual infrastructure.
+
+The monitoring, service management and knowledge base clients are async, like the
+network clients they stand in for, and simulate latency with asyncio.sleep so
+that slow operations never block the event loop.
 """
 
 from typing import Dict, Any, Optional, List, Union
 from datetime import datetime, timedelta
+import asyncio
 import random
-import time
 import json
 from ...utils.constants import MOCK_KB_ARTICLES, MONITORING_SERVICES_MOCK_STATE, MOCK_SERVICES
 
@@ -20,6 +24,8 @@ class MockMonitoringService:
     def __init__(self, initial_state: Dict[str, Any] = None):
         """Initialize with an optional initial state, otherwise use defaults"""
         self.state = initial_state or MONITORING_SERVICES_MOCK_STATE
+        # Bumped on every state change, so consumers can tell their view is outdated
+        self.state_versions = {component: 0 for component in self.state}
         # Keep history for trending
         self.history = {component: [] for component in self.state}
         # Generate some historical data points
@@ -48,10 +54,22 @@ class MockMonitoringService:
                     "metrics": point
                 })
     
-    def query(self, metric: str, filter: Dict[str, str], timeframe: str = "last_15m") -> Dict[str, Any]:
+    async def list_components(self) -> List[str]:
+        """Names of all monitored components"""
+        return list(self.state)
+
+    async def query(self, metric: str, filter: Dict[str, str], timeframe: str = "last_15m") -> Dict[str, Any]:
         """Simulate querying metrics from a monitoring service"""
+        return self._query_metric(metric, filter.get("service", ""), timeframe)
+    
+    async def query_many(self, metrics: List[str], filter: Dict[str, str],
+                         timeframe: str = "last_15m") -> Dict[str, Dict[str, Any]]:
+        """Simulate one multi-metric query (a single round trip), keyed by metric name"""
         component = filter.get("service", "")
-        
+        return {metric: self._query_metric(metric, component, timeframe) for metric in metrics}
+    
+    def _query_metric(self, metric: str, component: str, timeframe: str) -> Dict[str, Any]:
+        """Look up one metric of a component in the mock state"""
         if component not in self.state:
             return {"error": "Component not found", "status": "error"}
         
@@ -106,7 +124,7 @@ class MockMonitoringService:
             "status": "success"
         }
     
-    def get_history(self, component: str, metric: str, hours: int = 24) -> List[Dict[str, Any]]:
+    async def get_history(self, component: str, metric: str, hours: int = 24) -> List[Dict[str, Any]]:
         """Get historical values for a metric"""
         if component not in self.history:
             return {"error": "Component history not found"}
@@ -127,7 +145,11 @@ class MockMonitoringService:
         
         return result
         
-    def update_state(self, component: str, updates: Dict[str, Any]) -> bool:
+    async def state_version(self, component: str) -> int:
+        """Counter that changes whenever the component's state changes"""
+        return self.state_versions.get(component, 0)
+
+    async def update_state(self, component: str, updates: Dict[str, Any]) -> bool:
         """Update the mock state (simulates remediation effects)"""
         if component not in self.state:
             return False
@@ -158,6 +180,7 @@ class MockMonitoringService:
                 "timestamp": datetime.now().isoformat(),
                 "metrics": point
             })
+            self.state_versions[component] = self.state_versions.get(component, 0) + 1
             
             return True
         
@@ -174,14 +197,18 @@ class MockServiceManager:
         # Keep command history
         self.command_history = []
     
-    def get_service_info(self, service: str) -> Dict[str, Any]:
+    async def list_components(self) -> List[str]:
+        """Names of all managed services"""
+        return list(self.services)
+
+    async def get_service_info(self, service: str) -> Dict[str, Any]:
         """Get information about a service"""
         if service not in self.services:
             return {"error": "Service not found", "status": "error"}
         
         return self.services[service]
     
-    def execute_command(self, service: str, command: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    async def execute_command(self, service: str, command: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Simulate executing a command on a service"""
         params = params or {}
         
@@ -202,11 +229,11 @@ class MockServiceManager:
         })
         
         # Simulate command execution time
-        time.sleep(0.5)
+        await asyncio.sleep(0.5)
         
         # Process different commands
         if command == "restart":
-            return self._handle_restart(service, params)
+            return await self._handle_restart(service, params)
         elif command == "scale":
             return self._handle_scale(service, params)
         elif command == "update_config":
@@ -223,13 +250,13 @@ class MockServiceManager:
             "exit_code": 1
         }
     
-    def _handle_restart(self, service: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    async def _handle_restart(self, service: str, params: Dict[str, Any]) -> Dict[str, Any]:
         """Handle the restart command"""
         # Simulate service being temporarily down during restart
         self.services[service]["status"] = "restarting"
         
         # Simulate restart time
-        time.sleep(1)
+        await asyncio.sleep(1)
         
         # Service is back up
         self.services[service]["status"] = "running"
@@ -505,7 +532,7 @@ class MockKnowledgeBase:
         """Initialize with mock KB articles"""
         self.kb_articles = MOCK_KB_ARTICLES
     
-    def get_article(self, article_id: str) -> Optional[Dict[str, Any]]:
+    async def get_article(self, article_id: str) -> Optional[Dict[str, Any]]:
         """Get a knowledge base article by ID"""
         for article in self.kb_articles:
             if article["id"] == article_id:
@@ -513,7 +540,7 @@ class MockKnowledgeBase:
         
         return None
     
-    def search_articles(self, query: str, component: Optional[str] = None) -> List[Dict[str, Any]]:
+    async def search_articles(self, query: str, component: Optional[str] = None) -> List[Dict[str, Any]]:
         """Search knowledge base articles"""
         query = query.lower()
         results = []
@@ -549,7 +576,7 @@ class MockKnowledgeBase:
         # Sort by relevance score
         return sorted(results, key=lambda x: x["relevance_score"], reverse=True)
     
-    def get_articles_by_component(self, component: str) -> List[Dict[str, Any]]:
+    async def get_articles_by_component(self, component: str) -> List[Dict[str, Any]]:
         """Get all KB articles for a specific component"""
         return [
             {
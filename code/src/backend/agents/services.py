@@ -0,0 +1,75 @@
+"""
+Process-wide registry of the service clients used by incident agents.
+
+Agents share one set of monitoring, service-management, incident and
+knowledge-base clients instead of building their own, so creating an agent
+is cheap and every agent sees the same state. Backends are pluggable: a
+backend is a factory returning a ServiceRegistry, selected by name with the
+SERVICE_BACKEND environment variable (default "mock"), or a registry can be
+installed directly with set_services().
+"""
+
+import os
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+from .mocks.service_mocks import (
+    MockMonitoringService,
+    MockServiceManager,
+    MockIncidentManager,
+    MockKnowledgeBase
+)
+
+
+@dataclass
+class ServiceRegistry:
+    """The service clients an incident agent works with."""
+    monitoring: Any
+    service_manager: Any
+    incident_manager: Any
+    knowledge_base: Any
+
+
+def mock_services() -> ServiceRegistry:
+    """In-memory stand-ins for all services."""
+    return ServiceRegistry(
+        monitoring=MockMonitoringService(),
+        service_manager=MockServiceManager(),
+        incident_manager=MockIncidentManager(),
+        knowledge_base=MockKnowledgeBase()
+    )
+
+
+_backends: Dict[str, Callable[[], ServiceRegistry]] = {"mock": mock_services}
+_services: Optional[ServiceRegistry] = None
+_lock = threading.Lock()
+
+
+def register_backend(name: str, factory: Callable[[], ServiceRegistry]):
+    """Make a service backend selectable with SERVICE_BACKEND=<name>."""
+    _backends[name] = factory
+
+
+def get_services() -> ServiceRegistry:
+    """The process-wide registry, built from the configured backend on first use.
+
+    Raises:
+        ValueError: If SERVICE_BACKEND names an unregistered backend
+    """
+    global _services
+    if _services is None:
+        with _lock:
+            if _services is None:
+                backend = os.getenv("SERVICE_BACKEND", "mock")
+                if backend not in _backends:
+                    raise ValueError(f"Unknown service backend {backend!r}; registered: {sorted(_backends)}")
+                _services = _backends[backend]()
+    return _services
+
+
+def set_services(services: Optional[ServiceRegistry]):
+    """Install a registry (e.g. for a benchmark); None rebuilds from the backend on next use."""
+    global _services
+    with _lock:
+        _services = services
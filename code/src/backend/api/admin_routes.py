@@ -0,0 +1,146 @@
+"""
+Admin-only diagnostics routes, guarded by the X-Admin-Token header.
+
+All routes answer 404 when ADMIN_TOKEN is not configured.
+"""
+
+import asyncio
+import os
+import re
+from typing import Any, Dict, Literal
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from fastapi.responses import FileResponse
+
+from ..embeddings.shared_store import MappedDocumentStore
+from ..utils.memory import TracemallocSnapshots, deep_sizeof, index_bytes, process_memory
+from .incident_routes import incident_agents, incident_manager, services
+from .profiling import admin_token, list_profiles, profile_path, token_matches
+
+PROFILE_ID_PATTERN = re.compile(r"^[0-9]{8}-[0-9]{6}-[0-9a-f]{8}$")
+
+# tracemalloc statistics keys; anything else is rejected with a 422
+SnapshotGroupBy = Literal["lineno", "filename", "traceback"]
+
+
+def require_admin(x_admin_token: str = Header(default=None)):
+    """Reject requests without the configured admin token."""
+    if admin_token() is None:
+        raise HTTPException(status_code=404, detail="Not found")
+    if not token_matches(x_admin_token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+router = APIRouter(prefix="/admin", dependencies=[Depends(require_admin)])
+
+snapshots = TracemallocSnapshots()
+
+
+@router.get("/profiles")
+async def get_profiles():
+    """IDs of stored request profiles, newest first."""
+    return {"profiles": list_profiles()}
+
+
+@router.get("/profiles/{profile_id}")
+async def download_profile(profile_id: str):
+    """Download a request profile in speedscope format."""
+    path = profile_path(profile_id)
+    if not PROFILE_ID_PATTERN.match(profile_id) or not os.path.exists(path):
+        raise HTTPException(status_code=404, detail=f"Profile {profile_id} not found")
+    return FileResponse(path, media_type="application/json", filename=os.path.basename(path))
+
+
+def _vector_store_memory(vector_store) -> Dict[str, Any]:
+    documents = vector_store.documents
+    report = {
+        "index_vectors": vector_store.index.ntotal if vector_store.index is not None else 0,
+        "index_bytes": index_bytes(vector_store.index),
+        "documents": len(documents)
+    }
+    if isinstance(documents, MappedDocumentStore):
+        # Lives in the page cache, shared by every worker on the host
+        report["document_store"] = "mapped"
+        report["document_store_bytes"] = os.path.getsize(documents.path)
+    else:
+        report["document_store"] = "in_process"
+        report["document_store_bytes"] = deep_sizeof(documents)
+    return report
+
+
+def _agent_memory() -> Dict[str, Any]:
+    # Service clients are shared by all agents; count them once, apart from the agents
+    seen = set()
+    services_bytes = deep_sizeof(services, seen)
+    return {
+        "agents": len(incident_agents),
+        "registry_bytes": deep_sizeof(incident_agents, seen),
+        "services_bytes": services_bytes,
+        "monitoring_history_points": {
+            component: len(points) for component, points in services.monitoring.history.items()
+        },
+        "action_history_entries": sum(len(agent.actions_history) for agent in incident_agents.values()),
+        "command_history_entries": len(services.service_manager.command_history),
+        "incidents": len(incident_manager.incidents),
+        "alerts": len(incident_manager.alerts)
+    }
+
+
+@router.get("/memory")
+async def memory_report(request: Request):
+    """Memory attributed to each subsystem of this worker, plus process totals.
+
+    Byte counts of Python structures are estimates (sys.getsizeof walked
+    recursively); index bytes are the raw vector data.
+    """
+    # Walking all agent state takes a while with many incidents; keep it off the event loop
+    report = {"process": process_memory(), "incident_agents": await asyncio.to_thread(_agent_memory)}
+
+    container = request.app.state.container
+    if container.initialized:
+        rag_system = await container.get_rag_system()
+        report["vector_store"] = await asyncio.to_thread(_vector_store_memory, rag_system.vector_store)
+        local_cache = rag_system.cache_manager.local_cache if rag_system.cache_manager else None
+        report["local_cache"] = {
+            "entries": len(local_cache),
+            # Estimated size of the decoded entries held in memory
+            "bytes": local_cache.current_bytes,
+            "max_bytes": local_cache.max_bytes
+        } if local_cache is not None else None
+    else:
+        report["vector_store"] = "not initialized"
+
+    report["tracemalloc"] = snapshots.status()
+    return report
+
+
+@router.post("/memory/tracemalloc/start")
+async def start_tracemalloc(frames: int = 10):
+    """Start tracing allocations (slows the worker down until stopped)."""
+    return snapshots.start(frames)
+
+
+@router.post("/memory/tracemalloc/stop")
+async def stop_tracemalloc():
+    """Stop tracing allocations and drop stored snapshots."""
+    return snapshots.stop()
+
+
+@router.post("/memory/snapshots")
+async def take_snapshot(limit: int = 20, group_by: SnapshotGroupBy = "lineno"):
+    """Take a tracemalloc snapshot and return its largest allocation sites."""
+    try:
+        return snapshots.take(limit=limit, group_by=group_by)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+@router.get("/memory/snapshots/{older_id}/diff/{newer_id}")
+async def diff_snapshots(
+    older_id: int, newer_id: int, limit: int = 20, group_by: SnapshotGroupBy = "lineno"
+):
+    """Allocation growth between two stored snapshots."""
+    try:
+        return snapshots.diff(older_id, newer_id, limit=limit, group_by=group_by)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Snapshot not found")
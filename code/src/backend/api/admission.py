@@ -0,0 +1,366 @@
+"""
+Admission control for the API.
+
+Every request is matched to a route policy. A policy can limit:
+
+- concurrency: at most ``max_concurrent`` requests of the class run at once;
+  others wait in a bounded priority queue (higher incident severity first)
+  for at most ``queue_timeout`` seconds;
+- rate: a token bucket per client address -- the peer address, or the
+  address a trusted proxy reports in ``X-Forwarded-For`` -- shared by up to
+  ``CLIENTS_PER_ADDRESS`` clients, and within it a bucket per
+  ``X-Client-Id`` (a self-declared header, so it only divides an address's
+  budget and never adds to it).
+
+Requests that cannot be admitted are rejected immediately with 429 (rate
+limit) or 503 (overloaded) and a ``Retry-After`` header, instead of tying up
+a worker. Dashboard polling and critical incident work use separate
+policies, so polling can never take the slots of incident work.
+"""
+
+import asyncio
+import heapq
+import ipaddress
+import itertools
+import json
+import math
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+SEVERITY_PRIORITY = {"critical": 0, "high": 1, "medium": 2, "low": 3}
+DEFAULT_PRIORITY = 2
+MAX_INSPECTED_BODY_BYTES = 64 * 1024
+# An address (e.g. a NAT gateway or office proxy) gets this many clients' worth of rate
+CLIENTS_PER_ADDRESS = 4
+
+
+@dataclass
+class RoutePolicy:
+    """Limits for one class of requests."""
+    name: str
+    pattern: str  # Regex matched against "METHOD /path"
+    max_concurrent: Optional[int] = None  # None: no concurrency limit
+    max_queue: int = 0
+    queue_timeout: float = 1.0
+    rate_per_client: Optional[float] = None  # Tokens per second, None: no rate limit
+    burst: int = 1
+    read_severity: bool = False  # Look for a severity in the JSON body
+
+    def __post_init__(self):
+        self._regex = re.compile(self.pattern)
+
+    def matches(self, method: str, path: str) -> bool:
+        return bool(self._regex.match(f"{method} {path}"))
+
+
+class TokenBuckets:
+    """Token bucket per client, bounded to the most recently seen clients."""
+
+    def __init__(self, rate: float, burst: int, max_clients: int = 10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    def try_acquire(self, client: str) -> float:
+        """Take a token; returns 0 when allowed, otherwise seconds until one is available."""
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.pop(client, (float(self.burst), now))
+        tokens = min(self.burst, tokens + (now - updated_at) * self.rate)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / self.rate
+        self._buckets[client] = (tokens, now)
+        if len(self._buckets) > self.max_clients:
+            self._buckets.popitem(last=False)
+        return wait
+
+
+class PriorityLimiter:
+    """Concurrency limit whose waiters are admitted by priority, then arrival."""
+
+    def __init__(self, max_concurrent: int, max_queue: int):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.active = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.evicted = 0
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for _, _, future in self._waiters if not future.done())
+
+    async def acquire(self, priority: int, timeout: float) -> bool:
+        """Wait for a slot; False if the queue is full or the wait times out."""
+        if self.active < self.max_concurrent and not self.queued:
+            self.active += 1
+            self.admitted += 1
+            return True
+
+        if self.queued >= self.max_queue and not self._evict_lower_priority(priority):
+            self.rejected += 1
+            return False
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            pass
+        except asyncio.CancelledError:
+            if future.done() and future.result():
+                # The slot was handed over just as the client went away
+                self.release()
+            else:
+                future.cancel()
+            raise
+
+        if future.done() and future.result():
+            self.admitted += 1
+            return True
+        if not future.done():
+            future.cancel()
+            self.timed_out += 1
+        return False
+
+    def _evict_lower_priority(self, priority: int) -> bool:
+        """Make room for a more urgent request by rejecting the least urgent waiter."""
+        pending = [entry for entry in self._waiters if not entry[2].done()]
+        if not pending:
+            return False
+        worst = max(pending)
+        if worst[0] <= priority:
+            return False
+        worst[2].set_result(False)
+        self.evicted += 1
+        return True
+
+    def release(self):
+        """Free a slot, handing it straight to the most urgent waiter if any."""
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(True)
+                return
+        self.active -= 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "active": self.active,
+            "queued": self.queued,
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "evicted": self.evicted
+        }
+
+
+class AdmissionController:
+    """Matches requests to policies and holds their limiters and buckets."""
+
+    def __init__(
+        self,
+        policies: List[RoutePolicy],
+        incident_severity: Optional[Callable[[str], Optional[str]]] = None,
+        trusted_proxies: Iterable[str] = ()
+    ):
+        """Initialize the controller.
+
+        Args:
+            policies (List[RoutePolicy]): Checked in order; the first match applies
+            incident_severity: Returns the severity of an incident ID, used to
+                prioritize /incidents/{id}/... requests
+            trusted_proxies (Iterable[str]): Addresses or CIDR ranges of reverse proxies
+                whose X-Forwarded-For is believed; from any other peer it is ignored
+        """
+        self.policies = policies
+        self.incident_severity = incident_severity
+        self.trusted_proxies = [ipaddress.ip_network(proxy.strip(), strict=False) for proxy in trusted_proxies]
+        self.limiters = {
+            policy.name: PriorityLimiter(policy.max_concurrent, policy.max_queue)
+            for policy in policies if policy.max_concurrent is not None
+        }
+        self.address_buckets = {
+            policy.name: TokenBuckets(
+                policy.rate_per_client * CLIENTS_PER_ADDRESS, policy.burst * CLIENTS_PER_ADDRESS
+            )
+            for policy in policies if policy.rate_per_client
+        }
+        self.buckets = {
+            policy.name: TokenBuckets(policy.rate_per_client, policy.burst)
+            for policy in policies if policy.rate_per_client
+        }
+        self.rate_limited: Dict[str, int] = {policy.name: 0 for policy in policies}
+
+    def _is_trusted_proxy(self, address: str) -> bool:
+        try:
+            ip = ipaddress.ip_address(address)
+        except ValueError:
+            return False
+        return any(ip in network for network in self.trusted_proxies)
+
+    def client_address(self, scope) -> str:
+        """Address of the client: the peer, or the nearest untrusted hop it forwarded for."""
+        client = scope.get("client")
+        address = client[0] if client else "unknown"
+        if not self.trusted_proxies or not self._is_trusted_proxy(address):
+            return address
+        forwarded = ",".join(
+            value.decode("latin-1") for name, value in scope["headers"] if name == b"x-forwarded-for"
+        )
+        # Hops are appended left to right; anything left of the first untrusted hop can be forged
+        for hop in reversed([hop.strip() for hop in forwarded.split(",") if hop.strip()]):
+            if not self._is_trusted_proxy(hop):
+                return hop
+        return address
+
+    def try_acquire(self, policy: RoutePolicy, scope) -> float:
+        """Take a rate token for a request; returns 0 when allowed, otherwise seconds to wait."""
+        address = self.client_address(scope)
+        wait = self.address_buckets[policy.name].try_acquire(address)
+        if wait > 0:
+            return wait
+        return self.buckets[policy.name].try_acquire(f"{address}|{_client_id(scope)}")
+
+    def match(self, method: str, path: str) -> Optional[RoutePolicy]:
+        for policy in self.policies:
+            if policy.matches(method, path):
+                return policy
+        return None
+
+    def priority_for(self, path: str, body: Optional[Dict[str, Any]]) -> int:
+        """Lower is more urgent: severity from the body, or of the incident in the path."""
+        severity = None
+        if isinstance(body, dict):
+            severity = body.get("severity")
+            context = body.get("additional_context")
+            if severity is None and isinstance(context, dict):
+                severity = context.get("severity")
+        if severity is None and self.incident_severity is not None:
+            match = re.match(r"^/incidents/([^/]+)/", path)
+            if match:
+                severity = self.incident_severity(match.group(1))
+        return SEVERITY_PRIORITY.get(str(severity).lower(), DEFAULT_PRIORITY) if severity else DEFAULT_PRIORITY
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            policy.name: {
+                "concurrency": self.limiters[policy.name].get_stats() if policy.name in self.limiters else None,
+                "rate_limited": self.rate_limited[policy.name]
+            }
+            for policy in self.policies
+        }
+
+
+async def _send_rejection(send, status: int, detail: str, retry_after: float):
+    body = json.dumps({"detail": detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(max(1, math.ceil(retry_after))).encode())
+        ]
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _read_body(receive) -> Tuple[bytes, List[Dict[str, Any]]]:
+    messages = []
+    body = b""
+    while True:
+        message = await receive()
+        messages.append(message)
+        if message["type"] != "http.request":
+            break
+        body += message.get("body", b"")
+        if not message.get("more_body", False):
+            break
+    return body, messages
+
+
+class AdmissionMiddleware:
+    """ASGI middleware applying an AdmissionController to HTTP requests."""
+
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "OPTIONS":
+            return await self.app(scope, receive, send)
+
+        policy = self.controller.match(scope["method"], scope["path"])
+        if policy is None:
+            return await self.app(scope, receive, send)
+
+        if policy.rate_per_client:
+            wait = self.controller.try_acquire(policy, scope)
+            if wait > 0:
+                self.controller.rate_limited[policy.name] += 1
+                return await _send_rejection(send, 429, "Rate limit exceeded", wait)
+
+        limiter = self.controller.limiters.get(policy.name)
+        if limiter is None:
+            return await self.app(scope, receive, send)
+
+        body = None
+        if policy.read_severity and _content_length(scope) <= MAX_INSPECTED_BODY_BYTES:
+            raw, messages = await _read_body(receive)
+            receive = _replay(messages, receive)
+            try:
+                body = json.loads(raw) if raw else None
+            except ValueError:
+                body = None
+        priority = self.controller.priority_for(scope["path"], body)
+
+        if not await limiter.acquire(priority, policy.queue_timeout):
+            return await _send_rejection(
+                send, 503, f"Too many concurrent {policy.name} requests", policy.queue_timeout
+            )
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
+
+
+def _client_id(scope) -> str:
+    """Optional X-Client-Id, distinguishing clients that share an address."""
+    for name, value in scope["headers"]:
+        if name == b"x-client-id":
+            return value.decode("latin-1")[:64]
+    return ""
+
+
+def _content_length(scope) -> int:
+    for name, value in scope["headers"]:
+        if name == b"content-length":
+            try:
+                return int(value)
+            except ValueError:
+                break
+    # Unknown length (e.g. chunked): do not buffer it
+    return MAX_INSPECTED_BODY_BYTES + 1
+
+
+def _replay(messages: List[Dict[str, Any]], receive):
+    pending = list(messages)
+
+    async def replay_receive():
+        if pending:
+            return pending.pop(0)
+        return await receive()
+
+    return replay_receive
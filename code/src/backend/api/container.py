@@ -0,0 +1,136 @@
+"""
+Application container: the heavy, shared objects behind the API.
+
+One vector store, RAG system and Redis client are built per process, when
+the FastAPI lifespan starts (or on first use when lazy), and released when
+it ends. Nothing expensive happens at import time.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Dict, Optional
+
+from fastapi import Request
+
+from ..embeddings.document_processor import DocumentProcessor
+from ..embeddings.ingestion import IngestionQueue
+from ..embeddings.vector_store import VectorStoreManager
+from ..rag.complete_pipeline import IntegratedRAGSystem
+from ..utils.constants import ARTIFACTS_DIR
+from ..utils.redis_cache import create_redis_client
+
+logger = logging.getLogger(__name__)
+
+
+# Set in the pre-fork master process, inherited by every worker
+_preloaded_vector_store: Optional[VectorStoreManager] = None
+
+
+def _load_vector_store(mmap_documents: bool = False) -> VectorStoreManager:
+    """Load the saved index, or start an empty one if nothing has been ingested yet."""
+    vector_store = VectorStoreManager()
+    if os.path.exists(os.path.join(os.getcwd(), ARTIFACTS_DIR, "index.faiss")):
+        vector_store.load(ARTIFACTS_DIR, mmap_documents=mmap_documents)
+    return vector_store
+
+
+def preload_vector_store() -> VectorStoreManager:
+    """Load the index once in the master process, before workers are forked.
+
+    Workers then share the FAISS index pages copy-on-write (searches never
+    write to them) and the documents through a read-only memory map.
+    """
+    global _preloaded_vector_store
+    _preloaded_vector_store = _load_vector_store(mmap_documents=True)
+    return _preloaded_vector_store
+
+
+class AppContainer:
+    """Builds and owns the shared application components."""
+
+    def __init__(self, lazy: bool = False, rag_settings: Optional[Dict[str, Any]] = None):
+        """Initialize the container without building anything yet.
+
+        Args:
+            lazy (bool): Build components on first use instead of at startup
+            rag_settings (Dict, optional): Keyword arguments for IntegratedRAGSystem
+        """
+        self.lazy = lazy
+        self.rag_settings = rag_settings or {}
+        self.redis_client = None
+        self.document_processor: Optional[DocumentProcessor] = None
+        self.ingestion_queue: Optional[IngestionQueue] = None
+        self._rag_system: Optional[IntegratedRAGSystem] = None
+        self._init_lock = asyncio.Lock()
+        self.startup_status: Dict[str, Any] = {}
+        self.timings: Dict[str, float] = {}
+
+    @property
+    def initialized(self) -> bool:
+        return self._rag_system is not None
+
+    async def startup(self):
+        """Called when the lifespan starts; builds everything unless lazy."""
+        if not self.lazy:
+            await self.get_rag_system()
+
+    async def get_rag_system(self) -> IntegratedRAGSystem:
+        """The shared RAG system, built on the first call."""
+        if self._rag_system is None:
+            async with self._init_lock:
+                if self._rag_system is None:
+                    await self._build()
+        return self._rag_system
+
+    async def _build(self):
+        start = time.perf_counter()
+        use_cache = self.rag_settings.get("use_cache", True)
+        if use_cache:
+            # Creating the pool does not connect; connections are opened per command
+            self.redis_client = create_redis_client()
+
+        vector_store = _preloaded_vector_store
+        if vector_store is None:
+            # Loading FAISS and the pickled documents blocks, keep it off the event loop
+            vector_store = await asyncio.to_thread(_load_vector_store)
+        self.timings["vector_store_load"] = time.perf_counter() - start
+        self.document_processor = DocumentProcessor()
+
+        rag_system = IntegratedRAGSystem(
+            redis_client=self.redis_client,
+            vector_store=vector_store,
+            **self.rag_settings
+        )
+        self.startup_status = await rag_system.startup()
+        if use_cache and not self.startup_status["redis"]:
+            logger.warning("Redis is not reachable, queries will run without cache")
+        self.ingestion_queue = IngestionQueue(rag_system, self.document_processor)
+        self.ingestion_queue.start()
+        self._rag_system = rag_system
+        self.timings["ready"] = time.perf_counter() - start
+
+    async def aclose(self):
+        """Called when the lifespan ends; releases connections and background tasks."""
+        if self.ingestion_queue is not None:
+            await self.ingestion_queue.stop()
+            self.ingestion_queue = None
+        if self._rag_system is not None:
+            await self._rag_system.aclose()
+            self._rag_system = None
+        if self.redis_client is not None:
+            await self.redis_client.aclose()
+            self.redis_client = None
+
+
+async def get_rag_system(request: Request) -> IntegratedRAGSystem:
+    """FastAPI dependency returning the shared RAG system."""
+    return await request.app.state.container.get_rag_system()
+
+
+async def get_container(request: Request) -> AppContainer:
+    """FastAPI dependency returning the application container."""
+    container = request.app.state.container
+    await container.get_rag_system()
+    return container
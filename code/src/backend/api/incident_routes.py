@@ -5,8 +5,9 @@ API routes for incident management and agent interaction.
 from typing import Dict, Any, List, Optional
 from fastapi import APIRouter, HTTPException, Query
 
+from ..agents.fleet_health import FleetHealthSweeper
 from ..agents.incident_agent import IncidentAgent
-from ..agents.mocks.service_mocks import MockIncidentManager
+from ..agents.services import get_services
 from ..utils.pydantic_classes import IncidentCreate, IncidentResponse,ActionRequest, ActionResponse, AnalysisResponse
 
 
@@ -17,8 +18,18 @@ router = APIRouter(prefix="/incidents")
 # In a real app, you might want to use a more persistent solution
 incident_agents: Dict[str, IncidentAgent] = {}
 
-# Initialize mock incident manager
-incident_manager = MockIncidentManager()
+# Service clients shared with every agent, so agents and routes see the same incidents
+services = get_services()
+incident_manager = services.incident_manager
+
+# Health of every component, served by /health/components
+fleet_health = FleetHealthSweeper(services.monitoring, services.service_manager)
+
+
+def incident_severity(incident_id: str) -> Optional[str]:
+    """Severity of an incident, used by admission control to prioritize its requests."""
+    incident = incident_manager.get_incident(incident_id)
+    return incident.get("severity") if incident else None
 
 
 @router.post("/", response_model=IncidentResponse, status_code=201)
@@ -64,8 +75,8 @@ async def get_incident(incident_id: str):
 
 
 @router.post("/{incident_id}/analyze", response_model=AnalysisResponse)
-async def analyze_incident(incident_id: str):
-    """Analyze an incident and recommend actions."""
+async def analyze_incident(incident_id: str, refresh: bool = Query(False)):
+    """Analyze an incident and recommend actions (cached until an action changes state)."""
     # Check if the incident exists
     incident = incident_manager.get_incident(incident_id)
     if not incident:
@@ -76,7 +87,7 @@ async def analyze_incident(incident_id: str):
         incident_agents[incident_id] = IncidentAgent(incident)
     
     # Get analysis from the agent
-    analysis = incident_agents[incident_id].analyze_incident()
+    analysis = await incident_agents[incident_id].analyze_incident(refresh=refresh)
     return analysis
 
 
@@ -93,7 +104,7 @@ async def run_health_check(incident_id: str):
         incident_agents[incident_id] = IncidentAgent(incident)
     
     # Run health check
-    health_data = incident_agents[incident_id].run_health_check()
+    health_data = await incident_agents[incident_id].run_health_check()
     return health_data
 
 
@@ -114,7 +125,7 @@ async def execute_action(action: ActionRequest, incident_id: str):
     params["incident_id"] = incident_id
     
     # Execute the action
-    result = incident_agents[incident_id].execute_action(action.action_id, params)
+    result = await incident_agents[incident_id].execute_action(action.action_id, params)
     
     # Convert ActionResult to response
     return {
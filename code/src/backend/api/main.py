@@ -1,65 +1,142 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, UploadFile, File, HTTPException, Depends, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse
+import asyncio
+import logging
 import os
-import shutil
+import uuid
 import uvicorn
 
-from ..embeddings.document_processor import DocumentProcessor
-from ..embeddings.vector_store import VectorStoreManager
+from ..embeddings.ingestion import IngestionQueueFull
 from ..rag.complete_pipeline import IntegratedRAGSystem
 from ..utils.constants import ARTIFACTS_DIR, DATA_DIR
 from ..utils.pydantic_classes import QueryRequest, ExecuteCommandRequest
-from .incident_routes import router as incident_router
+from ..utils.metrics import render_metrics
+from .container import AppContainer, get_container, get_rag_system
+from .admission import AdmissionController, AdmissionMiddleware, RoutePolicy
+from .incident_routes import router as incident_router, incident_severity, fleet_health
+from .admin_routes import router as admin_router
+from .profiling import ProfilingMiddleware
+from .response_shaping import shape_query_response
 
-app = FastAPI(title="Platform Support RAG API")
+try:
+    import orjson  # noqa: F401
+    from fastapi.responses import ORJSONResponse as DefaultResponse
+except ImportError:
+    DefaultResponse = JSONResponse
+
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO").upper(),
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(20 * 1024 * 1024)))
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+
+RAG_SETTINGS = {
+    "use_cache": True,
+    "cache_ttl": 3600,
+    "max_context_documents": 3,
+    "context_window_size": 2000,
+    "k_retrieve": 12
+}
+
+# Checked in order, the first match applies; /metrics, /admin and /docs are not limited.
+# Incident work is queued by severity; dashboard polling has its own small lane
+# so it can never take the slots of incident work.
+ADMISSION_POLICIES = [
+    RoutePolicy("query", r"^POST /query$", max_concurrent=8, max_queue=32, queue_timeout=10.0,
+                rate_per_client=2.0, burst=10, read_severity=True),
+    RoutePolicy("incident_actions", r"^POST /incidents/[^/]+/(analyze|health-check|execute-action)$",
+                max_concurrent=16, max_queue=64, queue_timeout=5.0, rate_per_client=10.0, burst=20),
+    RoutePolicy("incident_writes", r"^POST /incidents/([^/]+/close)?$",
+                max_concurrent=8, max_queue=32, queue_timeout=5.0, read_severity=True),
+    RoutePolicy("documents", r"^POST /documents$", max_concurrent=4, max_queue=8, queue_timeout=2.0,
+                rate_per_client=1.0, burst=5),
+    # Ingestion job status is polled too, so it must not spend the upload budget
+    RoutePolicy("polling", r"^GET /(incidents|health|cache|documents/jobs/)", max_concurrent=4, max_queue=16,
+                queue_timeout=0.5, rate_per_client=5.0, burst=10),
+    RoutePolicy("default", r"^(POST|PUT|PATCH|DELETE) /(?!admin/)", max_concurrent=8, max_queue=16,
+                queue_timeout=2.0),
+]
+admission = AdmissionController(
+    ADMISSION_POLICIES,
+    incident_severity=incident_severity,
+    # Comma-separated addresses/CIDRs of the reverse proxies in front of the API
+    trusted_proxies=[proxy for proxy in os.getenv("TRUSTED_PROXIES", "").split(",") if proxy.strip()]
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Heavy components are built here, once per process, not at import time
+    container = AppContainer(
+        lazy=os.getenv("LAZY_INIT", "false").lower() in ("1", "true", "yes"),
+        rag_settings=RAG_SETTINGS
+    )
+    app.state.container = container
+    await container.startup()
+    try:
+        yield
+    finally:
+        await container.aclose()
 
-# Add CORS middleware
+
+app = FastAPI(title="Platform Support RAG API", lifespan=lifespan, default_response_class=DefaultResponse)
+
+# Middleware added last runs first (outermost)
+# Compress large responses (full-verbosity query results, document listings)
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+# Sheds excess load with 429/503 and Retry-After before any work is done
+app.add_middleware(AdmissionMiddleware, controller=admission)
+# Profiles only requests sent with a valid X-Profile header
+app.add_middleware(ProfilingMiddleware)
+# Outermost, so rejections from the layers above also carry CORS headers
+# and browsers can read their status and Retry-After
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Retry-After"],
 )
 
 
 os.makedirs(os.path.join(os.getcwd(),ARTIFACTS_DIR), exist_ok=True)
 os.makedirs(os.path.join(os.getcwd(),DATA_DIR), exist_ok=True)
 
-RAG_AVAILABLE = False
-VECTOR_STORE = False
-
-try:
-    document_processor = DocumentProcessor()
-    vector_store = VectorStoreManager()
-    RAG_AVAILABLE = True
-    VECTOR_STORE = False
-except:
-    print("Not available")
-    
-
-
-rag_system = IntegratedRAGSystem(
-    use_cache=True,
-    cache_ttl=3600,
-    max_context_documents=4,
-    context_window_size=2000
-)
 app.include_router(incident_router)
+app.include_router(admin_router)
+
 
 @app.post("/query")
 async def query(
-request: QueryRequest
+request: QueryRequest,
+rag_system: IntegratedRAGSystem = Depends(get_rag_system)
 ):
     try:
         # Process through the complete integrated pipeline
         result = await rag_system.process_query(
             query=request.query,
             additional_context=request.additional_context,
-            force_refresh=request.force_refresh
+            force_refresh=request.force_refresh,
+            mode=request.mode,
+            timeout=request.timeout,
+            session_id=request.session_id
+        )
+        logger.info(
+            "Answered query in %s mode with %d sources%s",
+            result.get("mode"),
+            len(result.get("context", {}).get("retrieved_documents", [])),
+            " (degraded)" if result.get("degraded") else ""
         )
-        print(result)
-        return result  # This will include both response and context information
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Query result: %s", result)
+        return shape_query_response(result, verbosity=request.verbosity, fields=request.fields)
         
     except Exception as e:
         raise HTTPException(
@@ -67,38 +144,118 @@ request: QueryRequest
             detail=f"Error processing query: {str(e)}"
         )
 
-@app.post("/documents")
-async def upload_document(file: UploadFile = File(...)):
-    """Upload a new document to the knowledge base."""
+@app.get("/cache/stats")
+async def cache_stats(rag_system: IntegratedRAGSystem = Depends(get_rag_system)):
+    """Hit/miss/eviction counters for the in-process and Redis cache tiers."""
+    return rag_system.get_cache_stats() or {"status": "cache disabled"}
+
+@app.post("/cache/clear")
+async def clear_cache(purge: bool = False, rag_system: IntegratedRAGSystem = Depends(get_rag_system)):
+    """Invalidate every cached answer; purge also deletes old entries in the background."""
+    if not await rag_system.clear_all_cache(purge=purge):
+        raise HTTPException(status_code=503, detail="Cache could not be cleared")
+    return {"message": "Cache cleared"}
+
+@app.get("/cache/warmup")
+async def cache_warmup_report(rag_system: IntegratedRAGSystem = Depends(get_rag_system)):
+    """Coverage report of the latest cache warm-up."""
+    return rag_system.get_warmup_report() or {"status": "no warm-up has run"}
+
+@app.post("/cache/warmup")
+async def cache_warmup(rag_system: IntegratedRAGSystem = Depends(get_rag_system)):
+    """Replay the most frequent historical queries in the background."""
+    if not rag_system.schedule_warmup("manual"):
+        raise HTTPException(status_code=409, detail="Warm-up is disabled or already running")
+    return {"message": "Cache warm-up started"}
+
+@app.post("/index/reload")
+async def reload_index(rag_system: IntegratedRAGSystem = Depends(get_rag_system)):
+    """Swap in the index saved on disk and warm the cache for it."""
+    index_version = await rag_system.reload_index()
+    return {"message": "Index reloaded", "index_version": index_version}
+
+@app.delete("/sessions/{session_id}")
+async def end_session(session_id: str, rag_system: IntegratedRAGSystem = Depends(get_rag_system)):
+    """End a chat session and drop its remembered context."""
+    deleted = await rag_system.end_session(session_id)
+    if not deleted:
+        raise HTTPException(status_code=404, detail=f"Session {session_id} not found")
+    return {"message": f"Session {session_id} ended"}
+
+async def _save_upload(file: UploadFile, destination: str) -> int:
+    """Stream an upload to disk in chunks, enforcing MAX_UPLOAD_BYTES."""
+    partial_path = f"{destination}.{uuid.uuid4().hex}.part"
+    size = 0
     try:
-        # Save the file
-        file_path = os.path.join(DATA_DIR, file.filename)
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-
-        # Process and add to vector store
-        documents = document_processor.load_documents(DATA_DIR)
-        vector_store.add_documents(documents)
-        
-        # Save updated vector store
-        vector_store.save(ARTIFACTS_DIR)
+        with open(partial_path, "wb") as buffer:
+            while chunk := await file.read(UPLOAD_CHUNK_BYTES):
+                size += len(chunk)
+                if size > MAX_UPLOAD_BYTES:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"File exceeds the {MAX_UPLOAD_BYTES} byte upload limit"
+                    )
+                await asyncio.to_thread(buffer.write, chunk)
+        os.replace(partial_path, destination)
+    finally:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+    return size
 
-        return {"message": "Document uploaded and processed successfully"}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+@app.post("/documents", status_code=202)
+async def upload_document(file: UploadFile = File(...), container: AppContainer = Depends(get_container)):
+    """Upload a new document; it is indexed by a background ingestion job."""
+    filename = os.path.basename(file.filename or "")
+    if not filename:
+        raise HTTPException(status_code=400, detail="A file name is required")
+
+    file_path = os.path.join(DATA_DIR, filename)
+    size = await _save_upload(file, file_path)
+    try:
+        job = container.ingestion_queue.submit(file_path, filename)
+    except IngestionQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "30"})
+
+    return {
+        "message": "Document uploaded, ingestion queued",
+        "job_id": job.job_id,
+        "bytes": size,
+        "status_url": f"/documents/jobs/{job.job_id}"
+    }
+
+@app.get("/documents/jobs/{job_id}")
+async def get_ingestion_job(job_id: str, container: AppContainer = Depends(get_container)):
+    """Status and progress of an ingestion job."""
+    job = container.ingestion_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Ingestion job {job_id} not found")
+    return job.to_dict()
 
 
 
 
 @app.get("/health")
-async def health_check():
+async def health_check(request: Request):
     """Check the health of the API and its dependencies."""
+    container = request.app.state.container
+    if not container.initialized:
+        # Lazy startup: report without forcing the components to load
+        return {"status": "starting", "rag_system": "not initialized", "vector_store": "not loaded"}
+
+    rag_system = await container.get_rag_system()
     health_status = {
         "status": "healthy",
-        "rag_system": "available" if RAG_AVAILABLE else "unavailable",
-        "vector_store": "available" if VECTOR_STORE else "unavailable",
-        "ollama": "available"
+        "rag_system": "available",
+        "vector_store": "available" if rag_system.vector_store.index is not None else "empty",
+        "ollama": "available",
+        "stage_timeouts": rag_system.get_stage_timeouts(),
+        "cache": rag_system.get_cache_health(),
+        "startup_timings": container.timings,
+        "admission": admission.get_stats()
     }
+    if health_status["cache"]["state"] not in ("closed", "disabled"):
+        # Queries still work, just without caching
+        health_status["status"] = "degraded"
     # if RAG_AVAILABLE and rag_chain:
     #     try:
     #         # Try a simple query to check Ollama
@@ -112,6 +269,19 @@ async def health_check():
 
  
 
+@app.get("/health/components")
+async def component_health(refresh: bool = False):
+    """Health of every known component, checked concurrently and cached briefly."""
+    return await fleet_health.sweep(refresh=refresh)
+
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics, aggregated across workers in multiprocess mode."""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+
 @app.post("/execute", tags=["Commands"])
 async def execute_command(request: ExecuteCommandRequest):
     try:
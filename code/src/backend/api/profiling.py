@@ -0,0 +1,108 @@
+"""
+On-demand profiling of single requests.
+
+A request carrying ``X-Profile: <ADMIN_TOKEN>`` is run under pyinstrument's
+sampling profiler. The profile is stored in speedscope format (open it at
+https://www.speedscope.app) and its ID is returned in the ``X-Profile-Id``
+response header; download it from ``/admin/profiles/{id}``. Profiling is off
+when ADMIN_TOKEN is unset or pyinstrument is not installed, and requests
+without the header only pay for one header lookup.
+"""
+
+import asyncio
+import hmac
+import os
+import time
+import uuid
+from typing import List, Optional
+
+try:
+    from pyinstrument import Profiler
+    from pyinstrument.renderers import SpeedscopeRenderer
+except ImportError:
+    Profiler = None
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join("backend", "profiles"))
+MAX_STORED_PROFILES = 50
+
+
+def admin_token() -> Optional[str]:
+    """Token guarding profiling and the admin endpoints, None when they are disabled."""
+    return os.getenv("ADMIN_TOKEN") or None
+
+
+def token_matches(candidate: Optional[str]) -> bool:
+    """Constant-time comparison against the configured admin token."""
+    token = admin_token()
+    return bool(token and candidate) and hmac.compare_digest(candidate.encode(), token.encode())
+
+
+def profile_path(profile_id: str) -> str:
+    return os.path.join(PROFILE_DIR, f"{profile_id}.speedscope.json")
+
+
+def list_profiles() -> List[str]:
+    """Stored profile IDs, newest first."""
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    names = sorted(
+        (entry for entry in os.scandir(PROFILE_DIR) if entry.name.endswith(".speedscope.json")),
+        key=lambda entry: entry.stat().st_mtime,
+        reverse=True
+    )
+    return [entry.name[:-len(".speedscope.json")] for entry in names]
+
+
+def _store_profile(profile_id: str, profiler) -> str:
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    path = profile_path(profile_id)
+    with open(path, "w") as f:
+        f.write(profiler.output(SpeedscopeRenderer()))
+    # Keep the directory bounded
+    for stale in list_profiles()[MAX_STORED_PROFILES:]:
+        os.remove(profile_path(stale))
+    return path
+
+
+class ProfilingMiddleware:
+    """ASGI middleware that profiles requests carrying a valid X-Profile header."""
+
+    def __init__(self, app, interval: float = 0.001):
+        """Wrap an ASGI app.
+
+        Args:
+            app: The ASGI application
+            interval (float): Sampling interval in seconds
+        """
+        self.app = app
+        self.interval = interval
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or Profiler is None:
+            return await self.app(scope, receive, send)
+
+        candidate = None
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER:
+                candidate = value.decode("latin-1")
+                break
+        if candidate is None or not token_matches(candidate):
+            return await self.app(scope, receive, send)
+
+        profile_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                message = dict(message, headers=list(message.get("headers", [])) + [
+                    (b"x-profile-id", profile_id.encode())
+                ])
+            await send(message)
+
+        profiler = Profiler(interval=self.interval, async_mode="enabled")
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            profiler.stop()
+            await asyncio.to_thread(_store_profile, profile_id, profiler)
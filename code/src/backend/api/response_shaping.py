@@ -0,0 +1,68 @@
+"""
+Response shaping for /query.
+
+The pipeline result carries every retrieved chunk in full, plus per-chunk
+metadata that repeats the same information. Clients usually only need the
+answer and which sources it came from, so the compact shape keeps source
+IDs, scores and short snippets under the same ``context.retrieved_documents``
+path.
+"""
+
+from typing import Any, Dict, List, Optional
+
+SNIPPET_CHARS = 240
+SOURCE_FIELDS = ("doc_id", "source", "score", "rerank_score", "chunk_size", "chunk_overlap")
+# Large or redundant parts of the full result left out of the compact shape
+FULL_ONLY_FIELDS = ("context", "extractive")
+
+
+def snippet(text: str, limit: int = SNIPPET_CHARS) -> str:
+    """Leading part of a chunk with whitespace collapsed."""
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[:limit].rstrip() + "..."
+
+
+def compact_source(doc: Dict[str, Any], snippet_chars: int = SNIPPET_CHARS) -> Dict[str, Any]:
+    """A source reference: IDs and scores, with a snippet instead of the full content."""
+    compact = {key: doc[key] for key in SOURCE_FIELDS if key in doc}
+    if snippet_chars > 0 and doc.get("content"):
+        compact["snippet"] = snippet(doc["content"], snippet_chars)
+    return compact
+
+
+def shape_query_response(
+    result: Dict[str, Any],
+    verbosity: str = "compact",
+    fields: Optional[List[str]] = None,
+    snippet_chars: int = SNIPPET_CHARS
+) -> Dict[str, Any]:
+    """Reduce a pipeline result to what the client asked for.
+
+    Args:
+        result (Dict): Result of IntegratedRAGSystem.process_query
+        verbosity (str): "compact" for source references and snippets, "full" for
+            the complete result including chunk contents and metadata
+        fields (List[str], optional): Top-level fields to return, e.g. ["response"];
+            fields only present in the full result (such as "extractive") can be
+            requested in compact mode as well
+        snippet_chars (int): Snippet length per source, 0 leaves snippets out
+
+    Returns:
+        Dict: The shaped response
+    """
+    if verbosity == "full":
+        shaped = result
+    else:
+        shaped = {key: value for key, value in result.items() if key not in FULL_ONLY_FIELDS}
+        context = result.get("context", {})
+        shaped["context"] = {
+            "retrieved_documents": [
+                compact_source(doc, snippet_chars) for doc in context.get("retrieved_documents", [])
+            ]
+        }
+        if "session_chunk_ids" in context:
+            shaped["context"]["session_chunk_ids"] = context["session_chunk_ids"]
+
+    if fields:
+        return {key: shaped.get(key, result.get(key)) for key in fields if key in shaped or key in result}
+    return shaped
@@ -0,0 +1,65 @@
+"""
+Benchmark incident action execution latency with and without the cached analysis.
+
+execute_action used to re-run a full analysis (health check with metrics and
+logs, KB search, similar incidents, step parsing) only to find the action by
+ID. This runs a diagnostic action repeatedly with the analysis invalidated
+before every call (the old behaviour) and with it cached, and times the
+action lookup alone.
+
+Run from code/src:
+    python -m backend.benchmarks.bench_action_latency --runs 10
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from ..agents.incident_agent import IncidentAgent
+from ..agents.mocks.service_mocks import MockIncidentManager
+
+
+def report(name: str, samples: list, unit: str = "ms", scale: float = 1000):
+    samples = sorted(samples)
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    print(f"{name:<22} p50={statistics.median(samples) * scale:9.2f} {unit}  p95={p95 * scale:9.2f} {unit}")
+
+
+async def time_action(agent: IncidentAgent, action_id: str, runs: int, invalidate: bool) -> list:
+    samples = []
+    for _ in range(runs):
+        if invalidate:
+            agent.invalidate_analysis()
+        start = time.perf_counter()
+        result = await agent.execute_action(action_id)
+        samples.append(time.perf_counter() - start)
+        assert result.success, result.error
+    return samples
+
+
+async def main(runs: int, lookups: int):
+    incident = MockIncidentManager().get_incident("INC000001")
+    agent = IncidentAgent(incident)
+    analysis = await agent.analyze_incident()
+    action_id = next(
+        action["id"] for action in analysis["recommended_actions"] if action["action_type"] == "diagnostic"
+    )
+
+    report("re-analyze per action", await time_action(agent, action_id, runs, invalidate=True))
+    report("cached analysis", await time_action(agent, action_id, runs, invalidate=False))
+
+    lookup_samples = []
+    for _ in range(lookups):
+        start = time.perf_counter()
+        await agent.get_action(action_id)
+        lookup_samples.append(time.perf_counter() - start)
+    report("action lookup", lookup_samples, unit="us", scale=1e6)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--lookups", type=int, default=10000)
+    args = parser.parse_args()
+    asyncio.run(main(args.runs, args.lookups))
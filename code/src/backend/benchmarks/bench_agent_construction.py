@@ -0,0 +1,56 @@
+"""
+Benchmark IncidentAgent construction cost.
+
+Compares agents that each build their own service clients (as every agent
+did before the shared registry: fresh monitoring history, seeded incident
+manager, ...) with agents sharing the process-wide registry. Reports time
+per agent and memory retained by N agents, measured with tracemalloc.
+
+Run from code/src:
+    python -m backend.benchmarks.bench_agent_construction --agents 1000
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+
+from ..agents.incident_agent import IncidentAgent
+from ..agents.services import get_services, mock_services
+
+INCIDENT = {
+    "id": "INC000001",
+    "title": "API Gateway High CPU Usage",
+    "component": "api-gateway",
+    "severity": "high",
+    "description": "API Gateway showing sustained high CPU usage above 85%.",
+    "affected_service": "Data Analytics"
+}
+
+
+def measure(name: str, make_agent, agents: int):
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    created = [make_agent() for _ in range(agents)]
+    elapsed = time.perf_counter() - start
+    retained = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    print(
+        f"{name:<20} {elapsed / agents * 1e6:9.1f} us/agent  "
+        f"{retained / agents / 1024:8.1f} KiB/agent  ({len(created)} agents)"
+    )
+
+
+def main(agents: int):
+    shared = get_services()
+    measure("per-agent services", lambda: IncidentAgent(INCIDENT, mock_services()), agents)
+    measure("shared registry", lambda: IncidentAgent(INCIDENT, shared), agents)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--agents", type=int, default=1000)
+    args = parser.parse_args()
+    main(args.agents)
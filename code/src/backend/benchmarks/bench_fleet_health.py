@@ -0,0 +1,95 @@
+"""
+Benchmark fleet health sweeps over many components.
+
+Builds monitoring and service-management mocks with N synthetic components
+and a fixed simulated round-trip latency per call. It then measures:
+
+- sweep duration at several concurrency caps, which should be roughly
+  ceil(N / cap) * latency;
+- many simultaneous callers, which should share one sweep;
+- a cached repeat.
+
+Run from code/src:
+    python -m backend.benchmarks.bench_fleet_health --components 2000 --latency 0.02
+"""
+
+import argparse
+import asyncio
+import copy
+import time
+
+from ..agents.fleet_health import FleetHealthSweeper
+from ..agents.mocks.service_mocks import MockMonitoringService, MockServiceManager
+from ..utils.constants import MONITORING_SERVICES_MOCK_STATE, MOCK_SERVICES
+
+TEMPLATES = ("api-gateway", "database", "message-queue")
+
+
+class SlowMonitoring(MockMonitoringService):
+    def __init__(self, state, latency):
+        super().__init__(state)
+        self.latency = latency
+        self.calls = 0
+
+    async def query_many(self, metrics, filter, timeframe="last_15m"):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        return await super().query_many(metrics, filter, timeframe)
+
+
+class SlowServiceManager(MockServiceManager):
+    def __init__(self, services, latency):
+        super().__init__()
+        self.services = services
+        self.latency = latency
+
+    async def get_service_info(self, service):
+        await asyncio.sleep(self.latency)
+        return await super().get_service_info(service)
+
+
+def make_clients(components: int, latency: float):
+    state, services = {}, {}
+    for i in range(components):
+        template = TEMPLATES[i % len(TEMPLATES)]
+        # Synthetic names have no metric table, so they report "unknown"; the cost is the same
+        name = template if i < len(TEMPLATES) else f"{template}-{i}"
+        state[name] = copy.deepcopy(MONITORING_SERVICES_MOCK_STATE[template])
+        services[name] = copy.deepcopy(MOCK_SERVICES.get(template, {"status": "running"}))
+    return SlowMonitoring(state, latency), SlowServiceManager(services, latency)
+
+
+async def main(components: int, latency: float, callers: int):
+    monitoring, service_manager = make_clients(components, latency)
+
+    for concurrency in (16, 64, 256):
+        sweeper = FleetHealthSweeper(monitoring, service_manager, concurrency=concurrency)
+        start = time.perf_counter()
+        result = await sweeper.sweep()
+        print(
+            f"concurrency={concurrency:4d}  components={len(result['components'])}  "
+            f"sweep={time.perf_counter() - start:6.2f}s  "
+            f"expected~{-(-components // concurrency) * latency:5.2f}s"
+        )
+
+    sweeper = FleetHealthSweeper(monitoring, service_manager, concurrency=64)
+    monitoring.calls = 0
+    start = time.perf_counter()
+    await asyncio.gather(*(sweeper.sweep() for _ in range(callers)))
+    print(
+        f"{callers} simultaneous callers: {time.perf_counter() - start:6.2f}s, "
+        f"{monitoring.calls / components:.0f} sweep(s) run"
+    )
+
+    start = time.perf_counter()
+    result = await sweeper.sweep()
+    print(f"cached repeat: {(time.perf_counter() - start) * 1000:.2f} ms (cached={result['cached']})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--components", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--callers", type=int, default=100)
+    args = parser.parse_args()
+    asyncio.run(main(args.components, args.latency, args.callers))
@@ -0,0 +1,98 @@
+"""
+Benchmark per-worker memory with a preloaded, shared index.
+
+Forks N workers that each run searches and read the matched documents, then
+reports every worker's private (unshared) memory from /proc/<pid>/smaps_rollup.
+Modes:
+
+- ``per-worker``: every worker loads the index and pickled documents itself,
+  as under ``uvicorn --workers N``
+- ``prefork``: the parent loads the index and the memory-mapped document
+  store once and freezes the GC before forking, as ``backend.serve`` does
+
+Linux only. Needs saved artifacts in backend/vstore_artifacts.
+
+Run from code/src:
+    python -m backend.benchmarks.bench_prefork_memory --workers 4 --searches 200
+"""
+
+import argparse
+import gc
+import os
+import statistics
+import time
+
+import faiss
+import numpy as np
+
+from ..api.container import _load_vector_store
+
+
+def private_kb(pid: int) -> int:
+    """Private_Clean + Private_Dirty of a process, in kB."""
+    total = 0
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            if line.startswith(("Private_Clean:", "Private_Dirty:")):
+                total += int(line.split()[1])
+    return total
+
+
+def work(vector_store, searches: int):
+    faiss.omp_set_num_threads(1)
+    if vector_store.index is None:
+        return
+    rng = np.random.default_rng(os.getpid())
+    for _ in range(searches):
+        query = rng.random((1, vector_store.dimension), dtype=np.float32)
+        for doc in vector_store.search_by_vector(query, k=4):
+            doc["content"].upper()
+
+
+def run(mode: str, workers: int, searches: int):
+    shared = None
+    if mode == "prefork":
+        shared = _load_vector_store(mmap_documents=True)
+        gc.collect()
+        gc.freeze()
+
+    read_fds = []
+    pids = []
+    for _ in range(workers):
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            vector_store = shared if shared is not None else _load_vector_store()
+            work(vector_store, searches)
+            # Signal that work is done, then wait to be measured
+            os.write(write_fd, b"1")
+            time.sleep(3600)
+            os._exit(0)
+        os.close(write_fd)
+        read_fds.append(read_fd)
+        pids.append(pid)
+
+    for fd in read_fds:
+        os.read(fd, 1)
+        os.close(fd)
+    sizes = [private_kb(pid) / 1024 for pid in pids]
+    for pid in pids:
+        os.kill(pid, 9)
+        os.waitpid(pid, 0)
+    if shared is not None:
+        gc.unfreeze()
+
+    print(
+        f"{mode:<10} workers={workers}  private MB per worker: "
+        f"median={statistics.median(sizes):8.1f}  max={max(sizes):8.1f}  total={sum(sizes):8.1f}"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--searches", type=int, default=200)
+    args = parser.parse_args()
+    for mode in ("per-worker", "prefork"):
+        run(mode, args.workers, args.searches)
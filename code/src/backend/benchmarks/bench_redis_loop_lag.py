@@ -0,0 +1,89 @@
+"""
+Benchmark event-loop lag while the cache layer is under load.
+
+Runs concurrent cache lookups through the old synchronous ``redis.Redis``
+client (as RedisCacheManager used to) and through the shared asyncio
+client, while a ticker task measures how late the event loop wakes it up.
+Needs a Redis server on localhost:6379.
+
+Run from code/src:
+    python -m backend.benchmarks.bench_redis_loop_lag --requests 2000 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import redis
+
+from ..utils.redis_cache import GENERATION_KEY, RedisCacheManager, create_redis_client
+
+TICK = 0.001
+
+
+async def measure_lag(stop: asyncio.Event, lags: list):
+    """Record how much later than requested each 1 ms sleep returns."""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK)
+        lags.append(time.perf_counter() - start - TICK)
+
+
+async def run_load(name: str, lookup, requests: int, concurrency: int):
+    stop = asyncio.Event()
+    lags = []
+    ticker = asyncio.create_task(measure_lag(stop, lags))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with semaphore:
+            await lookup(f"benchmark query {i % 100}")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await ticker
+
+    lags.sort()
+    print(
+        f"{name:<10} {requests / elapsed:8.0f} req/s  "
+        f"loop lag p50={statistics.median(lags) * 1000:6.2f} ms  "
+        f"p99={lags[int(len(lags) * 0.99) - 1] * 1000:6.2f} ms  max={lags[-1] * 1000:6.2f} ms"
+    )
+
+
+async def main(requests: int, concurrency: int):
+    payload = {"response": "x" * 2000, "context": {"retrieved_documents": []}}
+
+    # Before: blocking client inside async methods
+    sync_client = redis.Redis()
+    sync_manager = RedisCacheManager(redis_client=create_redis_client())
+    generation = int(sync_client.get(GENERATION_KEY) or 0)
+    for i in range(100):
+        key = sync_manager._generate_cache_key(f"benchmark query {i}", generation=generation)
+        sync_client.setex(key, 300, json.dumps(payload))
+
+    async def sync_lookup(query):
+        data = sync_client.get(sync_manager._generate_cache_key(query, generation=generation))
+        return json.loads(data) if data else None
+
+    # After: shared asyncio client with a connection pool
+    async_manager = RedisCacheManager(redis_client=create_redis_client(max_connections=concurrency))
+
+    await run_load("sync", sync_lookup, requests, concurrency)
+    await run_load("asyncio", async_manager.get_cached_context, requests, concurrency)
+
+    sync_client.close()
+    await sync_manager.redis_client.aclose()
+    await async_manager.redis_client.aclose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency))
@@ -0,0 +1,105 @@
+"""
+Benchmark prompt size and latency with and without the second-stage reranker.
+
+Compares plain vector search at a large k (what operators set
+max_context_documents to today) against over-fetch + rerank down to a
+small k_final. Needs Ollama running for embeddings (and for generation
+with --with-llm).
+
+Run from code/src:
+    python -m backend.benchmarks.bench_reranker --queries 20 --with-llm
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+
+from ..embeddings.vector_store import VectorStoreManager
+from ..rag.deadlines import Deadline
+from ..rag.model_context_protocol import ModelContextProtocol
+from ..rag.rag_pipeline import RAGChain
+from ..rag.reranker import Reranker
+from ..rag.extractive import parse_incident_chunk
+from ..utils.constants import ARTIFACTS_DIR, DATA_DIR
+from ..utils.pydantic_classes import ModelContext
+
+
+def load_queries(limit: int):
+    """Build queries (and their expected component/issue) from the incident dataset."""
+    with open(os.path.join(DATA_DIR, "it_incidents.json")) as f:
+        incidents = json.load(f)
+    return [
+        (f"{incident['issue_type']} in {incident['component']}", incident["component"], incident["issue_type"])
+        for incident in incidents[:limit]
+    ]
+
+
+def is_hit(sources, component: str, issue: str) -> bool:
+    """Whether the top source contains an incident with the expected component and issue."""
+    if not sources:
+        return False
+    return any(
+        incident["component"] == component and incident["issue"] == issue
+        for incident in parse_incident_chunk(sources[0]["content"])
+    )
+
+
+async def run_config(name: str, protocol: ModelContextProtocol, queries, with_llm: bool):
+    prompt_chars, latencies, hits = [], [], 0
+    for query, component, issue in queries:
+        start = time.perf_counter()
+        if with_llm:
+            result = await protocol.process_query(query, force_refresh=True)
+            sources = result["context"]["retrieved_documents"]
+        else:
+            sources = await protocol._retrieve(query, Deadline())
+        latencies.append(time.perf_counter() - start)
+
+        prompt = protocol._format_context_for_model(ModelContext(
+            original_query=query,
+            retrieved_documents=sources,
+            metadata=[protocol._create_context_metadata(doc) for doc in sources]
+        ))
+        prompt_chars.append(len(prompt))
+        hits += is_hit(sources, component, issue)
+
+    print(
+        f"{name:<28} prompt chars avg={statistics.mean(prompt_chars):8.0f} "
+        f"(~{statistics.mean(prompt_chars) / 4:6.0f} tokens)  "
+        f"latency p50={statistics.median(latencies) * 1000:8.1f} ms  "
+        f"top-1 hit rate={hits / len(queries):.0%}"
+    )
+
+
+async def main(num_queries: int, k_baseline: int, k_retrieve: int, k_final: int, with_llm: bool):
+    vector_store = VectorStoreManager()
+    vector_store.load(ARTIFACTS_DIR)
+    queries = load_queries(num_queries)
+
+    baseline = ModelContextProtocol(
+        rag_chain=RAGChain(vector_store=vector_store),
+        max_context_documents=k_baseline,
+        use_cache=False
+    )
+    reranked = ModelContextProtocol(
+        rag_chain=RAGChain(vector_store=vector_store, reranker=Reranker(), k_retrieve=k_retrieve),
+        max_context_documents=k_final,
+        use_cache=False
+    )
+
+    await run_config(f"vector k={k_baseline}", baseline, queries, with_llm)
+    await run_config(f"rerank {k_retrieve}->{k_final}", reranked, queries, with_llm)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--k-baseline", type=int, default=8)
+    parser.add_argument("--k-retrieve", type=int, default=12)
+    parser.add_argument("--k-final", type=int, default=3)
+    parser.add_argument("--with-llm", action="store_true", help="Measure end-to-end latency including generation")
+    args = parser.parse_args()
+    asyncio.run(main(args.queries, args.k_baseline, args.k_retrieve, args.k_final, args.with_llm))
@@ -0,0 +1,94 @@
+"""
+Benchmark /query response size and serialization time per verbosity.
+
+Builds a result shaped like the pipeline's (answer, retrieved chunks with
+full content, per-chunk metadata) and compares the full and compact shapes:
+encoded size, gzip size, and encoding time with json and, when installed,
+orjson.
+
+Run from code/src:
+    python -m backend.benchmarks.bench_response_size --docs 4 --chunk-chars 1000
+"""
+
+import argparse
+import gzip
+import json
+import random
+import string
+import time
+
+from ..api.response_shaping import shape_query_response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def make_result(docs: int, chunk_chars: int) -> dict:
+    rng = random.Random(0)
+
+    def text(n):
+        return " ".join(
+            "".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 9))) for _ in range(n // 6)
+        )[:n]
+
+    documents = [
+        {
+            "doc_id": i,
+            "source": f"backend/data/incidents_{i}.txt",
+            "score": round(rng.random(), 4),
+            "rerank_score": round(rng.random() * 10, 4),
+            "chunk_size": 1000,
+            "chunk_overlap": 200,
+            "content": text(chunk_chars)
+        }
+        for i in range(docs)
+    ]
+    return {
+        "response": text(1500),
+        "mode": "generative",
+        "context": {
+            "original_query": "database connection pool exhausted",
+            "retrieved_documents": documents,
+            "metadata": [
+                {"source": doc["source"], "relevance_score": doc["score"],
+                 "chunk_info": {"size": 1000, "overlap": 200}}
+                for doc in documents
+            ],
+            "additional_context": None
+        }
+    }
+
+
+def time_encode(encode, value, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        encode(value)
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main(docs: int, chunk_chars: int, repeat: int):
+    result = make_result(docs, chunk_chars)
+    encoders = {"json": lambda value: json.dumps(value).encode()}
+    if orjson is not None:
+        encoders["orjson"] = orjson.dumps
+
+    for verbosity in ("full", "compact"):
+        shaped = shape_query_response(result, verbosity=verbosity)
+        body = json.dumps(shaped).encode()
+        timings = "  ".join(
+            f"{name}={time_encode(encode, shaped, repeat):7.1f} us" for name, encode in encoders.items()
+        )
+        print(
+            f"{verbosity:<8} {len(body):7d} bytes  gzip {len(gzip.compress(body)):6d} bytes  {timings}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--docs", type=int, default=4)
+    parser.add_argument("--chunk-chars", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+    main(args.docs, args.chunk_chars, args.repeat)
@@ -0,0 +1,65 @@
+"""
+Benchmark API startup: import time and time until ready to serve.
+
+Each measurement runs in a fresh interpreter so module caches do not carry
+over. "import" is ``import backend.api.main``; "ready" runs the FastAPI
+lifespan startup, eagerly or lazily (LAZY_INIT=1), followed by the first
+component access a request would trigger.
+
+Run from code/src:
+    python -m backend.benchmarks.bench_startup --runs 5
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+PROBE = r"""
+import asyncio, json, time
+start = time.perf_counter()
+import backend.api.main as main
+imported = time.perf_counter()
+
+async def run():
+    async with main.app.router.lifespan_context(main.app):
+        started = time.perf_counter()
+        await main.app.state.container.get_rag_system()
+        first_use = time.perf_counter()
+    return started, first_use
+
+started, first_use = asyncio.run(run())
+print(json.dumps({
+    "import": imported - start,
+    "lifespan_startup": started - imported,
+    "first_use": first_use - started,
+    "ready": first_use - start
+}))
+"""
+
+
+def measure(lazy: bool) -> dict:
+    env = dict(os.environ, LAZY_INIT="1" if lazy else "0")
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE], env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(runs: int):
+    for lazy in (False, True):
+        samples = [measure(lazy) for _ in range(runs)]
+        summary = {
+            name: round(statistics.median(sample[name] for sample in samples) * 1000, 1)
+            for name in samples[0]
+        }
+        print(f"{'lazy' if lazy else 'eager':<6} median ms: {json.dumps(summary)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    main(args.runs)
@@ -47,6 +47,14 @@ class DocumentProcessor:
         documents = loader.load()
         return self._process_documents(documents)
 
+    def load_document(self, file_path: str) -> List[Dict]:
+        """Load and chunk a single file.
+        
+        Args:
+            file_path (str): Path to the file
+        """
+        return self._process_documents(TextLoader(file_path).load())
+
     def _process_documents(self, documents: List) -> List[Dict]:
         """Process and chunk documents."""
         processed_docs = []
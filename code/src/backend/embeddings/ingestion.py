@@ -0,0 +1,187 @@
+"""
+Background ingestion jobs for uploaded documents.
+
+Uploads are queued as jobs and processed by a fixed number of worker tasks:
+each job chunks its file, embeds the chunks in batches (reporting progress)
+and then adds them to the live index in one step. The queue is bounded, so
+a burst of uploads is rejected instead of piling up in memory. The uploaded
+file of a failed job is deleted, so it is not picked up by a later rebuild.
+"""
+
+import asyncio
+import logging
+import os
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field, asdict
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from .document_processor import DocumentProcessor
+
+logger = logging.getLogger(__name__)
+
+
+class IngestionQueueFull(Exception):
+    """Raised when no more jobs can be queued."""
+
+
+@dataclass
+class IngestionJob:
+    """State of one document ingestion."""
+    job_id: str
+    filename: str
+    path: str
+    status: str = "queued"  # queued, running, completed, failed
+    stage: Optional[str] = None  # chunking, embedding, indexing
+    chunks_total: int = 0
+    chunks_embedded: int = 0
+    error: Optional[str] = None
+    index_version: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    @property
+    def progress(self) -> float:
+        if self.status == "completed":
+            return 1.0
+        if not self.chunks_total:
+            return 0.0
+        # Embedding dominates the cost; indexing is the last sliver
+        return round(0.95 * self.chunks_embedded / self.chunks_total, 3)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        del data["path"]
+        data["progress"] = self.progress
+        return data
+
+
+class IngestionQueue:
+    """Bounded queue of ingestion jobs served by a fixed pool of worker tasks."""
+
+    def __init__(
+        self,
+        rag_system,
+        document_processor: DocumentProcessor,
+        workers: int = 2,
+        max_queued: int = 32,
+        embed_batch_size: int = 16,
+        max_tracked_jobs: int = 500
+    ):
+        """Initialize the queue; call start() once the event loop is running.
+
+        Args:
+            rag_system (IntegratedRAGSystem): System whose live index receives the documents
+            document_processor (DocumentProcessor): Chunker for uploaded files
+            workers (int): Jobs processed concurrently
+            max_queued (int): Jobs allowed to wait before submissions are rejected
+            embed_batch_size (int): Chunks embedded per call, the granularity of progress
+            max_tracked_jobs (int): Finished jobs kept for status lookups
+        """
+        self.rag_system = rag_system
+        self.document_processor = document_processor
+        self.workers = workers
+        self.embed_batch_size = embed_batch_size
+        self.max_tracked_jobs = max_tracked_jobs
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queued)
+        self._jobs: "OrderedDict[str, IngestionJob]" = OrderedDict()
+        self._tasks = []
+
+    def start(self):
+        """Start the worker tasks."""
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        """Cancel the workers; queued jobs are abandoned."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, path: str, filename: str) -> IngestionJob:
+        """Queue a file for ingestion.
+
+        Raises:
+            IngestionQueueFull: If the queue is at capacity
+        """
+        job = IngestionJob(job_id=uuid.uuid4().hex, filename=filename, path=path)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise IngestionQueueFull(f"{self._queue.maxsize} ingestion jobs are already queued")
+        self._jobs[job.job_id] = job
+        self._forget_finished_jobs()
+        return job
+
+    def get(self, job_id: str) -> Optional[IngestionJob]:
+        return self._jobs.get(job_id)
+
+    def get_stats(self) -> Dict[str, Any]:
+        counts: Dict[str, int] = {}
+        for job in self._jobs.values():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return {"queued": self._queue.qsize(), "workers": self.workers, "jobs": counts}
+
+    def _forget_finished_jobs(self):
+        while len(self._jobs) > self.max_tracked_jobs:
+            oldest_id = next(
+                (job_id for job_id, job in self._jobs.items() if job.status in ("completed", "failed")),
+                None
+            )
+            if oldest_id is None:
+                return
+            del self._jobs[oldest_id]
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Ingestion of %s failed: %s", job.filename, e)
+                job.status = "failed"
+                job.error = str(e)
+                self._discard_upload(job)
+            finally:
+                job.finished_at = time.time()
+                self._queue.task_done()
+
+    @staticmethod
+    def _discard_upload(job: IngestionJob):
+        try:
+            os.remove(job.path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning("Could not delete upload %s: %s", job.path, e)
+
+    async def _run(self, job: IngestionJob):
+        job.status = "running"
+        job.started_at = time.time()
+
+        job.stage = "chunking"
+        documents = await asyncio.to_thread(self.document_processor.load_document, job.path)
+        job.chunks_total = len(documents)
+        if not documents:
+            raise ValueError("The file contains no text to index")
+
+        # Embed in batches so progress is visible and other jobs interleave
+        job.stage = "embedding"
+        vector_store = self.rag_system.vector_store
+        batches = []
+        for start in range(0, len(documents), self.embed_batch_size):
+            batch = documents[start:start + self.embed_batch_size]
+            batches.append(await asyncio.to_thread(vector_store.embed_documents, batch))
+            job.chunks_embedded += len(batch)
+
+        job.stage = "indexing"
+        job.index_version = await self.rag_system.add_documents(documents, np.vstack(batches))
+        job.status = "completed"
+        logger.info("Ingested %s: %d chunks", job.filename, len(documents))
@@ -0,0 +1,80 @@
+"""
+Ollama embeddings client with a request timeout.
+
+langchain_community's OllamaEmbeddings posts without a timeout and offers no
+public way to set one, so a stuck Ollama server keeps the calling thread
+blocked forever, even after the caller stopped waiting. This client speaks
+the same /api/embeddings protocol, with the same instruction prefixes, so
+the vectors it returns are identical, and every request is bounded.
+"""
+
+import os
+from typing import Dict, List, Optional
+
+import requests
+from langchain_core.embeddings import Embeddings
+
+EMBED_REQUEST_TIMEOUT = float(os.getenv("EMBED_REQUEST_TIMEOUT", "30"))
+OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+
+
+class OllamaEmbeddingClient(Embeddings):
+    """Embeds texts with a model served by Ollama, one request per text."""
+
+    def __init__(
+        self,
+        model: str,
+        base_url: str = OLLAMA_BASE_URL,
+        request_timeout: Optional[float] = EMBED_REQUEST_TIMEOUT,
+        embed_instruction: str = "passage: ",
+        query_instruction: str = "query: ",
+        headers: Optional[Dict[str, str]] = None
+    ):
+        """Initialize the client.
+
+        Args:
+            model (str): Ollama model name
+            base_url (str): URL of the Ollama server
+            request_timeout (float, optional): Seconds before a request is abandoned,
+                None waits indefinitely
+            embed_instruction (str): Prefix for documents (OllamaEmbeddings' default)
+            query_instruction (str): Prefix for queries (OllamaEmbeddings' default)
+            headers (Dict[str, str], optional): Extra HTTP headers, e.g. Authorization
+        """
+        self.model = model
+        self.base_url = base_url.rstrip("/")
+        self.request_timeout = request_timeout
+        self.embed_instruction = embed_instruction
+        self.query_instruction = query_instruction
+        self.headers = headers or {}
+
+    def _embed_one(self, text: str) -> List[float]:
+        """Embed a single prompt.
+
+        Raises:
+            ValueError: If the request fails, times out or the response has no embedding
+        """
+        try:
+            res = requests.post(
+                f"{self.base_url}/api/embeddings",
+                headers={"Content-Type": "application/json", **self.headers},
+                json={"model": self.model, "prompt": text},
+                timeout=self.request_timeout,
+            )
+        except requests.exceptions.RequestException as e:
+            raise ValueError(f"Error raised by inference endpoint: {e}")
+
+        if res.status_code != 200:
+            raise ValueError(f"Error raised by inference API HTTP code: {res.status_code}, {res.text}")
+        try:
+            return res.json()["embedding"]
+        except (ValueError, KeyError) as e:
+            raise ValueError(f"Error raised by inference API: {e}.\nResponse: {res.text}")
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed document chunks."""
+        return [self._embed_one(f"{self.embed_instruction}{text}") for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a search query."""
+        return self._embed_one(f"{self.query_instruction}{text}")
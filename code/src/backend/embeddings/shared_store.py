@@ -0,0 +1,123 @@
+"""
+Read-only document store backed by a memory-mapped file.
+
+A list of document dicts is private memory in every worker: even reading it
+updates reference counts, which dirties the pages after a fork. This store
+keeps the encoded documents in a file mapped read-only, so all workers share
+one copy through the page cache, and each document is decoded on access.
+
+File layout: magic ``DS``, format version (1 byte), padding, document
+count (uint64), ``count + 1`` uint64 offsets, then the encoded documents.
+"""
+
+import mmap
+import os
+import struct
+from typing import Dict, Iterator, List, Sequence
+
+from ..utils import serialization
+
+MAGIC = b"DS"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<2sB5xQ")
+OFFSET = struct.Struct("<Q")
+
+
+def write_document_store(path: str, documents: Sequence[Dict]):
+    """Write documents in the mapped store format, replacing the file atomically.
+
+    Args:
+        path (str): Destination file
+        documents (Sequence[Dict]): JSON-compatible document dicts
+    """
+    _write_blobs(path, [], b"", [serialization.encode(doc) for doc in documents])
+
+
+def _write_blobs(path: str, offsets: List[int], data, blobs: List[bytes]):
+    """Write ``data`` (already encoded documents at ``offsets``) followed by ``blobs``."""
+    offsets = list(offsets) or [0]
+    for blob in blobs:
+        offsets.append(offsets[-1] + len(blob))
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(offsets) - 1))
+        f.write(struct.pack(f"<{len(offsets)}Q", *offsets))
+        f.write(data)
+        for blob in blobs:
+            f.write(blob)
+    # Workers that mapped the old file keep reading it until they reload
+    os.replace(tmp_path, path)
+
+
+class MappedDocumentStore:
+    """Sequence of documents decoded on demand from a read-only mapping."""
+
+    def __init__(self, path: str):
+        """Map a file written by :func:`write_document_store`.
+
+        Raises:
+            serialization.SerializationError: If the file is not a document store
+        """
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, self._count = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise serialization.SerializationError(f"{path} is not a version {FORMAT_VERSION} document store")
+        self._offsets_at = HEADER.size
+        self._data_at = HEADER.size + (self._count + 1) * OFFSET.size
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, i: int) -> Dict:
+        """Decode one document; every call returns a new dict."""
+        if i < 0:
+            i += self._count
+        if not 0 <= i < self._count:
+            raise IndexError("document index out of range")
+        start, end = struct.unpack_from("<2Q", self._map, self._offsets_at + i * OFFSET.size)
+        return serialization.decode(self._map[self._data_at + start:self._data_at + end])
+
+    def __iter__(self) -> Iterator[Dict]:
+        for i in range(self._count):
+            yield self[i]
+
+    def write(self, path: str, documents: Sequence[Dict] = ()):
+        """Write this store, followed by more documents, to a new store file.
+
+        Documents already in the store are copied as encoded bytes, without
+        being decoded into this process's memory.
+
+        Args:
+            path (str): Destination file, replaced atomically (it may be this store's own file)
+            documents (Sequence[Dict]): Documents appended after the existing ones
+        """
+        offsets = struct.unpack_from(f"<{self._count + 1}Q", self._map, self._offsets_at)
+        data = memoryview(self._map)[self._data_at:self._data_at + offsets[-1]]
+        try:
+            _write_blobs(path, offsets, data, [serialization.encode(doc) for doc in documents])
+        finally:
+            data.release()
+
+    def extend(self, documents: Sequence[Dict], path: str) -> "MappedDocumentStore":
+        """A new mapped store holding these documents followed by ``documents``.
+
+        This store stays valid, so readers holding it are not disturbed.
+
+        Args:
+            documents (Sequence[Dict]): Documents to append
+            path (str): File for the new store
+        """
+        self.write(path, documents)
+        return MappedDocumentStore(path)
+
+    def to_list(self) -> List[Dict]:
+        """Decode all documents into an ordinary, mutable list."""
+        return list(self)
+
+    def close(self):
+        """Unmap the file."""
+        self._map.close()
@@ -1,77 +1,196 @@
-from typing import List, Dict
+from typing import List, Dict, Optional
 import faiss
 import numpy as np
 import pickle
 import os
-from langchain_community.embeddings import OllamaEmbeddings
+import threading
+
+from ..utils.hashing import IndexContentVersion
+from ..utils.metrics import STAGE_LATENCY, timed
+from .ollama_embeddings import EMBED_REQUEST_TIMEOUT, OllamaEmbeddingClient
+from .shared_store import MappedDocumentStore, write_document_store
+
+DOCUMENT_STORE_FILE = "documents.bin"
+
 
 class VectorStoreManager:
-    def __init__(self, model_name: str = "mistral", dimension: int = 4096):
-        self.embeddings = OllamaEmbeddings(model=model_name)
+    def __init__(
+        self,
+        model_name: str = "mistral",
+        dimension: int = 4096,
+        request_timeout: Optional[float] = EMBED_REQUEST_TIMEOUT
+    ):
+        self.model_name = model_name
+        self.embeddings = OllamaEmbeddingClient(model=model_name, request_timeout=request_timeout)
         self.dimension = dimension
         self.index = None
         self.documents = []
+        # Whether documents are served from a shared read-only mapping (see load)
+        self.mmap_documents = False
+        # Identifies the indexed content; the same on every worker that loaded the same files
+        self.index_version = "empty"
+        # Hash state behind index_version, extended with each batch of added chunks
+        self._content_version = IndexContentVersion(model_name)
+        # Serializes writers; searches never take it (see add_embedded_documents)
+        self._write_lock = threading.Lock()
 
     def add_documents(self, documents: List[Dict]):
         """Add documents to the vector store."""
-        texts = [doc["content"] for doc in documents]
-        embeddings = self.embeddings.embed_documents(texts)
-        
-        if self.index is None:
-            self.index = faiss.IndexFlatL2(self.dimension)
-        
-        # Convert embeddings to numpy array and add to FAISS
-        embeddings_array = np.array(embeddings).astype('float32')
-        self.index.add(embeddings_array)
+        self.add_embedded_documents(documents, self.embed_documents(documents))
+
+    def embed_documents(self, documents: List[Dict]) -> np.ndarray:
+        """Embed document chunks into the array shape expected by the index."""
+        embeddings = self.embeddings.embed_documents([doc["content"] for doc in documents])
+        return np.array(embeddings).astype('float32').reshape(len(documents), self.dimension)
+
+    def add_embedded_documents(self, documents: List[Dict], embeddings_array: np.ndarray):
+        """Add already embedded documents without disturbing concurrent searches.
         
-        # Store documents
-        self.documents.extend(documents)
+        The index and document list are copied, extended and then swapped in,
+        so a search running in another thread keeps using a consistent old
+        version instead of reading an index that is being resized.
+        """
+        with self._write_lock:
+            index = faiss.clone_index(self.index) if self.index is not None else faiss.IndexFlatL2(self.dimension)
+            index.add(embeddings_array)
+            if isinstance(self.documents, MappedDocumentStore):
+                # Extend the mapped file instead of decoding it into private memory
+                updated_documents = self.documents.extend(documents, self._pending_store_path())
+            else:
+                updated_documents = list(self.documents) + list(documents)
 
-    def similarity_search(self, query: str, k: int = 4) -> List[Dict]:
-        """Perform similarity search for a query."""
-        if self.index is None or not self.documents:
-            return []
+            # Only the new chunks are hashed; the result equals hashing every chunk (see load)
+            content_version = self._content_version.copy().update(doc["content"] for doc in documents)
+
+            # Documents first: searches skip IDs beyond the list they see
+            self.documents = updated_documents
+            self.index = index
+            self._content_version = content_version
+            self.index_version = content_version.hexdigest()
 
-        # Get query embedding
-        query_embedding = self.embeddings.embed_query(query)
-        query_embedding_array = np.array([query_embedding]).astype('float32')
+    def _pending_store_path(self) -> str:
+        """This process's mapped store for documents added since the last save()."""
+        directory = os.path.dirname(self.documents.path)
+        return os.path.join(directory, f"{DOCUMENT_STORE_FILE}.{os.getpid()}.pending")
+
+    def embed_query(self, query: str) -> np.ndarray:
+        """Embed a query into the array shape expected by the index."""
+        with timed(STAGE_LATENCY, "embed"):
+            query_embedding = self.embeddings.embed_query(query)
+        return np.array([query_embedding]).astype('float32')
+
+    def search_by_vector(self, query_embedding_array: np.ndarray, k: int = 4) -> List[Dict]:
+        """Perform similarity search for an already embedded query."""
+        # One consistent snapshot, even if documents are added meanwhile
+        index, documents = self.index, self.documents
+        if index is None or not documents:
+            return []
 
         # Perform similarity search
-        distances, indices = self.index.search(query_embedding_array, k)
+        with timed(STAGE_LATENCY, "search"):
+            distances, indices = index.search(query_embedding_array, k)
         
         # Return relevant documents
         results = []
         for i, idx in enumerate(indices[0]):
-            if idx < len(self.documents):  # Ensure index is valid
-                doc = self.documents[idx].copy()
+            if 0 <= idx < len(documents):  # Ensure index is valid
+                doc = documents[idx].copy()
                 
                 l2_distance = np.sqrt(float(distances[0][i]))
                 
                 similarity_score = np.exp(-l2_distance / self.dimension)
                 
                 doc["score"] = round(float(similarity_score), 4)
+                doc["doc_id"] = int(idx)
                 results.append(doc)
         
         # Sort by score in descending order
         return sorted(results, key=lambda x: x["score"], reverse=True)
 
+    def get_documents(self, doc_ids: List[int]) -> List[Dict]:
+        """Get stored documents by their position in the index."""
+        return [
+            dict(self.documents[doc_id], doc_id=doc_id)
+            for doc_id in doc_ids
+            if 0 <= doc_id < len(self.documents)
+        ]
+
+    def similarity_search(self, query: str, k: int = 4) -> List[Dict]:
+        """Perform similarity search for a query."""
+        if self.index is None or not self.documents:
+            return []
+
+        return self.search_by_vector(self.embed_query(query), k=k)
+
     def save(self, directory: str):
-        """Save the vector store and documents to disk."""
-        os.makedirs(directory, exist_ok=True)
-        
-        # Save FAISS index
-        faiss.write_index(self.index, os.path.join(directory, "index.faiss"))
+        """Save the vector store and documents to disk.
         
-        # Save documents
-        with open(os.path.join(directory, "documents.pkl"), "wb") as f:
-            pickle.dump(self.documents, f)
+        Files are written under temporary names and renamed into place, so
+        processes loading the directory never see a half-written file.
+        Documents go to the mapped store format (DOCUMENT_STORE_FILE); the
+        legacy documents.pkl is only written for an in-process list, since
+        pickling a mapped store would decode all of it into this process.
+        """
+        os.makedirs(directory, exist_ok=True)
+        # Holding the write lock keeps the index and documents in step
+        with self._write_lock:
+            index_path = os.path.join(directory, "index.faiss")
+            documents_path = os.path.join(directory, "documents.pkl")
+
+            # Save FAISS index
+            faiss.write_index(self.index, f"{index_path}.tmp")
+            
+            # Save documents
+            mapped = isinstance(self.documents, MappedDocumentStore)
+            if not mapped:
+                with open(f"{documents_path}.tmp", "wb") as f:
+                    pickle.dump(list(self.documents), f)
+            store_path = os.path.join(directory, DOCUMENT_STORE_FILE)
+            if mapped:
+                self.documents.write(store_path)
+            else:
+                write_document_store(store_path, self.documents)
 
-    def load(self, directory: str):
-        """Load the vector store and documents from disk."""
+            os.replace(f"{index_path}.tmp", index_path)
+            if mapped:
+                # A pickle left from an earlier save would no longer match the index
+                if os.path.exists(documents_path):
+                    os.remove(documents_path)
+            else:
+                os.replace(f"{documents_path}.tmp", documents_path)
+
+            if isinstance(self.documents, MappedDocumentStore) and self.documents.path.endswith(".pending"):
+                # Serve the saved file from now on; mappings of the pending one stay valid
+                pending_path = self.documents.path
+                self.documents = MappedDocumentStore(store_path)
+                os.remove(pending_path)
+
+    def load(self, directory: str, mmap_documents: bool = False):
+        """Load the vector store and documents from disk.
+        
+        Args:
+            directory (str): Directory written by save()
+            mmap_documents (bool): Serve documents from a read-only memory-mapped file
+                shared by all processes on the host instead of a per-process list
+        """
         # Load FAISS index
         self.index = faiss.read_index(os.path.join(os.getcwd(),directory, "index.faiss"))
         # print(os.path.join(os.getcwd(),directory))
-        # Load documents
-        with open(os.path.join(os.getcwd(),directory, "documents.pkl"), "rb") as f:
-            self.documents = pickle.load(f) 
+        store_path = os.path.join(os.getcwd(), directory, DOCUMENT_STORE_FILE)
+        if not os.path.exists(store_path):
+            # Artifacts saved before the mapped format existed
+            with open(os.path.join(os.getcwd(),directory, "documents.pkl"), "rb") as f:
+                write_document_store(store_path, pickle.load(f))
+        if mmap_documents:
+            self.documents = MappedDocumentStore(store_path)
+        else:
+            # Load documents
+            store = MappedDocumentStore(store_path)
+            self.documents = store.to_list()
+            store.close()
+        self.mmap_documents = mmap_documents
+        # Same version either way, so workers in both modes share cache entries;
+        # mapped documents are decoded one at a time and not kept
+        self._content_version = IndexContentVersion(self.model_name).update(doc["content"] for doc in self.documents)
+        self.index_version = self._content_version.hexdigest()
         # print(self.documents)
\ No newline at end of file
@@ -0,0 +1,237 @@
+"""
+Cache warm-up from recorded query history.
+
+Served queries are counted in a Redis sorted set. After a deploy or an
+index swap the cache is cold (index and prompt versions are part of every
+cache key), so the most frequent historical queries are replayed through
+the pipeline ahead of live traffic.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from dataclasses import dataclass, field, asdict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from ..utils.circuit_breaker import CircuitBreaker, CircuitOpenError
+from ..utils.hashing import canonical_encode
+from ..utils.redis_cache import KEY_PREFIX
+
+logger = logging.getLogger(__name__)
+
+QUERY_COUNTS_KEY = f"{KEY_PREFIX}:meta:query_counts"
+QUERY_TOTAL_KEY = f"{KEY_PREFIX}:meta:query_total"
+WARMUP_LOCK_PREFIX = f"{KEY_PREFIX}:meta:warmup_lock"
+
+
+class QueryLog:
+    """Counts served queries in Redis, shared by all workers."""
+
+    def __init__(
+        self,
+        redis_client,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        max_entries: int = 10000,
+        trim_every: int = 1000
+    ):
+        """Initialize the query log.
+
+        Args:
+            redis_client (redis.asyncio.Redis): Shared Redis client
+            circuit_breaker (CircuitBreaker, optional): Breaker guarding Redis calls
+            max_entries (int): Distinct queries kept; the least frequent are trimmed beyond it
+            trim_every (int): Records between trims of the sorted set
+        """
+        self.redis_client = redis_client
+        self.breaker = circuit_breaker or CircuitBreaker("redis")
+        self.max_entries = max_entries
+        self.trim_every = trim_every
+        self._recorded = 0
+
+    @staticmethod
+    def _member(query: str, additional_context: Optional[Dict]) -> bytes:
+        return canonical_encode([query, additional_context or None])
+
+    async def record(self, query: str, additional_context: Optional[Dict] = None) -> bool:
+        """Count one occurrence of a query; failures are ignored."""
+        if self.breaker.is_open:
+            return False
+        member = self._member(query, additional_context)
+        self._recorded += 1
+        trim = self._recorded % self.trim_every == 0
+
+        async def increment():
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                pipe.zincrby(QUERY_COUNTS_KEY, 1, member)
+                pipe.incr(QUERY_TOTAL_KEY)
+                if trim:
+                    pipe.zremrangebyrank(QUERY_COUNTS_KEY, 0, -(self.max_entries + 1))
+                await pipe.execute()
+
+        try:
+            await self.breaker.call(increment)
+            return True
+        except CircuitOpenError:
+            return False
+        except Exception as e:
+            logger.warning("Error recording query: %s", e)
+            return False
+
+    async def top(self, n: int) -> Tuple[List[Tuple[str, Optional[Dict], int]], int]:
+        """Most frequent queries and the total number of recorded queries.
+
+        Returns:
+            Tuple: ([(query, additional_context, count), ...] most frequent first, total)
+        """
+        async def read():
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                pipe.zrevrange(QUERY_COUNTS_KEY, 0, n - 1, withscores=True)
+                pipe.get(QUERY_TOTAL_KEY)
+                return await pipe.execute()
+
+        entries, total = await self.breaker.call(read)
+        queries = []
+        for member, count in entries:
+            query, additional_context = json.loads(member)
+            queries.append((query, additional_context, int(count)))
+        return queries, int(total or 0)
+
+
+@dataclass
+class WarmupReport:
+    """Outcome of one warm-up run."""
+    reason: str
+    started_at: float = field(default_factory=time.time)
+    duration: float = 0.0
+    status: str = "running"
+    candidates: int = 0
+    already_cached: int = 0
+    warmed: int = 0
+    failed: int = 0
+    total_recorded: int = 0
+    covered_recorded: int = 0
+    # Share of the top-N queries that are cached after the run
+    query_coverage: float = 0.0
+    # Share of all recorded query traffic those cached queries account for
+    traffic_coverage: float = 0.0
+
+
+class CacheWarmer:
+    """Replays the most frequent historical queries to refill a cold cache."""
+
+    def __init__(
+        self,
+        process_query: Callable[..., Awaitable[Dict[str, Any]]],
+        query_log: QueryLog,
+        cache_manager,
+        version: Callable[[], Dict[str, str]],
+        llm_busy: Callable[[], bool],
+        top_n: int = 50,
+        queries_per_second: float = 0.5,
+        busy_poll_interval: float = 1.0,
+        lock_ttl: int = 900
+    ):
+        """Initialize the warmer.
+
+        Args:
+            process_query: Pipeline entry point, called as process_query(query, additional_context)
+            query_log (QueryLog): Source of historical query counts
+            cache_manager (RedisCacheManager): Cache checked before replaying a query
+            version: Returns the current cache version (model, prompt, index)
+            llm_busy: Returns True while live traffic occupies every generation slot
+            top_n (int): Number of most frequent queries to warm
+            queries_per_second (float): Maximum replay rate
+            busy_poll_interval (float): Seconds to wait while the LLM is busy with live traffic
+            lock_ttl (int): Seconds the cross-worker warm-up lock is held at most, in case
+                its worker dies mid-run
+        """
+        self.process_query = process_query
+        self.query_log = query_log
+        self.cache_manager = cache_manager
+        self.version = version
+        self.llm_busy = llm_busy
+        self.top_n = top_n
+        self.queries_per_second = queries_per_second
+        self.busy_poll_interval = busy_poll_interval
+        self.lock_ttl = lock_ttl
+        self.last_report: Optional[WarmupReport] = None
+
+    async def warm(self, reason: str = "manual") -> Dict[str, Any]:
+        """Warm the cache with the top-N historical queries.
+
+        Queries already cached under the current version are skipped; the
+        rest are replayed one at a time, no faster than the configured rate
+        and only while a generation slot is free, so live queries keep priority.
+        Only one worker warms per (index version, reason); the others skip.
+
+        Args:
+            reason (str): Why the warm-up runs, e.g. "startup" or "index_swap"
+
+        Returns:
+            Dict: The warm-up report including coverage
+        """
+        report = WarmupReport(reason=reason)
+        self.last_report = report
+        version = self.version()
+        lock_key = f"{WARMUP_LOCK_PREFIX}:{version['index']}:{reason}"
+        if not await self.cache_manager.acquire_lock(lock_key, self.lock_ttl):
+            report.status = "skipped"
+            logger.info("Cache warm-up (%s) skipped: another worker is warming this index", reason)
+            return asdict(report)
+
+        start = time.monotonic()
+        try:
+            candidates, report.total_recorded = await self.query_log.top(self.top_n)
+            report.candidates = len(candidates)
+            cached = await self.cache_manager.get_many_cached_contexts(
+                [(query, context) for query, context, _ in candidates], version=version
+            )
+
+            interval = 1.0 / self.queries_per_second if self.queries_per_second > 0 else 0.0
+            for (query, additional_context, count), hit in zip(candidates, cached):
+                if hit is not None:
+                    report.already_cached += 1
+                    report.covered_recorded += count
+                    continue
+                while self.llm_busy():
+                    await asyncio.sleep(self.busy_poll_interval)
+
+                replay_started = time.monotonic()
+                try:
+                    result = await self.process_query(query, additional_context)
+                except Exception as e:
+                    logger.warning("Warm-up query failed: %s", e)
+                    result = None
+                # Only a generated answer is cached; degraded and extractive
+                # fallbacks (e.g. when the LLM is saturated) leave the entry cold
+                if result and result.get("mode") == "generative" and not result.get("degraded"):
+                    report.warmed += 1
+                    report.covered_recorded += count
+                else:
+                    report.failed += 1
+                await asyncio.sleep(max(0.0, interval - (time.monotonic() - replay_started)))
+            report.status = "completed"
+        except asyncio.CancelledError:
+            report.status = "cancelled"
+            raise
+        except Exception as e:
+            logger.warning("Cache warm-up aborted: %s", e)
+            report.status = "failed"
+        finally:
+            await self.cache_manager.release_lock(lock_key)
+            report.duration = time.monotonic() - start
+            covered = report.already_cached + report.warmed
+            report.query_coverage = covered / report.candidates if report.candidates else 0.0
+            report.traffic_coverage = (
+                report.covered_recorded / report.total_recorded if report.total_recorded else 0.0
+            )
+            logger.info(
+                "Cache warm-up (%s) %s: %d/%d queries cached, %.0f%% of recorded traffic",
+                reason, report.status, covered, report.candidates, report.traffic_coverage * 100
+            )
+        return asdict(report)
+
+    def get_report(self) -> Optional[Dict[str, Any]]:
+        """Report of the latest (possibly still running) warm-up."""
+        return asdict(self.last_report) if self.last_report else None
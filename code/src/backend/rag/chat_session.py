@@ -0,0 +1,181 @@
+"""
+Multi-turn chat sessions for follow-up queries.
+
+A session remembers which chunks were already put in front of the model and
+a compacted conversation history, so a follow-up only adds the chunks it
+did not have before and the prompt stays within a token budget.
+
+Chunks are identified by a hash of their content, together with the index
+version they were retrieved from; their position in the index is only a
+lookup hint, valid while the index version is unchanged.
+"""
+
+import json
+import logging
+import time
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Optional, Tuple
+
+from ..utils.circuit_breaker import CircuitBreaker, CircuitOpenError
+from ..utils.hashing import stable_hash
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token for English text)."""
+    return len(text) // 4 + 1 if text else 0
+
+
+def chunk_id(doc: Dict) -> str:
+    """Stable identifier of a chunk: a hash of its content."""
+    return stable_hash(doc.get("content") or "", digest_size=8)
+
+
+def _clip(text: str, limit: int) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[:limit - 3].rstrip() + "..."
+
+
+@dataclass
+class ChatSession:
+    """Conversation state for a single chat session."""
+    session_id: str
+    chunk_ids: List[str] = field(default_factory=list)  # Oldest first
+    chunk_positions: Dict[str, int] = field(default_factory=dict)  # Index position per chunk
+    index_version: Optional[str] = None  # Index the chunks were retrieved from
+    history: List[Dict[str, str]] = field(default_factory=list)
+    summary: List[str] = field(default_factory=list)
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+
+    def add_turn(self, role: str, content: str):
+        """Append a message to the recent history."""
+        self.history.append({"role": role, "content": content})
+        self.updated_at = time.time()
+
+    def remember_chunks(self, chunks: List[Tuple[str, int]], max_chunks: int):
+        """Record chunks sent to the model, keeping the most recent ``max_chunks``.
+
+        Args:
+            chunks (List[Tuple[str, int]]): (chunk ID, index position) pairs
+            max_chunks (int): Chunks kept
+        """
+        for chunk, position in chunks:
+            if chunk in self.chunk_positions:
+                self.chunk_ids.remove(chunk)
+            self.chunk_ids.append(chunk)
+            self.chunk_positions[chunk] = position
+        for dropped in self.chunk_ids[:-max_chunks]:
+            del self.chunk_positions[dropped]
+        del self.chunk_ids[:-max_chunks]
+
+    def use_index_version(self, index_version: str):
+        """Forget remembered chunks if they came from another version of the index."""
+        if self.index_version != index_version:
+            self.chunk_ids = []
+            self.chunk_positions = {}
+            self.index_version = index_version
+
+    def token_count(self) -> int:
+        """Estimated tokens used by the summary and recent history."""
+        return sum(estimate_tokens(line) for line in self.summary) + sum(
+            estimate_tokens(turn["content"]) for turn in self.history
+        )
+
+    def compact(self, token_budget: int, keep_turns: int = 2):
+        """Fold the oldest turns into one-line summaries until within budget.
+
+        Args:
+            token_budget (int): Maximum estimated tokens for summary plus history
+            keep_turns (int): Most recent turns that are always kept verbatim
+        """
+        while self.token_count() > token_budget and len(self.history) > keep_turns:
+            turn = self.history.pop(0)
+            label = "User asked" if turn["role"] == "user" else "Assistant answered"
+            self.summary.append(f"{label}: {_clip(turn['content'], 160)}")
+
+        # The summary itself is bounded too: drop its oldest lines first
+        while self.summary and self.token_count() > token_budget:
+            self.summary.pop(0)
+
+    def render_history(self) -> str:
+        """Render the conversation for inclusion in the prompt."""
+        lines = [f"- {line}" for line in self.summary]
+        lines.extend(f"{turn['role'].capitalize()}: {turn['content']}" for turn in self.history)
+        return "\n".join(lines)
+
+
+class ChatSessionStore:
+    """Stores chat sessions in Redis with a sliding TTL."""
+
+    def __init__(
+        self,
+        redis_client,
+        ttl: int = 1800,
+        history_token_budget: int = 800,
+        key_prefix: str = "chat_session:",
+        circuit_breaker: Optional[CircuitBreaker] = None
+    ):
+        """Initialize the session store.
+
+        Args:
+            redis_client (redis.asyncio.Redis): Shared Redis client used for storage
+            ttl (int): Seconds of inactivity before a session expires
+            history_token_budget (int): Token budget for the compacted history
+            key_prefix (str): Prefix for session keys
+            circuit_breaker (CircuitBreaker, optional): Breaker guarding Redis calls, usually
+                shared with the cache; while Redis is unavailable sessions are not persisted
+        """
+        self.redis_client = redis_client
+        self.ttl = ttl
+        self.history_token_budget = history_token_budget
+        self.key_prefix = key_prefix
+        self.breaker = circuit_breaker or CircuitBreaker("redis")
+
+    def _key(self, session_id: str) -> str:
+        return f"{self.key_prefix}{session_id}"
+
+    async def get(self, session_id: str) -> Optional[ChatSession]:
+        """Load a session, or None if it does not exist, has expired or Redis is unavailable."""
+        try:
+            data = await self.breaker.call(lambda: self.redis_client.get(self._key(session_id)))
+        except CircuitOpenError:
+            return None
+        except Exception as e:
+            logger.warning("Error loading chat session: %s", e)
+            return None
+        if not data:
+            return None
+        # Sessions saved before chunks had stable IDs have no index_version,
+        # so their chunks are dropped on the next turn (see use_index_version)
+        return ChatSession(**json.loads(data))
+
+    async def get_or_create(self, session_id: str) -> ChatSession:
+        """Load a session, starting a new one under this ID if needed."""
+        return await self.get(session_id) or ChatSession(session_id=session_id)
+
+    async def save(self, session: ChatSession) -> bool:
+        """Compact and persist a session, refreshing its TTL."""
+        session.compact(self.history_token_budget)
+        payload = json.dumps(asdict(session), separators=(",", ":"))
+        try:
+            await self.breaker.call(lambda: self.redis_client.setex(
+                self._key(session.session_id), self.ttl, payload
+            ))
+        except CircuitOpenError:
+            return False
+        except Exception as e:
+            logger.warning("Error saving chat session: %s", e)
+            return False
+        return True
+
+    async def delete(self, session_id: str) -> bool:
+        """Delete a session."""
+        try:
+            return bool(await self.breaker.call(lambda: self.redis_client.delete(self._key(session_id))))
+        except CircuitOpenError:
+            return False
+        except Exception as e:
+            logger.warning("Error deleting chat session: %s", e)
+            return False
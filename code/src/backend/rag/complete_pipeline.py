@@ -1,10 +1,20 @@
-from typing import Dict, Optional
+import asyncio
+import logging
+from typing import Dict, List, Optional
 from ..embeddings.vector_store import VectorStoreManager
 from .rag_pipeline import RAGChain
+from .reranker import Reranker
 from .model_context_protocol import ModelContextProtocol
-from ..utils.redis_cache import RedisCacheManager
+from .deadlines import StageBudgets
+from .chat_session import ChatSessionStore
+from .cache_warmup import CacheWarmer, QueryLog
+from .index_sync import IndexSync, IndexSyncUnavailable
+from ..utils.redis_cache import RedisCacheManager, create_redis_client
+from ..utils.circuit_breaker import CircuitBreaker
 from ..utils.constants import ARTIFACTS_DIR
 
+logger = logging.getLogger(__name__)
+
 class IntegratedRAGSystem:
     """Complete integration of RAG, Model Context Protocol, and Redis caching."""
     
@@ -12,43 +22,257 @@ class IntegratedRAGSystem:
         self,
         use_cache: bool = True,
         cache_ttl: int = 3600,
+        cache_stale_ttl: int = 3600,
         max_context_documents: int = 4,
-        context_window_size: int = 2000
+        context_window_size: int = 2000,
+        stage_budgets: Optional[StageBudgets] = None,
+        request_timeout: Optional[float] = None,
+        k_retrieve: Optional[int] = None,
+        reranker: Optional[Reranker] = None,
+        session_ttl: int = 1800,
+        redis_client=None,
+        redis_max_connections: int = 50,
+        redis_timeout: float = 0.5,
+        redis_failure_threshold: int = 5,
+        redis_reset_timeout: float = 30.0,
+        warmup_top_n: int = 50,
+        warmup_queries_per_second: float = 0.5,
+        vector_store: Optional[VectorStoreManager] = None
     ):
         """Initialize the integrated system.
         
         Args:
             use_cache (bool): Whether to use Redis caching
-            cache_ttl (int): Cache time-to-live in seconds
+            cache_ttl (int): Seconds a cached answer is fresh
+            cache_stale_ttl (int): Further seconds a stale answer is served while it is refreshed
             max_context_documents (int): Maximum number of context documents
             context_window_size (int): Maximum context window size
+            stage_budgets (StageBudgets, optional): Time budgets for embed, search and generate
+            request_timeout (float, optional): Default overall deadline per query in seconds
+            k_retrieve (int, optional): Candidates to over-fetch and rerank down to
+                max_context_documents; reranking is off when not set
+            reranker (Reranker, optional): Custom reranker, defaults to the lexical/metadata one
+            session_ttl (int): Seconds of inactivity before a chat session expires
+            redis_client (redis.asyncio.Redis, optional): Shared Redis client; created when not given
+            redis_max_connections (int): Connection pool size for a created client
+            redis_timeout (float): Seconds before a Redis call is abandoned and counted as a failure
+            redis_failure_threshold (int): Consecutive Redis failures that open the circuit,
+                after which queries run without the cache
+            redis_reset_timeout (float): Seconds the circuit stays open before Redis is probed again
+            warmup_top_n (int): Most frequent historical queries replayed to warm the cache at
+                startup and after an index swap, 0 disables warm-up
+            warmup_queries_per_second (float): Maximum replay rate during warm-up
+            vector_store (VectorStoreManager, optional): Shared, already loaded vector store;
+                loaded from ARTIFACTS_DIR when not given
         """
         # Initialize core components
-        self.vector_store = VectorStoreManager()
-        self.vector_store.load(ARTIFACTS_DIR)
+        if vector_store is None:
+            vector_store = VectorStoreManager()
+            vector_store.load(ARTIFACTS_DIR)
+        self.vector_store = vector_store
         #print(self.vector_store.documents)
         self.rag_chain = RAGChain(
             vector_store=self.vector_store,
-            max_tokens=context_window_size
+            max_tokens=context_window_size,
+            reranker=(reranker or Reranker()) if k_retrieve else None,
+            k_retrieve=k_retrieve
         )
         
+        # One pooled Redis client is shared by the cache and chat sessions
+        self._owns_redis = use_cache and redis_client is None
+        self.redis_client = None
+        self.cache_manager = None
+        self.session_store = None
+        self.redis_breaker = None
+        self.query_log = None
+        self.index_sync = None
+        if use_cache:
+            self.redis_client = redis_client or create_redis_client(max_connections=redis_max_connections)
+            # One breaker for all Redis traffic, so an outage seen by the cache also skips sessions
+            self.redis_breaker = CircuitBreaker(
+                "redis",
+                failure_threshold=redis_failure_threshold,
+                reset_timeout=redis_reset_timeout,
+                call_timeout=redis_timeout
+            )
+            self.cache_manager = RedisCacheManager(
+                default_ttl=cache_ttl + cache_stale_ttl,
+                default_soft_ttl=cache_ttl,
+                redis_client=self.redis_client,
+                circuit_breaker=self.redis_breaker
+            )
+            self.session_store = ChatSessionStore(
+                self.redis_client,
+                ttl=session_ttl,
+                circuit_breaker=self.redis_breaker
+            )
+            self.query_log = QueryLog(self.redis_client, circuit_breaker=self.redis_breaker)
+            self.index_sync = IndexSync(self.redis_client, circuit_breaker=self.redis_breaker)
+
         # Initialize Model Context Protocol with caching
         self.context_protocol = ModelContextProtocol(
             rag_chain=self.rag_chain,
             max_context_documents=max_context_documents,
             context_window_size=context_window_size,
             use_cache=use_cache,
-            cache_ttl=cache_ttl
+            cache_ttl=cache_ttl,
+            cache_stale_ttl=cache_stale_ttl,
+            stage_budgets=stage_budgets,
+            request_timeout=request_timeout,
+            session_store=self.session_store,
+            cache_manager=self.cache_manager
         )
-        
-        # Initialize Redis cache manager if caching is enabled
-        self.cache_manager = RedisCacheManager(default_ttl=cache_ttl) if use_cache else None
+
+        # Serializes index swaps in this worker; IndexSync serializes saves across workers
+        self._index_lock = asyncio.Lock()
+        self._index_listener_task: Optional[asyncio.Task] = None
+
+        self.cache_warmer = None
+        self._warmup_task: Optional[asyncio.Task] = None
+        if use_cache and warmup_top_n > 0:
+            self.cache_warmer = CacheWarmer(
+                process_query=lambda query, context: self.process_query(query, context, record_query=False),
+                query_log=self.query_log,
+                cache_manager=self.cache_manager,
+                version=self.context_protocol.cache_version,
+                llm_busy=self.context_protocol.llm_busy,
+                top_n=warmup_top_n,
+                queries_per_second=warmup_queries_per_second
+            )
+
+    async def startup(self) -> Dict[str, bool]:
+        """Check external dependencies once the event loop is running."""
+        if not self.cache_manager:
+            return {"redis": False}
+        await self.cache_manager.start_invalidation_listener()
+        if self._index_listener_task is None:
+            self._index_listener_task = asyncio.create_task(self.index_sync.listen(self._on_index_saved))
+        redis_ok = await self.cache_manager.ping()
+        if redis_ok:
+            self.schedule_warmup("startup")
+        return {"redis": redis_ok}
+
+    def schedule_warmup(self, reason: str) -> bool:
+        """Start a background cache warm-up unless one is already running."""
+        if not self.cache_warmer:
+            return False
+        if self._warmup_task is not None and not self._warmup_task.done():
+            return False
+        self._warmup_task = asyncio.create_task(self.cache_warmer.warm(reason))
+        return True
+
+    def get_warmup_report(self) -> Optional[Dict]:
+        """Coverage report of the latest cache warm-up."""
+        return self.cache_warmer.get_report() if self.cache_warmer else None
+
+    def _use_vector_store(self, vector_store: VectorStoreManager):
+        """Serve queries from another vector store and warm the cache for it."""
+        self.vector_store = vector_store
+        self.rag_chain.vector_store = vector_store
+        if self._warmup_task is not None and not self._warmup_task.done():
+            # It was warming entries for the old index
+            self._warmup_task.cancel()
+        self.schedule_warmup("index_swap")
+
+    async def _load_saved_index(self) -> VectorStoreManager:
+        vector_store = VectorStoreManager()
+        await asyncio.to_thread(
+            vector_store.load, ARTIFACTS_DIR, mmap_documents=self.vector_store.mmap_documents
+        )
+        return vector_store
+
+    async def _on_index_saved(self, index_version: str):
+        """Reload the saved index after another worker wrote a new version of it."""
+        async with self._index_lock:
+            if index_version != self.vector_store.index_version:
+                self._use_vector_store(await self._load_saved_index())
+
+    async def reload_index(self) -> str:
+        """Swap in the index saved on disk and warm the cache for it.
+
+        The index version is part of every cache key, so answers cached for
+        the previous index are no longer served after the swap. Documents are
+        loaded the same way as the served store's: memory-mapped under
+        backend.serve, so pre-forked workers keep sharing them.
+
+        Returns:
+            str: Version of the newly loaded index
+        """
+        async with self._index_lock:
+            vector_store = await self._load_saved_index()
+            self._use_vector_store(vector_store)
+        return vector_store.index_version
+
+    async def add_documents(self, documents: List[Dict], embeddings=None) -> str:
+        """Add chunks to the served index, persist it and warm the cache for it.
+
+        Queries keep being served from the previous index until the new one
+        is swapped in. With Redis, saves from all workers are serialized: the
+        chunks are added on top of the latest saved index, even if another
+        worker wrote it, and every other worker is then told to reload. While
+        Redis is unavailable the chunks are saved without coordination, like
+        the rest of the system runs without its cache.
+
+        Args:
+            documents (List[Dict]): Chunks to add
+            embeddings (np.ndarray, optional): Their embeddings, computed here when not given
+
+        Returns:
+            str: Version of the updated index
+
+        Raises:
+            IndexLockTimeout: If another worker kept the index locked for too long
+        """
+        if embeddings is None:
+            embeddings = await asyncio.to_thread(self.vector_store.embed_documents, documents)
+
+        async with self._index_lock:
+            vector_store = self.vector_store
+            if self.index_sync is None:
+                await self._add_and_save(vector_store, documents, embeddings)
+            else:
+                try:
+                    async with self.index_sync.write_lock():
+                        latest = await self.index_sync.latest_version()
+                        if latest is not None and latest != vector_store.index_version:
+                            # Another worker saved since this one loaded; don't overwrite its chunks
+                            vector_store = await self._load_saved_index()
+                        await self._add_and_save(vector_store, documents, embeddings)
+                        await self.index_sync.publish(vector_store.index_version)
+                except IndexSyncUnavailable:
+                    logger.warning("Redis is unavailable, saving the index without cross-worker coordination")
+                    await self._add_and_save(vector_store, documents, embeddings)
+            self._use_vector_store(vector_store)
+        return vector_store.index_version
+
+    async def _add_and_save(self, vector_store: VectorStoreManager, documents: List[Dict], embeddings):
+        await asyncio.to_thread(vector_store.add_embedded_documents, documents, embeddings)
+        await asyncio.to_thread(vector_store.save, ARTIFACTS_DIR)
+
+    async def aclose(self):
+        """Stop cache listeners and release the shared Redis connection pool."""
+        for task in (self._warmup_task, self._index_listener_task):
+            if task is None:
+                continue
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        if self.cache_manager:
+            await self.cache_manager.close()
+        if self._owns_redis:
+            await self.redis_client.aclose()
 
     async def process_query(
         self,
         query: str,
         additional_context: Optional[Dict] = None,
-        force_refresh: bool = False
+        force_refresh: bool = False,
+        mode: str = "generative",
+        timeout: Optional[float] = None,
+        session_id: Optional[str] = None,
+        record_query: bool = True
     ) -> Dict:
         """Process a query through the complete pipeline.
         
@@ -56,6 +280,11 @@ class IntegratedRAGSystem:
             query (str): The query to process
             additional_context (Dict, optional): Additional context
             force_refresh (bool): Whether to force cache refresh
+            mode (str): "generative" (LLM answer) or "extractive" (resolution
+                steps lifted from the retrieved incidents, no LLM call)
+            timeout (float, optional): Overall deadline in seconds for this query
+            session_id (str, optional): Chat session to continue with this follow-up
+            record_query (bool): Count the query in the history used for cache warm-up
             
         Returns:
             Dict containing the response and context information
@@ -64,15 +293,42 @@ class IntegratedRAGSystem:
         result = await self.context_protocol.process_query(
             query=query,
             additional_context=additional_context,
-            force_refresh=force_refresh
+            force_refresh=force_refresh,
+            mode=mode,
+            timeout=timeout,
+            session_id=session_id
         )
+
+        # Only standalone generative answers are cached, so only they are worth warming
+        if record_query and self.query_log and mode == "generative" and not session_id:
+            await self.query_log.record(query, additional_context)
         
         return result
 
+    def get_stage_timeouts(self) -> Dict[str, int]:
+        """Number of queries that ran over budget, per pipeline stage."""
+        return self.context_protocol.get_stage_timeouts()
+
+    def get_cache_health(self) -> Dict:
+        """Circuit breaker state of the Redis cache, or disabled when caching is off."""
+        if not self.redis_breaker:
+            return {"state": "disabled"}
+        return self.redis_breaker.get_state()
+
+    def get_cache_stats(self) -> Optional[Dict]:
+        """Hit/miss/eviction counters per cache tier."""
+        return self.cache_manager.get_stats() if self.cache_manager else None
+
+    async def end_session(self, session_id: str) -> bool:
+        """Discard a chat session and its remembered context."""
+        if self.session_store:
+            return await self.session_store.delete(session_id)
+        return False
+
     async def invalidate_cache(self, query: str, additional_context: Optional[Dict] = None) -> bool:
         """Invalidate cache for a specific query."""
         return await self.context_protocol.invalidate_cache(query, additional_context)
 
-    async def clear_all_cache(self) -> bool:
-        """Clear all cached contexts."""
-        return await self.context_protocol.clear_all_cache()
+    async def clear_all_cache(self, purge: bool = False) -> bool:
+        """Clear all cached contexts, optionally purging stale keys in the background."""
+        return await self.context_protocol.clear_all_cache(purge=purge)
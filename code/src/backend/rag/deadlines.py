@@ -0,0 +1,99 @@
+"""
+Per-request deadlines and per-stage time budgets for the query pipeline.
+"""
+
+import asyncio
+import functools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+STAGES = ("embed", "search", "generate")
+
+# Threads for blocking pipeline stages (embedding, search). A stage that times
+# out keeps its thread until the call returns, so the pool is kept separate
+# from the default executor: stuck stages can only exhaust this pool.
+STAGE_THREADS = int(os.getenv("RAG_STAGE_THREADS", "8"))
+_stage_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+@dataclass
+class StageBudgets:
+    """Time budget in seconds for each pipeline stage (None disables the limit)."""
+    embed: Optional[float] = 5.0
+    search: Optional[float] = 2.0
+    generate: Optional[float] = 60.0
+
+
+class StageTimeoutError(asyncio.TimeoutError):
+    """Raised when a pipeline stage exceeds its budget."""
+
+    def __init__(self, stage: str):
+        super().__init__(f"Stage '{stage}' exceeded its time budget")
+        self.stage = stage
+
+
+class Deadline:
+    """Overall deadline for a single request."""
+
+    def __init__(self, timeout: Optional[float] = None):
+        """Start the deadline clock.
+
+        Args:
+            timeout (float, optional): Seconds until the request expires, None for no deadline
+        """
+        self.expires_at = time.monotonic() + timeout if timeout is not None else None
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left before the deadline, None if unbounded."""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def budget_for(self, stage_budget: Optional[float]) -> Optional[float]:
+        """Effective budget for a stage: its own limit capped by the time left."""
+        remaining = self.remaining()
+        if stage_budget is None:
+            return remaining
+        if remaining is None:
+            return stage_budget
+        return min(stage_budget, remaining)
+
+
+def stage_executor() -> ThreadPoolExecutor:
+    """The bounded pool shared by blocking pipeline stages, created on first use."""
+    global _stage_executor
+    if _stage_executor is None:
+        with _executor_lock:
+            if _stage_executor is None:
+                _stage_executor = ThreadPoolExecutor(max_workers=STAGE_THREADS, thread_name_prefix="rag-stage")
+    return _stage_executor
+
+
+async def in_stage_thread(func: Callable[..., T], *args) -> T:
+    """Run a blocking stage function on the stage pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(stage_executor(), functools.partial(func, *args))
+
+
+async def run_stage(stage: str, awaitable: Awaitable[T], budget: Optional[float]) -> T:
+    """Await a pipeline stage, cancelling it when it runs over budget.
+
+    Args:
+        stage (str): Stage name, reported on timeout
+        awaitable (Awaitable): The stage's work
+        budget (float, optional): Seconds allowed, None for no limit
+
+    Raises:
+        StageTimeoutError: If the stage did not finish within its budget
+    """
+    try:
+        return await asyncio.wait_for(awaitable, timeout=budget)
+    except asyncio.TimeoutError:
+        raise StageTimeoutError(stage) from None
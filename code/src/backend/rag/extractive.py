@@ -0,0 +1,173 @@
+"""
+Extractive answering for the RAG pipeline.
+
+Incident chunks produced by ``generate_incident_dataset.py`` have a fixed
+layout (Description / Resolution Process / Knowledge Base Article), so for
+known incident types the answer can be lifted straight out of the best
+matching chunk instead of asking the LLM to paraphrase it.
+"""
+
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Tuple
+import re
+
+_INCIDENT_HEADER = re.compile(r"^Incident\s+(\d+)\s*\n=+\s*$", re.MULTILINE)
+_FIELD_PATTERNS = {
+    "impact_level": re.compile(r"^Impact Level:\s*(.+)$", re.MULTILINE),
+    "affected_service": re.compile(r"^Affected Service:\s*(.+)$", re.MULTILINE),
+    "component": re.compile(r"^Component:\s*(.+)$", re.MULTILINE),
+    "issue": re.compile(r"^Issue:\s*(.+)$", re.MULTILINE),
+}
+_SECTION_RULE = re.compile(r"^-{3,}\s*$")
+_STEP_LINE = re.compile(r"^\d+\.\s+")
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def _section_lines(block: str, title: str) -> List[str]:
+    """Return the non-empty lines of a ``Title:`` / ``-----`` section."""
+    start = block.find(f"{title}:")
+    if start == -1:
+        return []
+
+    lines = []
+    for line in block[start:].split("\n")[1:]:
+        stripped = line.strip()
+        if _SECTION_RULE.match(stripped):
+            continue
+        if not stripped:
+            # A blank line after content closes the section
+            if lines:
+                break
+            continue
+        lines.append(stripped)
+    return lines
+
+
+def _parse_incident_block(block: str, incident_id: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Parse a single incident block into its structured fields."""
+    incident = {"incident_id": incident_id}
+    for field, pattern in _FIELD_PATTERNS.items():
+        match = pattern.search(block)
+        incident[field] = match.group(1).strip() if match else None
+
+    incident["resolution_steps"] = [
+        line for line in _section_lines(block, "Resolution Process")
+        if _STEP_LINE.match(line)
+    ]
+    kb_lines = _section_lines(block, "Knowledge Base Article")
+    incident["kb_link"] = kb_lines[0] if kb_lines else None
+
+    # Fragments cut by chunk overlap cannot be attributed to an incident type
+    if not incident["issue"]:
+        return None
+    return incident
+
+
+@lru_cache(maxsize=4096)
+def _parse_chunk_cached(content: str) -> Tuple[Dict[str, Any], ...]:
+    headers = list(_INCIDENT_HEADER.finditer(content))
+    blocks = []
+
+    # Text before the first header is the tail of an incident from the previous chunk
+    leading = content[:headers[0].start()] if headers else content
+    blocks.append((None, leading))
+    for i, header in enumerate(headers):
+        end = headers[i + 1].start() if i + 1 < len(headers) else len(content)
+        blocks.append((f"Incident {header.group(1)}", content[header.end():end]))
+
+    parsed = (_parse_incident_block(block, incident_id) for incident_id, block in blocks)
+    return tuple(incident for incident in parsed if incident)
+
+
+def parse_incident_chunk(content: str) -> List[Dict[str, Any]]:
+    """Parse the incidents contained in a document chunk.
+
+    Parsing is memoized on the chunk text, so repeated hits on the same
+    chunk cost a dictionary lookup.
+
+    Args:
+        content (str): Chunk text as stored in the vector store
+
+    Returns:
+        List of incident dicts with impact_level, affected_service, component,
+        issue, resolution_steps and kb_link fields
+    """
+    return [dict(incident) for incident in _parse_chunk_cached(content or "")]
+
+
+def _tokens(text: Optional[str]) -> set:
+    return set(_WORD.findall(text.lower())) if text else set()
+
+
+def _match_score(query_tokens: set, incident: Dict[str, Any]) -> int:
+    """Count query terms that hit the incident's component and issue."""
+    return len(query_tokens & (_tokens(incident["component"]) | _tokens(incident["issue"])))
+
+
+def build_extractive_answer(query: str, documents: List[Dict]) -> Dict[str, Any]:
+    """Build a structured answer directly from retrieved chunks.
+
+    Args:
+        query (str): The user query
+        documents (List[Dict]): Retrieved sources, best match first
+
+    Returns:
+        Dict with resolution_steps, kb_links and source_incidents
+    """
+    query_tokens = _tokens(query)
+    candidates = []
+    for rank, doc in enumerate(documents):
+        for incident in parse_incident_chunk(doc.get("content", "")):
+            incident["source"] = doc.get("source", "Unknown")
+            incident["score"] = doc.get("score", 0.0)
+            candidates.append((-_match_score(query_tokens, incident), rank, incident))
+
+    # Prefer incidents whose component/issue match the query, then retrieval order
+    candidates.sort(key=lambda item: (item[0], item[1]))
+    incidents = [incident for _, _, incident in candidates]
+
+    resolution_steps = next(
+        (incident["resolution_steps"] for incident in incidents if incident["resolution_steps"]),
+        []
+    )
+    kb_links = list(dict.fromkeys(
+        incident["kb_link"] for incident in incidents if incident["kb_link"]
+    ))
+    source_incidents = [
+        {key: value for key, value in incident.items() if key not in ("resolution_steps", "kb_link")}
+        for incident in incidents
+    ]
+
+    return {
+        "resolution_steps": resolution_steps,
+        "kb_links": kb_links,
+        "source_incidents": source_incidents
+    }
+
+
+def format_extractive_answer(answer: Dict[str, Any]) -> str:
+    """Render an extractive answer in the same layout the LLM is asked to use."""
+    if not answer["source_incidents"]:
+        return "I don't have any relevant information in my knowledge base to answer this query."
+
+    best = answer["source_incidents"][0]
+    parts = [
+        "# Incident Analysis",
+        f"🔧 **Affected System**: {best.get('component') or 'Unknown'}",
+        f"⚠️ **Severity**: {best.get('impact_level') or 'Unknown'}",
+        "",
+        "## Similar Incidents"
+    ]
+    for incident in answer["source_incidents"]:
+        parts.append(
+            f"- {incident.get('incident_id') or 'Incident'}: {incident.get('issue') or 'Unknown issue'} "
+            f"in {incident.get('component') or 'Unknown'} ({incident.get('affected_service') or 'Unknown'})"
+        )
+
+    parts.extend(["", "## Resolution Steps"])
+    parts.extend(answer["resolution_steps"] or ["No documented resolution steps found."])
+
+    parts.extend(["", "## Knowledge Base References"])
+    parts.extend(f"- {link}" for link in answer["kb_links"])
+
+    return "\n".join(parts)
@@ -0,0 +1,147 @@
+"""
+Keeps the index in step across pre-forked workers.
+
+Every worker serves its own copy of the index loaded from ARTIFACTS_DIR.
+Writes to the saved index are serialized by a lock in Redis, and after a
+write the new index version is published so every other worker reloads
+the saved files.
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Optional
+
+from ..utils.circuit_breaker import CircuitBreaker, CircuitOpenError
+from ..utils.redis_cache import KEY_PREFIX, listen_to_channel
+
+logger = logging.getLogger(__name__)
+
+INDEX_LOCK_KEY = f"{KEY_PREFIX}:meta:index_lock"
+INDEX_VERSION_KEY = f"{KEY_PREFIX}:meta:index_version"
+INDEX_RELOAD_CHANNEL = f"{KEY_PREFIX}:index_reload"
+
+
+class IndexLockTimeout(Exception):
+    """Raised when the index write lock could not be taken in time."""
+
+
+class IndexSyncUnavailable(Exception):
+    """Raised when Redis is unavailable, so workers cannot coordinate index writes."""
+
+
+class IndexSync:
+    """Cross-worker write lock and reload notifications for the saved index."""
+
+    def __init__(
+        self,
+        redis_client,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        lock_ttl: int = 600,
+        lock_timeout: float = 300.0,
+        poll_interval: float = 0.5
+    ):
+        """Initialize the index sync.
+
+        Args:
+            redis_client (redis.asyncio.Redis): Shared Redis client
+            circuit_breaker (CircuitBreaker, optional): Breaker guarding Redis calls
+            lock_ttl (int): Seconds after which the write lock expires if its worker dies
+            lock_timeout (float): Seconds to wait for the write lock before giving up
+            poll_interval (float): Seconds between attempts to take the write lock
+        """
+        self.redis_client = redis_client
+        self.breaker = circuit_breaker or CircuitBreaker("redis")
+        self.lock_ttl = lock_ttl
+        self.lock_timeout = lock_timeout
+        self.poll_interval = poll_interval
+
+    @asynccontextmanager
+    async def write_lock(self):
+        """Hold the index write lock shared by all workers.
+
+        Raises:
+            IndexSyncUnavailable: As soon as the Redis circuit breaker is open
+            IndexLockTimeout: If another worker holds it for longer than lock_timeout
+        """
+        token = uuid.uuid4().hex.encode()
+        give_up_at = time.monotonic() + self.lock_timeout
+        while True:
+            try:
+                if await self.breaker.call(lambda: self.redis_client.set(
+                    INDEX_LOCK_KEY, token, nx=True, ex=self.lock_ttl
+                )):
+                    break
+            except CircuitOpenError as e:
+                raise IndexSyncUnavailable(str(e)) from e
+            except Exception as e:
+                # Counted by the breaker; enough of these open it and end the wait
+                logger.warning("Error acquiring index write lock: %s", e)
+            if time.monotonic() >= give_up_at:
+                raise IndexLockTimeout(f"Index write lock not acquired within {self.lock_timeout:.0f}s")
+            await asyncio.sleep(self.poll_interval)
+
+        try:
+            yield
+        finally:
+            try:
+                # Only delete the lock if it has not expired and been taken by another worker
+                if await self.breaker.call(lambda: self.redis_client.get(INDEX_LOCK_KEY)) == token:
+                    await self.breaker.call(lambda: self.redis_client.delete(INDEX_LOCK_KEY))
+            except Exception as e:
+                logger.warning("Error releasing index write lock: %s", e)
+
+    async def latest_version(self) -> Optional[str]:
+        """Version of the index most recently saved by any worker; None if unknown or Redis is unavailable."""
+        try:
+            value = await self.breaker.call(lambda: self.redis_client.get(INDEX_VERSION_KEY))
+        except CircuitOpenError:
+            return None
+        except Exception as e:
+            logger.warning("Error reading the latest index version: %s", e)
+            return None
+        return value.decode() if value else None
+
+    async def publish(self, index_version: str) -> bool:
+        """Record a newly saved index version and tell every worker to load it.
+
+        Returns:
+            bool: False if Redis was unavailable; other workers then keep serving
+                their current index until the next publish or reload
+        """
+        async def record_and_publish():
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                pipe.set(INDEX_VERSION_KEY, index_version)
+                pipe.publish(INDEX_RELOAD_CHANNEL, index_version)
+                await pipe.execute()
+
+        try:
+            await self.breaker.call(record_and_publish)
+            return True
+        except Exception as e:
+            logger.warning("Error publishing index version %s: %s", index_version, e)
+            return False
+
+    async def listen(self, on_version: Callable[[str], Awaitable[None]]):
+        """Call ``on_version`` with every index version published; runs until cancelled.
+
+        After every (re)subscription it is also called with the latest saved
+        version, so a publish missed while disconnected is caught up on.
+        """
+        async def on_message(data: bytes):
+            await on_version(data.decode())
+
+        async def catch_up():
+            latest = await self.latest_version()
+            if latest is not None:
+                await on_version(latest)
+
+        await listen_to_channel(
+            self.redis_client,
+            INDEX_RELOAD_CHANNEL,
+            on_message,
+            on_subscribed=catch_up,
+            circuit_breaker=self.breaker
+        )
@@ -1,7 +1,19 @@
-from typing import Dict, Optional, Any
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional, Any, Tuple
 from .rag_pipeline import RAGChain
+from .extractive import build_extractive_answer, format_extractive_answer
+from .deadlines import STAGES, Deadline, StageBudgets, StageTimeoutError, run_stage
+from .chat_session import ChatSession, ChatSessionStore, chunk_id
 from ..utils.redis_cache import RedisCacheManager
 from ..utils.pydantic_classes import ContextMetadata, ModelContext
+from ..utils.hashing import stable_hash
+from ..utils.constants import PROMPT_VERSION
+from ..utils.metrics import PENDING_GENERATIONS, QUERY_LATENCY, STAGE_LATENCY, timed
+
+logger = logging.getLogger(__name__)
+
 
 class ModelContextProtocol:
     """Implements the Model Context Protocol for enhanced RAG."""
@@ -12,7 +24,15 @@ class ModelContextProtocol:
         max_context_documents: int = 4,
         context_window_size: int = 2000,
         use_cache: bool = True,
-        cache_ttl: int = 3600
+        cache_ttl: int = 3600,
+        cache_stale_ttl: int = 3600,
+        max_concurrent_generations: int = 2,
+        max_queued_generations: int = 8,
+        stage_budgets: Optional[StageBudgets] = None,
+        request_timeout: Optional[float] = None,
+        session_store: Optional[ChatSessionStore] = None,
+        max_session_chunks: Optional[int] = None,
+        cache_manager: Optional[RedisCacheManager] = None
     ):
         """Initialize the Model Context Protocol.
         
@@ -21,16 +41,99 @@ class ModelContextProtocol:
             max_context_documents (int): Maximum number of context documents to include
             context_window_size (int): Maximum size of the context window in tokens
             use_cache (bool): Whether to use Redis caching
-            cache_ttl (int): Time-to-live for cached contexts in seconds
+            cache_ttl (int): Seconds a cached context is fresh (soft TTL)
+            cache_stale_ttl (int): Further seconds a stale context is still served while
+                one background refresh regenerates it (hard TTL = cache_ttl + cache_stale_ttl)
+            max_concurrent_generations (int): LLM generations allowed to run at once
+            max_queued_generations (int): Generations allowed to wait for a slot before
+                queries fall back to extractive answers
+            stage_budgets (StageBudgets, optional): Time budgets for embed, search and generate
+            request_timeout (float, optional): Default overall deadline per query in seconds
+            session_store (ChatSessionStore, optional): Store for multi-turn chat sessions
+            max_session_chunks (int, optional): Chunks a session keeps in context, and
+                the most chunks (new and remembered together) put in a follow-up's
+                prompt; defaults to twice max_context_documents
+            cache_manager (RedisCacheManager, optional): Shared cache manager; one is
+                created when caching is enabled and none is given
         """
         self.rag_chain = rag_chain
         self.max_context_documents = max_context_documents
         self.context_window_size = context_window_size
         self.use_cache = use_cache
         self.cache_ttl = cache_ttl
+        self.cache_stale_ttl = cache_stale_ttl
+        self._refresh_tasks = set()
+        self.max_concurrent_generations = max_concurrent_generations
+        self.max_queued_generations = max_queued_generations
+
+        # Generations either running or waiting for a slot
+        self._pending_generations = 0
+        self._generation_slots = asyncio.Semaphore(max_concurrent_generations)
+
+        self.stage_budgets = stage_budgets or StageBudgets()
+        self.request_timeout = request_timeout
+        self.stage_timeouts = {stage: 0 for stage in STAGES}
+
+        self.session_store = session_store
+        self.max_session_chunks = max_session_chunks or 2 * max_context_documents
         
         # Initialize Redis cache if enabled
-        self.cache_manager = RedisCacheManager(default_ttl=cache_ttl) if use_cache else None
+        if use_cache:
+            self.cache_manager = cache_manager or RedisCacheManager(default_ttl=cache_ttl)
+        else:
+            self.cache_manager = None
+
+    def cache_version(self) -> Dict[str, str]:
+        """What a cached answer depends on besides the query itself."""
+        return {
+            "model": self.rag_chain.llm.model,
+            "prompt": f"{PROMPT_VERSION}:{stable_hash(self.rag_chain.system_prompt, digest_size=8)}",
+            "index": self.rag_chain.vector_store.index_version
+        }
+
+    def _to_cache_entry(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Strip what can be rebuilt on read: chunk text and per-document metadata.
+        
+        Chunks are stored as references (doc_id) into the vector store; the
+        index version in the cache key guarantees the IDs still resolve.
+        """
+        context = result["context"]
+        documents = [
+            {key: value for key, value in doc.items() if key != "content"}
+            if doc.get("doc_id") is not None else doc
+            for doc in context["retrieved_documents"]
+        ]
+        return {
+            **result,
+            "context": {
+                **{key: value for key, value in context.items() if key != "metadata"},
+                "retrieved_documents": documents
+            }
+        }
+
+    def _from_cache_entry(self, entry: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Rehydrate chunk text and metadata of a cached entry, None if it no longer resolves."""
+        if not isinstance(entry, dict) or not isinstance(entry.get("context"), dict):
+            # Written in another shape (older release, or not by this pipeline): treat as a miss
+            return None
+        context = entry["context"]
+        stored = self.rag_chain.vector_store.documents
+        documents = []
+        for doc in context["retrieved_documents"]:
+            if "content" not in doc:
+                doc_id = doc.get("doc_id")
+                if doc_id is None or not 0 <= doc_id < len(stored):
+                    return None
+                doc = {**doc, "content": stored[doc_id]["content"]}
+            documents.append(doc)
+        return {
+            **entry,
+            "context": {
+                **context,
+                "retrieved_documents": documents,
+                "metadata": [vars(self._create_context_metadata(doc)) for doc in documents]
+            }
+        }
 
     def _create_context_metadata(self, doc: Dict) -> ContextMetadata:
         """Create metadata for a context document."""
@@ -48,6 +151,15 @@ class ModelContextProtocol:
         context_parts = [
             "=== System Instructions ===\n",
             self.rag_chain.system_prompt,
+        ]
+
+        if context.conversation_history:
+            context_parts.extend([
+                "\n=== Conversation So Far ===\n",
+                context.conversation_history
+            ])
+
+        context_parts += [
             "\n=== Original Query ===\n",
             context.original_query,
             "\n=== Retrieved Context ===\n"
@@ -66,11 +178,161 @@ class ModelContextProtocol:
         
         return "\n".join(context_parts)
 
+    def _build_result(
+        self,
+        response: str,
+        query: str,
+        sources: List[Dict],
+        additional_context: Optional[Dict],
+        mode: str
+    ) -> Dict[str, Any]:
+        """Assemble the response payload shared by all query modes."""
+        return {
+            "response": response,
+            "mode": mode,
+            "context": {
+                "original_query": query,
+                "retrieved_documents": sources,
+                "metadata": [vars(self._create_context_metadata(doc)) for doc in sources],
+                "additional_context": additional_context
+            }
+        }
+
+    def _build_extractive_result(
+        self,
+        query: str,
+        sources: List[Dict],
+        additional_context: Optional[Dict],
+        fallback_reason: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Answer straight from the retrieved chunks, without the LLM."""
+        answer = build_extractive_answer(query, sources)
+        result = self._build_result(
+            format_extractive_answer(answer), query, sources, additional_context, mode="extractive"
+        )
+        result["extractive"] = answer
+        if fallback_reason:
+            result["fallback_reason"] = fallback_reason
+        return result
+
+    async def _retrieve(self, query: str, deadline: Deadline) -> List[Dict]:
+        """Retrieve context documents within the embed and search budgets."""
+        return await self.rag_chain.retrieve(
+            query,
+            num_docs=self.max_context_documents,
+            budgets=self.stage_budgets,
+            deadline=deadline
+        )
+
+    def _session_context(self, session: ChatSession, sources: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+        """Combine fresh retrieval with the chunks a session already holds.
+        
+        Remembered chunks from another index version are dropped, and the
+        prompt holds at most ``max_session_chunks`` chunks: the new ones, then
+        the most recently remembered ones.
+        
+        Returns:
+            The documents for the prompt (new chunks first, then the session's
+            previous chunks) and the new chunks alone
+        """
+        session.use_index_version(self.rag_chain.vector_store.index_version)
+        known = set(session.chunk_ids)
+        delta = [doc for doc in sources if chunk_id(doc) not in known]
+
+        room = max(0, self.max_session_chunks - len(delta))
+        remembered = session.chunk_ids[-room:] if room else []
+        wanted = set(remembered)
+        previous = [
+            doc for doc in self.rag_chain.get_sources([session.chunk_positions[c] for c in remembered])
+            # A position is only trusted if it still holds the same content
+            if chunk_id(doc) in wanted
+        ]
+        return delta + previous, delta
+
+    async def _record_session_turn(
+        self,
+        session: ChatSession,
+        query: str,
+        result: Dict[str, Any],
+        delta: List[Dict]
+    ) -> Dict[str, Any]:
+        """Append the exchange to the session and ship only the new chunks."""
+        session.add_turn("user", query)
+        session.add_turn("assistant", result["response"])
+        session.remember_chunks(
+            [(chunk_id(doc), doc["doc_id"]) for doc in delta if doc.get("doc_id") is not None],
+            self.max_session_chunks
+        )
+        await self.session_store.save(session)
+
+        result["session_id"] = session.session_id
+        result["context"]["retrieved_documents"] = delta
+        result["context"]["metadata"] = [vars(self._create_context_metadata(doc)) for doc in delta]
+        result["context"]["session_chunk_ids"] = list(session.chunk_ids)
+        return result
+
+    def llm_saturated(self) -> bool:
+        """Whether the generation queue is full."""
+        return self._pending_generations >= self.max_concurrent_generations + self.max_queued_generations
+
+    def llm_busy(self) -> bool:
+        """Whether every generation slot is taken, so new work would have to queue."""
+        return self._pending_generations >= self.max_concurrent_generations
+
+    def _build_degraded_result(
+        self,
+        query: str,
+        sources: List[Dict],
+        additional_context: Optional[Dict],
+        error: StageTimeoutError,
+        partial_response: str = ""
+    ) -> Dict[str, Any]:
+        """Answer from whatever was retrieved before a stage ran out of time."""
+        self.stage_timeouts[error.stage] += 1
+        result = self._build_extractive_result(
+            query, sources, additional_context, fallback_reason=f"{error.stage}_timeout"
+        )
+        if not sources:
+            result["response"] = "The knowledge base could not be searched in time. Please retry the query."
+        result["degraded"] = True
+        result["timed_out_stage"] = error.stage
+        result["partial_response"] = partial_response
+        return result
+
+    async def _generate(self, prompt: str, chunks: List[str]) -> str:
+        """Run a generation, waiting for one of the bounded LLM slots.
+        
+        Streamed chunks are appended to ``chunks`` so a partial response
+        survives cancellation.
+        """
+        self._pending_generations += 1
+        PENDING_GENERATIONS.inc()
+        try:
+            with timed(STAGE_LATENCY, "llm_queue"):
+                await self._generation_slots.acquire()
+            try:
+                with timed(STAGE_LATENCY, "generate"):
+                    async for chunk in self.rag_chain.llm.astream(prompt):
+                        chunks.append(chunk)
+                return "".join(chunks)
+            finally:
+                self._generation_slots.release()
+        finally:
+            self._pending_generations -= 1
+            PENDING_GENERATIONS.dec()
+
+    def get_stage_timeouts(self) -> Dict[str, int]:
+        """Number of queries that ran over budget, per stage."""
+        return dict(self.stage_timeouts)
+
     async def process_query(
         self,
         query: str,
         additional_context: Optional[Dict] = None,
-        force_refresh: bool = False
+        force_refresh: bool = False,
+        mode: str = "generative",
+        timeout: Optional[float] = None,
+        session_id: Optional[str] = None
     ) -> Dict[str, Any]:
         """Process a query using the Model Context Protocol.
         
@@ -78,58 +340,132 @@ class ModelContextProtocol:
             query (str): The original query
             additional_context (Dict, optional): Additional context to include
             force_refresh (bool): Whether to force a refresh of the cache
+            mode (str): "generative" to answer with the LLM, "extractive" to return
+                resolution steps taken directly from the retrieved incidents
+            timeout (float, optional): Overall deadline in seconds, overriding request_timeout
+            session_id (str, optional): Chat session to continue (or start). Follow-ups
+                reuse the session's chunks and history and only add new chunks
             
         Returns:
-            Dict containing the response and context information
+            Dict containing the response and context information. When a stage
+            runs over budget the result carries ``degraded=True`` and falls back
+            to the extractive answer instead of raising.
         """
+        if mode not in ("generative", "extractive"):
+            raise ValueError(f"Unsupported query mode: {mode}")
+
+        query_started = time.perf_counter()
+        deadline = Deadline(timeout if timeout is not None else self.request_timeout)
+        session = None
+        if session_id and self.session_store:
+            session = await self.session_store.get_or_create(session_id)
+
+        # Session answers depend on the conversation, so they bypass the response cache
+        use_cache = self.use_cache and session is None
+
         # Check cache first if enabled and not forcing refresh
-        if self.use_cache and not force_refresh:
-            cached_result = await self.cache_manager.get_cached_context(query, additional_context)
+        if mode == "generative" and use_cache and not force_refresh:
+            with timed(STAGE_LATENCY, "cache_lookup"):
+                lookup = await self.cache_manager.lookup_cached_context(
+                    query, additional_context, version=self.cache_version()
+                )
+                cached_result = self._from_cache_entry(lookup.value) if lookup else None
             if cached_result:
+                if lookup.refresh:
+                    await self._schedule_refresh(lookup.key, query, additional_context)
+                if lookup.stale:
+                    cached_result["stale"] = True
+                QUERY_LATENCY.labels(mode, "cache_hit").observe(time.perf_counter() - query_started)
                 return cached_result
 
+        started_at = time.monotonic()
+
         # Retrieve relevant documents using RAG
-        rag_result = await self.rag_chain.query(query, num_docs=self.max_context_documents)
-        # Create context metadata
-        context_metadata = [
-            self._create_context_metadata(doc)
-            for doc in rag_result["sources"]
-        ]
-        # Create model context
-        model_context = ModelContext(
-            original_query=query,
-            retrieved_documents=rag_result["sources"],
-            metadata=context_metadata,
-            additional_context=additional_context
-        )
-        
-        # Format context for model
-        formatted_context = self._format_context_for_model(model_context)
-        
-        # Generate response using the formatted context
-        response = await self.rag_chain.llm.ainvoke(formatted_context)
-        
-        result = {
-            "response": response,
-            "context": {
-                "original_query": query,
-                "retrieved_documents": rag_result["sources"],
-                "metadata": [vars(m) for m in context_metadata],
-                "additional_context": additional_context
-            }
-        }
+        try:
+            sources = await self._retrieve(query, deadline)
+        except StageTimeoutError as e:
+            QUERY_LATENCY.labels(mode, "degraded").observe(time.perf_counter() - query_started)
+            return self._build_degraded_result(query, [], additional_context, e)
 
-        # Cache the result if enabled
-        if self.use_cache:
-            await self.cache_manager.cache_context(
-                query=query,
-                context_data=result,
-                additional_context=additional_context,
-                ttl=self.cache_ttl
+        delta = sources
+        if session:
+            sources, delta = self._session_context(session, sources)
+
+        if mode == "extractive":
+            result = self._build_extractive_result(query, sources, additional_context)
+        elif self.llm_saturated():
+            # Shed load to the extractive path instead of queueing behind a busy LLM
+            result = self._build_extractive_result(
+                query, sources, additional_context, fallback_reason="llm_saturated"
             )
+        else:
+            with timed(STAGE_LATENCY, "prompt"):
+                # Create model context
+                model_context = ModelContext(
+                    original_query=query,
+                    retrieved_documents=sources,
+                    metadata=[self._create_context_metadata(doc) for doc in sources],
+                    additional_context=additional_context,
+                    conversation_history=session.render_history() if session else None
+                )
+                
+                # Format context for model
+                formatted_context = self._format_context_for_model(model_context)
+            
+            # Generate response using the formatted context
+            chunks: List[str] = []
+            try:
+                response = await run_stage(
+                    "generate",
+                    self._generate(formatted_context, chunks),
+                    deadline.budget_for(self.stage_budgets.generate)
+                )
+            except StageTimeoutError as e:
+                # Degraded answers are not cached so the next request retries generation
+                QUERY_LATENCY.labels(mode, "degraded").observe(time.perf_counter() - query_started)
+                return self._build_degraded_result(
+                    query, sources, additional_context, e, partial_response="".join(chunks)
+                )
+            
+            result = self._build_result(response, query, sources, additional_context, mode="generative")
+
+            # Cache the result if enabled
+            if use_cache:
+                with timed(STAGE_LATENCY, "cache_write"):
+                    await self.cache_manager.cache_context(
+                        query=query,
+                        context_data=self._to_cache_entry(result),
+                        additional_context=additional_context,
+                        ttl=self.cache_ttl + self.cache_stale_ttl,
+                        version=self.cache_version(),
+                        soft_ttl=self.cache_ttl,
+                        compute_time=time.monotonic() - started_at
+                    )
 
+        if session:
+            result = await self._record_session_turn(session, query, result, delta)
+        outcome = result.get("fallback_reason") or ("generated" if result["mode"] == "generative" else "extractive")
+        QUERY_LATENCY.labels(mode, outcome).observe(time.perf_counter() - query_started)
         return result
 
+    async def _schedule_refresh(self, cache_key: str, query: str, additional_context: Optional[Dict]):
+        """Regenerate a stale entry in the background, once across all workers."""
+        if not await self.cache_manager.acquire_refresh_lock(cache_key):
+            return
+
+        async def refresh():
+            try:
+                await self.process_query(query, additional_context, force_refresh=True)
+            except Exception:
+                logger.warning("Background cache refresh failed", exc_info=True)
+            finally:
+                await self.cache_manager.release_refresh_lock(cache_key)
+
+        task = asyncio.create_task(refresh())
+        # Keep a reference so the task is not garbage collected mid-flight
+        self._refresh_tasks.add(task)
+        task.add_done_callback(self._refresh_tasks.discard)
+
     async def invalidate_cache(self, query: str, additional_context: Optional[Dict] = None) -> bool:
         """Invalidate cached context for a specific query.
         
@@ -141,15 +477,21 @@ class ModelContextProtocol:
             bool: True if invalidation was successful
         """
         if self.use_cache:
-            return await self.cache_manager.invalidate_cache(query, additional_context)
+            return await self.cache_manager.invalidate_cache(
+                query, additional_context, version=self.cache_version()
+            )
         return False
 
-    async def clear_all_cache(self) -> bool:
+    async def clear_all_cache(self, purge: bool = False) -> bool:
         """Clear all cached contexts.
         
+        Args:
+            purge (bool): Also delete stale entries in the background instead of
+                letting them expire
+            
         Returns:
             bool: True if clearing was successful
         """
         if self.use_cache:
-            return await self.cache_manager.clear_all_cache()
+            return await self.cache_manager.clear_all_cache(purge=purge)
         return False 
\ No newline at end of file
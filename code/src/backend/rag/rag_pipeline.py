@@ -1,7 +1,10 @@
 from typing import List, Dict, Optional
 from langchain_community.llms import Ollama
 from ..embeddings.vector_store import VectorStoreManager
+from .deadlines import Deadline, StageBudgets, in_stage_thread, run_stage
+from .reranker import Reranker
 from ..utils.constants import RAGCHAIN_SYSTEMPROMPT, RAG_LLM_PROMPT
+from ..utils.metrics import STAGE_LATENCY, timed
 
 class RAGChain:
     def __init__(
@@ -9,7 +12,9 @@ class RAGChain:
         vector_store: VectorStoreManager,
         max_tokens=None,
         context_window=None,
-        system_prompt=RAGCHAIN_SYSTEMPROMPT
+        system_prompt=RAGCHAIN_SYSTEMPROMPT,
+        reranker: Optional[Reranker] = None,
+        k_retrieve: Optional[int] = None
     ):
         """Initialize the RAG chain.
         
@@ -18,10 +23,15 @@ class RAGChain:
             max_tokens (int, optional): Maximum number of tokens to generate
             context_window (int, optional): Maximum number of tokens in the context window
             system_prompt (str, optional): Custom system prompt
+            reranker (Reranker, optional): Second-stage reranker applied to search results
+            k_retrieve (int, optional): Candidates to over-fetch for the reranker; only
+                the top ``num_docs`` (k_final) are kept
         """
         self.vector_store = vector_store
         self.max_tokens = max_tokens
         self.context_window = context_window
+        self.reranker = reranker
+        self.k_retrieve = k_retrieve
         
         # Initialize Ollama with configurable parameters
         self.llm = Ollama(
@@ -32,7 +42,7 @@ class RAGChain:
         self.system_prompt = system_prompt
 
     def _format_context(self, documents: List[Dict]) -> str:
-        """Format the context documents for the LLM."""
+        """Format retrieved sources (see _to_sources) for the LLM."""
         # Only deduplicate exact matches, keeping similar but distinct issues
         seen_contents = set()
         unique_docs = []
@@ -52,50 +62,123 @@ class RAGChain:
         # Format the unique documents
         context_parts = []
         for i, doc in enumerate(unique_docs, 1):
-            source = doc["metadata"].get("source", "Unknown")
-            chunk_size = doc["metadata"].get("chunk_size", "Unknown")
-            chunk_overlap = doc["metadata"].get("chunk_overlap", "Unknown")
+            source = doc.get("source", "Unknown")
+            chunk_size = doc.get("chunk_size", "Unknown")
+            chunk_overlap = doc.get("chunk_overlap", "Unknown")
             context_parts.append(
                 f"Document {i} (from {source}, chunk_size={chunk_size}, chunk_overlap={chunk_overlap}):\n{doc['content']}\n"
             )
         return "\n".join(context_parts)
 
-    async def query(self, query: str, num_docs: Optional[int] = None) -> Dict:
-        """Process a query through the RAG chain.
+    def _to_sources(self, documents: List[Dict]) -> List[Dict]:
+        """Flatten retrieved documents into the source format returned to callers."""
+        return [
+            {
+                "doc_id": doc.get("doc_id"),
+                "source": doc["metadata"].get("source", "Unknown"),
+                "score": doc.get("score", 0.0),
+                "chunk_size": doc["metadata"].get("chunk_size", "Unknown"),
+                "chunk_overlap": doc["metadata"].get("chunk_overlap", "Unknown"),
+                "content": doc.get('content'),
+                **({"rerank_score": doc["rerank_score"]} if "rerank_score" in doc else {})
+            }
+            for doc in documents
+        ]
+
+    def get_sources(self, doc_ids: List[int]) -> List[Dict]:
+        """Look up previously retrieved chunks by ID, without searching."""
+        return self._to_sources(self.vector_store.get_documents(doc_ids))
+
+    def _search(self, query: str, query_embedding, k_final: int) -> List[Dict]:
+        """Search the index, over-fetching and reranking when a reranker is set."""
+        if self.reranker is None:
+            return self.vector_store.search_by_vector(query_embedding, k=k_final)
+
+        k_retrieve = max(self.k_retrieve or k_final, k_final)
+        candidates = self.vector_store.search_by_vector(query_embedding, k=k_retrieve)
+        with timed(STAGE_LATENCY, "rerank"):
+            return self.reranker.rerank(query, candidates, top_k=k_final)
+
+    async def retrieve(
+        self,
+        query: str,
+        num_docs: Optional[int] = None,
+        budgets: Optional[StageBudgets] = None,
+        deadline: Optional[Deadline] = None
+    ) -> List[Dict]:
+        """Retrieve context sources for a query without generating a response.
+        
+        Embedding and search run on the bounded stage thread pool so they do
+        not block the event loop, each bounded by its stage budget. Reranking
+        counts towards the search budget.
         
         Args:
             query (str): The query to process
-            num_docs (int, optional): Override the default number of context documents
+            num_docs (int, optional): Override the default number of context documents (k_final)
+            budgets (StageBudgets, optional): Per-stage time budgets
+            deadline (Deadline, optional): Overall request deadline
+            
+        Raises:
+            StageTimeoutError: If embedding or search runs over budget
         """
-        # Retrieve relevant documents
         k = 4 if num_docs is None else num_docs
-        relevant_docs = self.vector_store.similarity_search(query, k=k)
+        budgets = budgets or StageBudgets(embed=None, search=None, generate=None)
+        deadline = deadline or Deadline()
+
+        if self.vector_store.index is None or not self.vector_store.documents:
+            return []
+
+        query_embedding = await run_stage(
+            "embed",
+            in_stage_thread(self.vector_store.embed_query, query),
+            deadline.budget_for(budgets.embed)
+        )
+        relevant_docs = await run_stage(
+            "search",
+            in_stage_thread(self._search, query, query_embedding, k),
+            deadline.budget_for(budgets.search)
+        )
+        return self._to_sources(relevant_docs)
+
+    async def query(
+        self,
+        query: str,
+        num_docs: Optional[int] = None,
+        budgets: Optional[StageBudgets] = None,
+        deadline: Optional[Deadline] = None
+    ) -> Dict:
+        """Process a query through the RAG chain.
+        
+        Retrieval goes through :meth:`retrieve`, so reranking and the stage
+        budgets apply the same way as for every other caller.
         
-        if not relevant_docs:
+        Args:
+            query (str): The query to process
+            num_docs (int, optional): Override the default number of context documents
+            budgets (StageBudgets, optional): Per-stage time budgets, unbounded if omitted
+            deadline (Deadline, optional): Overall request deadline
+            
+        Raises:
+            StageTimeoutError: If a stage runs over budget
+        """
+        budgets = budgets or StageBudgets(embed=None, search=None, generate=None)
+        deadline = deadline or Deadline()
+
+        sources = await self.retrieve(query, num_docs=num_docs, budgets=budgets, deadline=deadline)
+        if not sources:
             return {
                 "response": "I don't have any relevant information in my knowledge base to answer this query.",
                 "sources": []
             }
 
         # Format context and create prompt
-        context = self._format_context(relevant_docs)
+        context = self._format_context(sources)
         prompt = self._create_prompt(query, context)
         
         # Generate response
-        response = await self.llm.ainvoke(prompt)
+        response = await run_stage("generate", self.llm.ainvoke(prompt), deadline.budget_for(budgets.generate))
         
         # Return response with sources
-        sources = [
-            {
-                "source": doc["metadata"].get("source", "Unknown"),
-                "score": doc.get("score", 0.0),
-                "chunk_size": doc["metadata"].get("chunk_size", "Unknown"),
-                "chunk_overlap": doc["metadata"].get("chunk_overlap", "Unknown"),
-                "content": doc.get('content')
-            }
-            for doc in relevant_docs
-        ]
-
         return {
             "response": response,
             "sources": sources
@@ -0,0 +1,122 @@
+"""
+Second-stage reranking of retrieved chunks.
+
+The vector search over-fetches candidates and this module rescores them with
+cheap CPU signals (term overlap and a match on the incident's component and
+issue fields), optionally blended with a small local cross-encoder, so only
+the best few chunks reach the prompt.
+"""
+
+from typing import Dict, List, Optional
+import logging
+import math
+import re
+
+from .extractive import parse_incident_chunk
+
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def _tokenize(text: Optional[str]) -> List[str]:
+    return _WORD.findall(text.lower()) if text else []
+
+
+class Reranker:
+    """Rescores retrieved chunks and keeps the top ones."""
+
+    def __init__(
+        self,
+        vector_weight: float = 1.0,
+        lexical_weight: float = 1.0,
+        metadata_weight: float = 2.0,
+        cross_encoder_model: Optional[str] = None,
+        cross_encoder_weight: float = 2.0
+    ):
+        """Initialize the reranker.
+
+        Args:
+            vector_weight (float): Weight of the original retrieval rank
+            lexical_weight (float): Weight of the query/content term overlap
+            metadata_weight (float): Weight of the query match on component and issue
+            cross_encoder_model (str, optional): sentence-transformers cross-encoder to
+                blend in (e.g. "cross-encoder/ms-marco-MiniLM-L-6-v2"); skipped when
+                the package is not installed
+            cross_encoder_weight (float): Weight of the cross-encoder score
+        """
+        self.vector_weight = vector_weight
+        self.lexical_weight = lexical_weight
+        self.metadata_weight = metadata_weight
+        self.cross_encoder_weight = cross_encoder_weight
+        self.cross_encoder = self._load_cross_encoder(cross_encoder_model) if cross_encoder_model else None
+
+    @staticmethod
+    def _load_cross_encoder(model_name: str):
+        try:
+            from sentence_transformers import CrossEncoder
+        except ImportError:
+            logger.warning("sentence-transformers is not installed, reranking without cross-encoder")
+            return None
+        return CrossEncoder(model_name, device="cpu")
+
+    def _lexical_scores(self, query_terms: List[str], documents: List[Dict]) -> List[float]:
+        """BM25-style overlap, with IDF computed over the candidate set."""
+        doc_terms = [set(_tokenize(doc.get("content"))) for doc in documents]
+        n = len(documents)
+        idf = {
+            term: math.log(1 + (n - df + 0.5) / (df + 0.5))
+            for term in set(query_terms)
+            for df in [sum(1 for terms in doc_terms if term in terms)]
+        }
+        max_score = sum(idf.values()) or 1.0
+        return [sum(idf[term] for term in idf if term in terms) / max_score for terms in doc_terms]
+
+    def _metadata_score(self, query_terms: set, document: Dict) -> float:
+        """Best fraction of an incident's component/issue terms found in the query."""
+        best = 0.0
+        for incident in parse_incident_chunk(document.get("content", "")):
+            fields = set(_tokenize(incident.get("component"))) | set(_tokenize(incident.get("issue")))
+            if fields:
+                best = max(best, len(query_terms & fields) / len(fields))
+        return best
+
+    def rerank(self, query: str, documents: List[Dict], top_k: int) -> List[Dict]:
+        """Rescore candidates and return the best ``top_k``.
+
+        Args:
+            query (str): The user query
+            documents (List[Dict]): Candidates in retrieval order
+            top_k (int): Number of documents to keep
+
+        Returns:
+            The top documents, each with an added ``rerank_score``
+        """
+        if not documents:
+            return []
+
+        query_terms = _tokenize(query)
+        query_term_set = set(query_terms)
+        lexical = self._lexical_scores(query_terms, documents)
+
+        cross = None
+        if self.cross_encoder is not None:
+            raw = self.cross_encoder.predict([(query, doc.get("content", "")) for doc in documents])
+            cross = [1 / (1 + math.exp(-float(score))) for score in raw]
+
+        n = len(documents)
+        scored = []
+        for rank, doc in enumerate(documents):
+            score = (
+                self.vector_weight * (1 - rank / n)
+                + self.lexical_weight * lexical[rank]
+                + self.metadata_weight * self._metadata_score(query_term_set, doc)
+            )
+            if cross is not None:
+                score += self.cross_encoder_weight * cross[rank]
+            doc = dict(doc)
+            doc["rerank_score"] = round(score, 4)
+            scored.append(doc)
+
+        scored.sort(key=lambda doc: doc["rerank_score"], reverse=True)
+        return scored[:top_k]
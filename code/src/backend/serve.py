@@ -0,0 +1,87 @@
+"""
+Pre-fork multi-worker server.
+
+``uvicorn --workers N`` imports the app in every worker, so each one loads
+its own copy of the index and documents. Here the master process loads them
+once and then forks the workers:
+
+- the FAISS index lives in C++ memory that searches only read, so its pages
+  stay shared copy-on-write;
+- documents are served from a read-only memory-mapped file (see
+  ``embeddings/shared_store.py``) shared through the page cache;
+- ``gc.freeze()`` moves the objects loaded so far out of the collector's
+  reach, so garbage collection in workers does not dirty their pages.
+
+Redis clients, locks and background tasks are still created per worker, by
+the FastAPI lifespan, after the fork.
+
+Run from code/src:
+    python -m backend.serve --workers 8
+"""
+
+import argparse
+import gc
+import os
+import tempfile
+
+# Must be set before any metric is created, i.e. before the app is imported
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", tempfile.mkdtemp(prefix="prometheus-"))
+
+import faiss
+from gunicorn.app.base import BaseApplication
+
+from .api.container import preload_vector_store
+from .api.main import app
+from .utils.metrics import mark_process_dead
+
+
+class PreforkServer(BaseApplication):
+    """Gunicorn application serving the preloaded FastAPI app with uvicorn workers."""
+
+    def __init__(self, options: dict):
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        return app
+
+
+def post_fork(server, worker):
+    # One search thread per worker: capacity comes from the number of workers
+    faiss.omp_set_num_threads(int(os.getenv("FAISS_THREADS_PER_WORKER", "1")))
+
+
+def child_exit(server, worker):
+    mark_process_dead(worker.pid)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-fork server with a shared read-only index")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--timeout", type=int, default=120)
+    args = parser.parse_args()
+
+    vector_store = preload_vector_store()
+    print(f"Preloaded {len(vector_store.documents)} documents (index {vector_store.index_version})")
+    gc.collect()
+    gc.freeze()
+
+    PreforkServer({
+        "bind": f"{args.host}:{args.port}",
+        "workers": args.workers,
+        "worker_class": "uvicorn.workers.UvicornWorker",
+        "preload_app": True,
+        "timeout": args.timeout,
+        "post_fork": post_fork,
+        "child_exit": child_exit
+    }).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Circuit breaker for calls to an unreliable dependency.
+
+After ``failure_threshold`` consecutive failures the circuit opens and calls
+are rejected immediately, without touching the dependency. Once
+``reset_timeout`` has passed a single probe call is let through (half-open):
+its success closes the circuit, its failure opens it again.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the dependency while the circuit is open."""
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with a half-open probe."""
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        call_timeout: Optional[float] = 0.5
+    ):
+        """Initialize the breaker.
+
+        Args:
+            name (str): Dependency name, used in logs and state reports
+            failure_threshold (int): Consecutive failures that open the circuit
+            reset_timeout (float): Seconds the circuit stays open before a probe is allowed
+            call_timeout (float, optional): Seconds before a guarded call counts as failed
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.call_timeout = call_timeout
+
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+
+        self.total_failures = 0
+        self.rejected_calls = 0
+        self.times_opened = 0
+
+    @property
+    def is_open(self) -> bool:
+        """True while calls are being rejected and no probe is due yet.
+
+        A cheap check, so callers can skip preparing a call that would be rejected.
+        """
+        return self.state == OPEN and time.monotonic() - self.opened_at < self.reset_timeout
+
+    def allow_request(self) -> bool:
+        """Whether a call may go through now; claims the probe when half-open."""
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state = HALF_OPEN
+            self._probe_in_flight = False
+            logger.info("Circuit %s half-open, probing", self.name)
+        if self.state == HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        self.rejected_calls += 1
+        return False
+
+    def record_success(self):
+        """Close the circuit after a successful call."""
+        if self.state != CLOSED:
+            logger.info("Circuit %s closed", self.name)
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self):
+        """Count a failed call, opening the circuit at the threshold or on a failed probe."""
+        self.consecutive_failures += 1
+        self.total_failures += 1
+        self._probe_in_flight = False
+        if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != OPEN:
+                self.times_opened += 1
+                logger.warning(
+                    "Circuit %s open after %d consecutive failures",
+                    self.name, self.consecutive_failures
+                )
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+
+    async def call(self, operation: Callable[[], Awaitable[T]]) -> T:
+        """Run a call through the breaker.
+
+        Args:
+            operation: Zero-argument callable returning the awaitable to run; it is
+                not invoked at all while the circuit is open
+
+        Raises:
+            CircuitOpenError: If the circuit is open
+        """
+        if not self.allow_request():
+            raise CircuitOpenError(f"Circuit {self.name} is open")
+        try:
+            result = await asyncio.wait_for(operation(), self.call_timeout)
+        except asyncio.CancelledError:
+            # The caller gave up; that says nothing about the dependency
+            self._probe_in_flight = False
+            raise
+        except Exception:
+            self.record_failure()
+            raise
+        self.record_success()
+        return result
+
+    def get_state(self) -> Dict[str, Any]:
+        """Current state and counters, for health reporting."""
+        state = {
+            "name": self.name,
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "failure_threshold": self.failure_threshold,
+            "total_failures": self.total_failures,
+            "rejected_calls": self.rejected_calls,
+            "times_opened": self.times_opened
+        }
+        if self.state == OPEN:
+            state["retry_in"] = max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+        return state
@@ -1,6 +1,9 @@
 ARTIFACTS_DIR = "backend/vstore_artifacts"
 DATA_DIR = "backend/incident_data"
 
+# Bump when the prompt layout built in ModelContextProtocol changes, so cached answers are not reused
+PROMPT_VERSION = "1"
+
 RAGCHAIN_SYSTEMPROMPT ="""You are an AI assistant for IT incident management and resolution. You have access to a knowledge base of past incidents across various categories including Technology Security, Technology Processing, Data Integrity, Technology Performance, Technology Faults, Vendor/Third-Party issues, SACM Data Quality, and Sensitive Incidents.
 
 Adapt your response based on the type of query:
@@ -0,0 +1,83 @@
+"""
+Deterministic hashing helpers.
+
+Python's builtin ``hash()`` is salted per process (PYTHONHASHSEED), so
+anything shared between workers or across restarts -- cache keys, index
+versions -- must be hashed with these helpers instead.
+"""
+
+import hashlib
+import json
+from typing import Any, Iterable
+
+
+def canonical_encode(value: Any) -> bytes:
+    """Encode a JSON-compatible value to canonical bytes.
+
+    Dict keys are sorted and whitespace is fixed, so equal values always
+    produce identical bytes. Non-JSON values fall back to ``str()``.
+    """
+    return json.dumps(
+        value,
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=str
+    ).encode("utf-8")
+
+
+def stable_hash(value: Any, digest_size: int = 16) -> str:
+    """Hex digest of a value that is stable across processes and restarts.
+
+    Args:
+        value: A str/bytes payload, or any JSON-compatible value (canonically encoded)
+        digest_size (int): Digest length in bytes
+    """
+    if isinstance(value, str):
+        data = value.encode("utf-8")
+    elif isinstance(value, bytes):
+        data = value
+    else:
+        data = canonical_encode(value)
+    return hashlib.blake2b(data, digest_size=digest_size).hexdigest()
+
+
+class IndexContentVersion:
+    """Version of a vector index, derived only from its persisted contents.
+
+    Every process that holds the same chunks, in the same order, embedded
+    with the same model gets the same version, however it got there
+    (loading, or ingesting and saving), so their cache keys agree. Chunks
+    are hashed one at a time, so appending to an index only hashes the new
+    chunks and nothing has to be held in memory at once.
+    """
+
+    def __init__(self, model_name: str):
+        self._hash = hashlib.blake2b(digest_size=16)
+        self._update(model_name)
+
+    def _update(self, text: str):
+        data = text.encode("utf-8")
+        # Length-prefixed, so chunk boundaries are part of the version
+        self._hash.update(len(data).to_bytes(8, "little"))
+        self._hash.update(data)
+
+    def update(self, texts: Iterable[str]) -> "IndexContentVersion":
+        """Add chunks, in index order; returns self."""
+        for text in texts:
+            self._update(text)
+        return self
+
+    def copy(self) -> "IndexContentVersion":
+        """Independent copy, e.g. to extend without changing this one."""
+        clone = IndexContentVersion.__new__(IndexContentVersion)
+        clone._hash = self._hash.copy()
+        return clone
+
+    def hexdigest(self) -> str:
+        return self._hash.hexdigest()
+
+
+def index_content_version(model_name: str, texts: Iterable[str]) -> str:
+    """Version of an index holding ``texts``; see IndexContentVersion."""
+    return IndexContentVersion(model_name).update(texts).hexdigest()
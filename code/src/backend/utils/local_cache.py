@@ -0,0 +1,102 @@
+"""
+In-process LRU cache with TTL and a byte budget.
+
+Sits in front of Redis so hot entries are served without a network round
+trip or deserialization. Values are shared, not copied: callers must treat
+them as read-only.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+class LocalCache:
+    """Size-bounded (in bytes) LRU cache with per-entry expiry."""
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, default_ttl: float = 60.0):
+        """Initialize the cache.
+
+        Args:
+            max_bytes (int): Total size budget; least recently used entries are evicted beyond it
+            default_ttl (float): Seconds an entry stays valid unless set with its own TTL
+        """
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self._entries: "OrderedDict[str, Tuple[Any, int, float]]" = OrderedDict()
+        self.current_bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return a live entry and mark it most recently used, or None."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        value, _, expires_at = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any, size: int, ttl: Optional[float] = None):
+        """Store a value.
+
+        Args:
+            key (str): Cache key
+            value: Value to store (shared with callers, not copied)
+            size (int): Size in bytes charged against the budget: the memory the value
+                holds (e.g. from memory.deep_sizeof), not its compressed serialized length
+            ttl (float, optional): Seconds to keep the entry, defaults to default_ttl
+        """
+        if size > self.max_bytes:
+            return
+        self._remove(key)
+        self._entries[key] = (value, size, time.monotonic() + (ttl or self.default_ttl))
+        self.current_bytes += size
+
+        while self.current_bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def delete(self, key: str) -> bool:
+        """Remove an entry, returning whether it was present."""
+        return self._remove(key)
+
+    def clear(self):
+        """Remove all entries."""
+        self._entries.clear()
+        self.current_bytes = 0
+
+    def _remove(self, key: str) -> bool:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        self.current_bytes -= entry[1]
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss/eviction counters and current occupancy."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "entries": len(self._entries),
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes
+        }
@@ -0,0 +1,154 @@
+"""
+Memory introspection helpers for the admin endpoints.
+
+Sizes of Python structures are estimated by walking containers with
+``sys.getsizeof``, counting shared objects once. tracemalloc snapshots are
+kept in memory, a few at a time, so allocations can be diffed over time.
+"""
+
+import itertools
+import os
+import sys
+import time
+import tracemalloc
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+
+def deep_sizeof(obj: Any, seen: Optional[set] = None) -> int:
+    """Approximate bytes held by an object and everything it contains.
+
+    Args:
+        obj: Object to measure
+        seen (set, optional): IDs already counted, to share across several calls
+    """
+    seen = set() if seen is None else seen
+    total = 0
+    stack = [obj]
+    while stack:
+        current = stack.pop()
+        if id(current) in seen:
+            continue
+        seen.add(id(current))
+        total += sys.getsizeof(current)
+        if isinstance(current, dict):
+            stack.extend(current.keys())
+            stack.extend(current.values())
+        elif isinstance(current, (list, tuple, set, frozenset)):
+            stack.extend(current)
+        elif hasattr(current, "__dict__") and not isinstance(current, type):
+            stack.append(vars(current))
+    return total
+
+
+def index_bytes(index) -> int:
+    """Bytes of vector data held by a FAISS index (0 when there is none)."""
+    if index is None:
+        return 0
+    code_size = getattr(index, "code_size", None) or index.d * 4
+    return int(index.ntotal * code_size)
+
+
+def process_memory() -> Dict[str, int]:
+    """Resident and peak memory of this process in bytes, from /proc when available."""
+    result = {}
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(("VmRSS:", "VmHWM:", "RssAnon:", "RssFile:")):
+                    name, value = line.split(":", 1)
+                    result[name.lower()] = int(value.split()[0]) * 1024
+    except OSError:
+        import resource
+        result["vmhwm"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    result["pid"] = os.getpid()
+    return result
+
+
+class TracemallocSnapshots:
+    """Takes tracemalloc snapshots and diffs them, keeping the latest few."""
+
+    def __init__(self, max_snapshots: int = 5):
+        """Initialize the snapshot store.
+
+        Args:
+            max_snapshots (int): Snapshots kept; the oldest are dropped beyond it
+        """
+        self.max_snapshots = max_snapshots
+        self._snapshots: "OrderedDict[int, tracemalloc.Snapshot]" = OrderedDict()
+        self._taken_at: Dict[int, float] = {}
+        self._ids = itertools.count(1)
+
+    def start(self, frames: int = 10) -> Dict[str, Any]:
+        """Start tracing allocations; it slows the process down until stopped."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        return self.status()
+
+    def stop(self) -> Dict[str, Any]:
+        """Stop tracing and drop stored snapshots."""
+        tracemalloc.stop()
+        self._snapshots.clear()
+        self._taken_at.clear()
+        return self.status()
+
+    def status(self) -> Dict[str, Any]:
+        current, peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+        return {
+            "tracing": tracemalloc.is_tracing(),
+            "traced_bytes": current,
+            "traced_peak_bytes": peak,
+            "snapshots": [
+                {"id": snapshot_id, "taken_at": self._taken_at[snapshot_id]}
+                for snapshot_id in self._snapshots
+            ]
+        }
+
+    def take(self, limit: int = 20, group_by: str = "lineno") -> Dict[str, Any]:
+        """Take a snapshot and report its largest allocation sites.
+
+        Raises:
+            RuntimeError: If tracing has not been started
+        """
+        if not tracemalloc.is_tracing():
+            raise RuntimeError("tracemalloc is not tracing; start it first")
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        snapshot_id = next(self._ids)
+        self._snapshots[snapshot_id] = snapshot
+        self._taken_at[snapshot_id] = time.time()
+        while len(self._snapshots) > self.max_snapshots:
+            dropped, _ = self._snapshots.popitem(last=False)
+            del self._taken_at[dropped]
+
+        stats = snapshot.statistics(group_by)
+        return {
+            "id": snapshot_id,
+            "total_bytes": sum(stat.size for stat in stats),
+            "top": [_format_stat(stat) for stat in stats[:limit]]
+        }
+
+    def diff(self, older_id: int, newer_id: int, limit: int = 20, group_by: str = "lineno") -> Dict[str, Any]:
+        """Allocation sites that grew or shrank the most between two snapshots.
+
+        Raises:
+            KeyError: If either snapshot is unknown or was dropped
+        """
+        older, newer = self._snapshots[older_id], self._snapshots[newer_id]
+        stats = newer.compare_to(older, group_by)
+        return {
+            "from": older_id,
+            "to": newer_id,
+            "size_diff_bytes": sum(stat.size_diff for stat in stats),
+            "top": [
+                dict(_format_stat(stat), size_diff=stat.size_diff, count_diff=stat.count_diff)
+                for stat in stats[:limit]
+            ]
+        }
+
+
+def _format_stat(stat) -> Dict[str, Any]:
+    frame = stat.traceback[0]
+    return {"location": f"{frame.filename}:{frame.lineno}", "size": stat.size, "count": stat.count}
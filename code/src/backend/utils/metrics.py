@@ -0,0 +1,111 @@
+"""
+Prometheus metrics for the query pipeline, cache and incident agents.
+
+prometheus_client is optional: without it every metric is a no-op and
+``/metrics`` reports that metrics are disabled. When the
+``PROMETHEUS_MULTIPROC_DIR`` environment variable is set (before this module
+is imported), each worker writes its samples there and ``render_metrics``
+aggregates all workers.
+"""
+
+import os
+import time
+from contextlib import contextmanager
+from typing import Iterator, Tuple
+
+try:
+    import prometheus_client
+    from prometheus_client import Counter, Gauge, Histogram
+except ImportError:
+    prometheus_client = None
+
+# Sub-millisecond buckets for cache and search, up to minutes for generation
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0
+)
+
+
+class _NoopMetric:
+    """Stands in for a metric when prometheus_client is not installed."""
+
+    def labels(self, *args, **kwargs) -> "_NoopMetric":
+        return self
+
+    def observe(self, value: float):
+        pass
+
+    def inc(self, amount: float = 1):
+        pass
+
+    def dec(self, amount: float = 1):
+        pass
+
+    def set(self, value: float):
+        pass
+
+
+if prometheus_client is not None:
+    STAGE_LATENCY = Histogram(
+        "rag_stage_seconds", "Latency of each query pipeline stage",
+        ["stage"], buckets=LATENCY_BUCKETS
+    )
+    QUERY_LATENCY = Histogram(
+        "rag_query_seconds", "End-to-end latency of processed queries",
+        ["mode", "outcome"], buckets=LATENCY_BUCKETS
+    )
+    CACHE_LOOKUPS = Counter(
+        "rag_cache_lookups_total", "Cache lookups per tier and result", ["tier", "result"]
+    )
+    REDIS_LATENCY = Histogram(
+        "redis_command_seconds", "Latency of Redis calls made by the cache layer",
+        ["operation"], buckets=LATENCY_BUCKETS
+    )
+    REDIS_ERRORS = Counter(
+        "redis_command_errors_total", "Failed or rejected Redis calls", ["operation", "reason"]
+    )
+    PENDING_GENERATIONS = Gauge(
+        "rag_pending_generations", "LLM generations running or queued", multiprocess_mode="livesum"
+    )
+    AGENT_ACTION_LATENCY = Histogram(
+        "incident_agent_action_seconds", "Latency of incident agent operations",
+        ["action", "status"], buckets=LATENCY_BUCKETS
+    )
+else:
+    STAGE_LATENCY = QUERY_LATENCY = CACHE_LOOKUPS = REDIS_LATENCY = REDIS_ERRORS = _NoopMetric()
+    PENDING_GENERATIONS = AGENT_ACTION_LATENCY = _NoopMetric()
+
+
+@contextmanager
+def timed(histogram, *labels: str) -> Iterator[None]:
+    """Observe the duration of the block, also when it raises."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.labels(*labels).observe(time.perf_counter() - start)
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Current metrics in the Prometheus text format, aggregated across workers.
+
+    Returns:
+        Tuple: (body, content type)
+    """
+    if prometheus_client is None:
+        return b"# prometheus_client is not installed, metrics are disabled\n", "text/plain; charset=utf-8"
+
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import CollectorRegistry, multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = prometheus_client.REGISTRY
+    return prometheus_client.generate_latest(registry), prometheus_client.CONTENT_TYPE_LATEST
+
+
+def mark_process_dead(pid: int):
+    """Drop the live gauges of a worker that exited (multiprocess mode only)."""
+    if prometheus_client is not None and os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(pid)
@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Literal
 from pydantic import BaseModel
 
 
@@ -19,12 +19,19 @@ class ModelContext:
     retrieved_documents: List[Dict]
     metadata: List[ContextMetadata]
     additional_context: Optional[Dict] = None
+    conversation_history: Optional[str] = None
 
 
 class QueryRequest(BaseModel):
     query: str
     additional_context: Optional[Dict] = None
     force_refresh: bool = False
+    mode: Literal["generative", "extractive"] = "generative"
+    timeout: Optional[float] = None  # Overall deadline in seconds
+    session_id: Optional[str] = None  # Continue a multi-turn chat session
+    # "compact": source IDs, scores and snippets; "full": chunk contents and metadata too
+    verbosity: Literal["compact", "full"] = "compact"
+    fields: Optional[List[str]] = None  # Top-level response fields to return
 
 class QueryResponse(BaseModel):
     response: str
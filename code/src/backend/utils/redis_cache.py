@@ -1,8 +1,159 @@
-import json
-import redis
-from typing import Optional, Dict, Any
+import asyncio
+import logging
+import math
+import random
+import re
+import time
+import redis.asyncio as redis
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, Awaitable, Callable, List, Tuple
 from datetime import timedelta
 
+from .circuit_breaker import CircuitBreaker, CircuitOpenError
+from .hashing import stable_hash
+from .local_cache import LocalCache
+from .memory import deep_sizeof
+from .metrics import CACHE_LOOKUPS, REDIS_ERRORS, REDIS_LATENCY
+from . import serialization
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "model_context"
+GENERATION_KEY = f"{KEY_PREFIX}:meta:generation"
+INVALIDATION_CHANNEL = f"{KEY_PREFIX}:invalidate"
+CLEAR_ALL_MESSAGE = "*"
+GENERATION_KEY_PATTERN = re.compile(rb"^" + re.escape(KEY_PREFIX.encode()) + rb":g(\d+):")
+# Seconds a subscriber waits for a message per read; shorter than the pool's socket timeout,
+# so an idle channel is never mistaken for a broken connection
+SUBSCRIBER_POLL_TIMEOUT = 1.0
+
+
+def cache_key(
+    query: str,
+    additional_context: Optional[Dict] = None,
+    version: Optional[Dict[str, str]] = None,
+    generation: int = 0
+) -> str:
+    """Cache key for a query; see RedisCacheManager._generate_cache_key."""
+    # Canonical encoding makes equal inputs hash identically regardless of dict order
+    digest = stable_hash({
+        "query": query,
+        "additional_context": additional_context or None,
+        "version": version or {}
+    })
+    return f"{KEY_PREFIX}:g{generation}:{digest}"
+
+
+async def listen_to_channel(
+    redis_client: redis.Redis,
+    channel: str,
+    on_message: Callable[[bytes], Awaitable[None]],
+    on_subscribed: Optional[Callable[[], Awaitable[None]]] = None,
+    circuit_breaker: Optional[CircuitBreaker] = None
+):
+    """Deliver every message published on a channel; runs until cancelled.
+
+    Messages are read with a short poll timeout, so the pool's socket timeout
+    only fires on a connection that is actually broken. Then the subscription
+    is re-established, and ``on_subscribed`` runs again: it is the place to
+    catch up on whatever was published while disconnected.
+
+    Args:
+        redis_client (redis.asyncio.Redis): Shared Redis client
+        channel (str): Channel to subscribe to
+        on_message: Called with the data of each message
+        on_subscribed: Called after every (re)subscription, once it is active
+        circuit_breaker (CircuitBreaker, optional): Breaker whose retry delay paces reconnects
+    """
+    while True:
+        try:
+            async with redis_client.pubsub() as pubsub:
+                await pubsub.subscribe(channel)
+                # Wait for the confirmation: only then are no further messages missed
+                while True:
+                    message = await pubsub.get_message(timeout=SUBSCRIBER_POLL_TIMEOUT)
+                    if message is not None and message["type"] == "subscribe":
+                        break
+                if on_subscribed is not None:
+                    try:
+                        await on_subscribed()
+                    except Exception:
+                        logger.warning("Error catching up after subscribing to %s", channel, exc_info=True)
+                while True:
+                    message = await pubsub.get_message(
+                        ignore_subscribe_messages=True, timeout=SUBSCRIBER_POLL_TIMEOUT
+                    )
+                    if message is None or message["type"] != "message":
+                        continue
+                    try:
+                        await on_message(message["data"])
+                    except Exception:
+                        logger.warning("Error handling a message on %s", channel, exc_info=True)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("Subscription to %s lost: %s", channel, e)
+            retry_in = circuit_breaker.get_state().get("retry_in", 0.0) if circuit_breaker else 0.0
+            await asyncio.sleep(max(1.0, retry_in))
+
+
+@dataclass
+class CacheLookup:
+    """A cache hit together with its freshness."""
+    key: str
+    value: Dict[str, Any]
+    age: float
+    stale: bool  # Past the soft TTL
+    refresh: bool  # Stale, or picked for probabilistic early refresh
+
+
+def _key_generation(key: bytes) -> Optional[int]:
+    """Generation a cache key belongs to, or None if it is not a generation-scoped key."""
+    match = GENERATION_KEY_PATTERN.match(key)
+    return int(match.group(1)) if match else None
+
+
+def _unwrap(entry: Any) -> Tuple[Any, Dict[str, float]]:
+    """Split a stored envelope into its value and freshness metadata."""
+    if isinstance(entry, dict) and entry.keys() == {"value", "meta"}:
+        return entry["value"], entry["meta"]
+    # Entries written before envelopes existed carry no freshness information
+    return entry, {}
+
+
+def create_redis_client(
+    host: str = "localhost",
+    port: int = 6379,
+    db: int = 0,
+    password: Optional[str] = None,
+    max_connections: int = 50,
+    socket_timeout: Optional[float] = 5.0
+) -> redis.Redis:
+    """Create an asyncio Redis client backed by a bounded connection pool.
+    
+    One client should be shared by everything in the process that talks to
+    Redis; the pool hands out connections per command.
+    
+    Args:
+        host (str): Redis host
+        port (int): Redis port
+        db (int): Redis database number
+        password (str, optional): Redis password
+        max_connections (int): Maximum pooled connections
+        socket_timeout (float, optional): Seconds before a socket operation fails
+    """
+    pool = redis.ConnectionPool(
+        host=host,
+        port=port,
+        db=db,
+        password=password,
+        max_connections=max_connections,
+        socket_timeout=socket_timeout,
+        socket_connect_timeout=socket_timeout
+    )
+    return redis.Redis(connection_pool=pool)
+
+
 class RedisCacheManager:
     """Manages caching of model context using Redis."""
     
@@ -12,7 +163,17 @@ class RedisCacheManager:
         port: int = 6379,
         db: int = 0,
         password: Optional[str] = None,
-        default_ttl: int = 3600  # 1 hour default TTL
+        default_ttl: int = 3600,  # 1 hour default TTL
+        default_soft_ttl: Optional[int] = None,
+        early_refresh_beta: float = 1.0,
+        refresh_lock_ttl: int = 120,
+        redis_client: Optional[redis.Redis] = None,
+        max_connections: int = 50,
+        local_cache_bytes: int = 64 * 1024 * 1024,
+        local_cache_ttl: float = 60.0,
+        generation_refresh_interval: float = 5.0,
+        sweep_batch_size: int = 500,
+        circuit_breaker: Optional[CircuitBreaker] = None
     ):
         """Initialize Redis cache manager.
         
@@ -21,49 +182,311 @@ class RedisCacheManager:
             port (int): Redis port
             db (int): Redis database number
             password (str, optional): Redis password
-            default_ttl (int): Default time-to-live in seconds
+            default_ttl (int): Default time-to-live in seconds (hard TTL: entries are deleted)
+            default_soft_ttl (int, optional): Seconds after which an entry is stale: still
+                served, but flagged for a background refresh. Defaults to default_ttl
+            early_refresh_beta (float): Aggressiveness of probabilistic early refresh before
+                the soft TTL (0 disables it)
+            refresh_lock_ttl (int): Seconds a worker holds the lock for refreshing an entry
+            redis_client (redis.asyncio.Redis, optional): Shared client to use instead of
+                creating one; the caller stays responsible for closing it
+            max_connections (int): Pool size when the manager creates its own client
+            local_cache_bytes (int): Byte budget of the in-process tier, 0 disables it
+            local_cache_ttl (float): Maximum seconds an entry is served from the in-process tier
+            generation_refresh_interval (float): Seconds between re-reads of the namespace
+                generation (a clear on another worker also triggers a re-read via pub/sub)
+            sweep_batch_size (int): Keys per SCAN/UNLINK batch when purging old generations
+            circuit_breaker (CircuitBreaker, optional): Breaker guarding every Redis call;
+                while it is open the cache is skipped without touching Redis
         """
-        self.redis_client = redis.Redis(
+        self._owns_client = redis_client is None
+        self.redis_client = redis_client or create_redis_client(
             host=host,
             port=port,
             db=db,
             password=password,
-            decode_responses=True  # Automatically decode responses to strings
+            max_connections=max_connections
         )
         self.default_ttl = default_ttl
+        self.default_soft_ttl = default_soft_ttl or default_ttl
+        self.early_refresh_beta = early_refresh_beta
+        self.refresh_lock_ttl = refresh_lock_ttl
+
+        # In-process tier in front of Redis, kept coherent across workers via pub/sub
+        self.local_cache = LocalCache(local_cache_bytes, local_cache_ttl) if local_cache_bytes > 0 else None
+        self.redis_hits = 0
+        self.redis_misses = 0
+        self._listener_task: Optional[asyncio.Task] = None
+
+        # Keys are namespaced by a generation counter; clearing the cache bumps it
+        self.generation_refresh_interval = generation_refresh_interval
+        self.sweep_batch_size = sweep_batch_size
+        self._generation = 0
+        self._generation_checked_at = 0.0
+        self._sweep_task: Optional[asyncio.Task] = None
+
+        self.breaker = circuit_breaker or CircuitBreaker("redis")
+
+    async def _call(self, name: str, operation):
+        """Run a Redis call through the circuit breaker and its timeout, recording its latency."""
+        start = time.perf_counter()
+        try:
+            result = await self.breaker.call(operation)
+        except CircuitOpenError:
+            REDIS_ERRORS.labels(name, "circuit_open").inc()
+            raise
+        except Exception:
+            REDIS_ERRORS.labels(name, "error").inc()
+            raise
+        REDIS_LATENCY.labels(name).observe(time.perf_counter() - start)
+        return result
+
+    async def start_invalidation_listener(self):
+        """Subscribe to invalidations published by other workers."""
+        if self.local_cache is not None and self._listener_task is None:
+            self._listener_task = asyncio.create_task(self._listen_for_invalidations())
+
+    async def _listen_for_invalidations(self):
+        await listen_to_channel(
+            self.redis_client,
+            INVALIDATION_CHANNEL,
+            self._apply_invalidation,
+            on_subscribed=self._reset_local_tier,
+            circuit_breaker=self.breaker
+        )
+
+    async def _apply_invalidation(self, data: bytes):
+        key = data.decode()
+        if key == CLEAR_ALL_MESSAGE:
+            await self._reset_local_tier()
+        else:
+            self.local_cache.delete(key)
+
+    async def _reset_local_tier(self):
+        # Invalidations may have been missed before this subscription, so start from a clean tier
+        self.local_cache.clear()
+        self._generation_checked_at = 0.0
+
+    async def _publish_invalidation(self, message: str):
+        if self.local_cache is None:
+            return
+        if message == CLEAR_ALL_MESSAGE:
+            self.local_cache.clear()
+        else:
+            self.local_cache.delete(message)
+        await self._call("publish", lambda: self.redis_client.publish(INVALIDATION_CHANNEL, message))
+
+    async def _current_generation(self) -> int:
+        """Namespace generation, re-read from Redis at most every refresh interval."""
+        now = time.monotonic()
+        if now - self._generation_checked_at >= self.generation_refresh_interval:
+            try:
+                value = await self._call("get", lambda: self.redis_client.get(GENERATION_KEY))
+                self._generation = int(value) if value else 0
+                self._generation_checked_at = now
+            except CircuitOpenError:
+                pass
+            except Exception as e:
+                logger.warning("Error reading cache generation: %s", e)
+        return self._generation
 
-    def _generate_cache_key(self, query: str, additional_context: Optional[Dict] = None) -> str:
-        """Generate a unique cache key for the query and context."""
-        # Create a deterministic string representation of the context
-        context_str = json.dumps(additional_context, sort_keys=True) if additional_context else ""
-        # Combine query and context to create a unique key
-        combined = f"{query}:{context_str}"
-        # Create a hash of the combined string
-        return f"model_context:{hash(combined)}"
+    async def _cache_key(
+        self,
+        query: str,
+        additional_context: Optional[Dict] = None,
+        version: Optional[Dict[str, str]] = None
+    ) -> str:
+        return self._generate_cache_key(query, additional_context, version, await self._current_generation())
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Per-tier hit/miss/eviction counters."""
+        return {
+            "local": self.local_cache.get_stats() if self.local_cache else None,
+            "redis": {"hits": self.redis_hits, "misses": self.redis_misses},
+            "generation": self._generation,
+            "circuit": self.breaker.get_state()
+        }
+
+    async def ping(self) -> bool:
+        """Check that Redis is reachable."""
+        try:
+            return bool(await self._call("ping", self.redis_client.ping))
+        except Exception as e:
+            logger.warning("Redis is not reachable: %s", e)
+            return False
+
+    async def close(self):
+        """Stop background tasks and release the pool if this manager created it."""
+        for task in (self._listener_task, self._sweep_task):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._listener_task = None
+        self._sweep_task = None
+        if self._owns_client:
+            await self.redis_client.aclose()
+
+    def _generate_cache_key(
+        self,
+        query: str,
+        additional_context: Optional[Dict] = None,
+        version: Optional[Dict[str, str]] = None,
+        generation: int = 0
+    ) -> str:
+        """Generate a cache key that is identical across workers and restarts.
+        
+        Args:
+            query (str): The original query
+            additional_context (Dict, optional): Additional context
+            version (Dict, optional): Model name, prompt version and index version
+                the cached answer was produced with
+            generation (int): Namespace generation the key belongs to
+        """
+        return cache_key(query, additional_context, version, generation)
+
+    def _is_refresh_due(self, meta: Dict[str, float], age: float) -> bool:
+        """Probabilistic early expiration (XFetch).
+        
+        The closer an entry is to its soft TTL, and the longer it took to
+        compute, the more likely a read triggers its refresh, so hot keys are
+        renewed before they go stale instead of all at once.
+        """
+        if age >= meta["soft_ttl"]:
+            return True
+        if self.early_refresh_beta <= 0:
+            return False
+        jitter = -meta.get("compute_time", 0.0) * self.early_refresh_beta * math.log(1.0 - random.random())
+        return age + jitter >= meta["soft_ttl"]
+
+    async def lookup_cached_context(
+        self,
+        query: str,
+        additional_context: Optional[Dict] = None,
+        version: Optional[Dict[str, str]] = None
+    ) -> Optional[CacheLookup]:
+        """Retrieve cached model context along with whether it should be refreshed.
+        
+        Args:
+            query (str): The original query
+            additional_context (Dict, optional): Additional context
+            version (Dict, optional): Model/prompt/index version of the answer
+            
+        Returns:
+            Optional[CacheLookup]: The hit and its freshness, None on a miss
+        """
+        if self.breaker.is_open:
+            return None
+        cache_key = await self._cache_key(query, additional_context, version)
+        entry = None
+        if self.local_cache is not None:
+            entry = self.local_cache.get(cache_key)
+            CACHE_LOOKUPS.labels("local", "miss" if entry is None else "hit").inc()
 
-    async def get_cached_context(self, query: str, additional_context: Optional[Dict] = None) -> Optional[Dict]:
+        if entry is None:
+            try:
+                cached_data = await self._call("get", lambda: self.redis_client.get(cache_key))
+            except CircuitOpenError:
+                return None
+            except Exception as e:
+                logger.warning("Error reading cached context: %s", e)
+                return None
+            if not cached_data:
+                self.redis_misses += 1
+                CACHE_LOOKUPS.labels("redis", "miss").inc()
+                return None
+            try:
+                entry = serialization.decode(cached_data)
+            except serialization.SerializationError as e:
+                logger.warning("Ignoring undecodable cache entry: %s", e)
+                self.redis_misses += 1
+                CACHE_LOOKUPS.labels("redis", "miss").inc()
+                return None
+            self.redis_hits += 1
+            CACHE_LOOKUPS.labels("redis", "hit").inc()
+            if self.local_cache is not None:
+                # Charged by the decoded objects it keeps alive, several times the compressed payload
+                self.local_cache.set(cache_key, entry, deep_sizeof(entry))
+
+        value, meta = _unwrap(entry)
+        if not meta:
+            return CacheLookup(cache_key, value, age=0.0, stale=False, refresh=False)
+
+        age = time.time() - meta["created_at"]
+        return CacheLookup(
+            cache_key,
+            value,
+            age=age,
+            stale=age >= meta["soft_ttl"],
+            refresh=self._is_refresh_due(meta, age)
+        )
+
+    async def get_cached_context(
+        self,
+        query: str,
+        additional_context: Optional[Dict] = None,
+        version: Optional[Dict[str, str]] = None
+    ) -> Optional[Dict]:
         """Retrieve cached model context.
         
         Args:
             query (str): The original query
             additional_context (Dict, optional): Additional context
+            version (Dict, optional): Model/prompt/index version of the answer
             
         Returns:
             Optional[Dict]: Cached context if found, None otherwise
         """
-        cache_key = self._generate_cache_key(query, additional_context)
-        cached_data = self.redis_client.get(cache_key)
-        
-        if cached_data:
-            return json.loads(cached_data)
-        return None
+        lookup = await self.lookup_cached_context(query, additional_context, version)
+        return lookup.value if lookup else None
+
+    async def acquire_lock(self, key: str, ttl: int) -> bool:
+        """Claim a lock shared by all workers.
+
+        Args:
+            key (str): Redis key of the lock
+            ttl (int): Seconds after which the lock expires if it is never released
+
+        Returns:
+            bool: True if this worker holds the lock; False if another one does
+                or Redis is unavailable
+        """
+        try:
+            return bool(await self._call("set", lambda: self.redis_client.set(key, b"1", nx=True, ex=ttl)))
+        except CircuitOpenError:
+            return False
+        except Exception as e:
+            logger.warning("Error acquiring lock %s: %s", key, e)
+            return False
+
+    async def release_lock(self, key: str):
+        """Release a lock taken with :meth:`acquire_lock`."""
+        try:
+            await self._call("delete", lambda: self.redis_client.delete(key))
+        except CircuitOpenError:
+            pass
+        except Exception as e:
+            logger.warning("Error releasing lock %s: %s", key, e)
+
+    async def acquire_refresh_lock(self, cache_key: str) -> bool:
+        """Claim the single background refresh of an entry across all workers."""
+        return await self.acquire_lock(f"{cache_key}:refresh", self.refresh_lock_ttl)
+
+    async def release_refresh_lock(self, cache_key: str):
+        """Release a refresh lock once the entry has been rewritten."""
+        await self.release_lock(f"{cache_key}:refresh")
 
     async def cache_context(
         self,
         query: str,
         context_data: Dict[str, Any],
         additional_context: Optional[Dict] = None,
-        ttl: Optional[int] = None
+        ttl: Optional[int] = None,
+        version: Optional[Dict[str, str]] = None,
+        soft_ttl: Optional[int] = None,
+        compute_time: float = 0.0
     ) -> bool:
         """Cache model context data.
         
@@ -71,56 +494,200 @@ class RedisCacheManager:
             query (str): The original query
             context_data (Dict): The context data to cache
             additional_context (Dict, optional): Additional context
-            ttl (int, optional): Time-to-live in seconds
+            ttl (int, optional): Hard time-to-live in seconds
+            version (Dict, optional): Model/prompt/index version of the answer
+            soft_ttl (int, optional): Seconds until the entry is served as stale
+            compute_time (float): Seconds it took to produce the entry, used to
+                schedule early refreshes of expensive entries
             
         Returns:
             bool: True if caching was successful
         """
+        if self.breaker.is_open:
+            return False
         try:
-            cache_key = self._generate_cache_key(query, additional_context)
+            cache_key = await self._cache_key(query, additional_context, version)
             ttl = ttl or self.default_ttl
+            entry = {
+                "value": context_data,
+                "meta": {
+                    "created_at": time.time(),
+                    "soft_ttl": min(soft_ttl or self.default_soft_ttl, ttl),
+                    "compute_time": compute_time
+                }
+            }
             
             # Store the context data with TTL
-            self.redis_client.setex(
+            payload = serialization.encode(entry)
+            await self._call("setex", lambda: self.redis_client.setex(
                 cache_key,
                 timedelta(seconds=ttl),
-                json.dumps(context_data)
-            )
+                payload
+            ))
+            if self.local_cache is not None:
+                self.local_cache.set(
+                    cache_key, entry, deep_sizeof(entry), ttl=min(ttl, self.local_cache.default_ttl)
+                )
             return True
+        except CircuitOpenError:
+            return False
         except Exception as e:
-            print(f"Error caching context: {e}")
+            logger.warning("Error caching context: %s", e)
             return False
 
-    async def invalidate_cache(self, query: str, additional_context: Optional[Dict] = None) -> bool:
+    async def get_many_cached_contexts(
+        self,
+        requests: List[Tuple[str, Optional[Dict]]],
+        version: Optional[Dict[str, str]] = None
+    ) -> List[Optional[Dict]]:
+        """Retrieve several cached contexts in one round trip.
+        
+        Args:
+            requests (List[Tuple]): (query, additional_context) pairs
+            version (Dict, optional): Model/prompt/index version of the answers
+            
+        Returns:
+            List[Optional[Dict]]: Cached context per request, None where missing
+        """
+        if not requests:
+            return []
+        if self.breaker.is_open:
+            return [None] * len(requests)
+        generation = await self._current_generation()
+        keys = [self._generate_cache_key(query, context, version, generation) for query, context in requests]
+        try:
+            values = await self._call("mget", lambda: self.redis_client.mget(keys))
+        except CircuitOpenError:
+            return [None] * len(requests)
+        except Exception as e:
+            logger.warning("Error reading cached contexts: %s", e)
+            return [None] * len(requests)
+        return [self._decode_value(value) if value else None for value in values]
+
+    def _decode_value(self, data: bytes) -> Optional[Any]:
+        """Decode a stored entry to its value; an undecodable entry counts as a miss."""
+        try:
+            return _unwrap(serialization.decode(data))[0]
+        except serialization.SerializationError as e:
+            logger.warning("Ignoring undecodable cache entry: %s", e)
+            return None
+
+    async def invalidate_many(
+        self,
+        requests: List[Tuple[str, Optional[Dict]]],
+        version: Optional[Dict[str, str]] = None
+    ) -> bool:
+        """Invalidate several cached contexts with a single pipelined round trip.
+        
+        Args:
+            requests (List[Tuple]): (query, additional_context) pairs
+            version (Dict, optional): Model/prompt/index version of the answers
+            
+        Returns:
+            bool: True if invalidation was successful
+        """
+        try:
+            generation = await self._current_generation()
+            keys = [self._generate_cache_key(query, context, version, generation) for query, context in requests]
+
+            async def delete_and_publish():
+                async with self.redis_client.pipeline(transaction=False) as pipe:
+                    for key in keys:
+                        pipe.delete(key)
+                        if self.local_cache is not None:
+                            self.local_cache.delete(key)
+                            pipe.publish(INVALIDATION_CHANNEL, key)
+                    await pipe.execute()
+
+            await self._call("delete_many", delete_and_publish)
+            return True
+        except CircuitOpenError:
+            return False
+        except Exception as e:
+            logger.warning("Error invalidating cache: %s", e)
+            return False
+
+    async def invalidate_cache(
+        self,
+        query: str,
+        additional_context: Optional[Dict] = None,
+        version: Optional[Dict[str, str]] = None
+    ) -> bool:
         """Invalidate cached context for a specific query.
         
         Args:
             query (str): The original query
             additional_context (Dict, optional): Additional context
+            version (Dict, optional): Model/prompt/index version of the answer
             
         Returns:
             bool: True if invalidation was successful
         """
         try:
-            cache_key = self._generate_cache_key(query, additional_context)
-            self.redis_client.delete(cache_key)
+            cache_key = await self._cache_key(query, additional_context, version)
+            await self._call("delete", lambda: self.redis_client.delete(cache_key))
+            await self._publish_invalidation(cache_key)
             return True
+        except CircuitOpenError:
+            return False
         except Exception as e:
-            print(f"Error invalidating cache: {e}")
+            logger.warning("Error invalidating cache: %s", e)
             return False
 
-    async def clear_all_cache(self) -> bool:
+    async def clear_all_cache(self, purge: bool = False) -> bool:
         """Clear all cached model contexts.
         
+        Clearing is O(1): the namespace generation is incremented so every
+        existing key stops being read, and old entries expire by TTL.
+        
+        Args:
+            purge (bool): Also delete old-generation keys with a background
+                SCAN/UNLINK sweep, in batches, without blocking Redis
+            
         Returns:
             bool: True if clearing was successful
         """
         try:
-            # Delete all keys matching the model_context pattern
-            keys = self.redis_client.keys("model_context:*")
-            if keys:
-                self.redis_client.delete(*keys)
+            self._generation = await self._call("incr", lambda: self.redis_client.incr(GENERATION_KEY))
+            self._generation_checked_at = time.monotonic()
+            await self._publish_invalidation(CLEAR_ALL_MESSAGE)
+            if purge and (self._sweep_task is None or self._sweep_task.done()):
+                self._sweep_task = asyncio.create_task(self._sweep_old_generations())
             return True
+        except CircuitOpenError:
+            return False
+        except Exception as e:
+            logger.warning("Error clearing cache: %s", e)
+            return False
+
+    async def _sweep_old_generations(self) -> int:
+        """Unlink keys from generations older than the current one, in batches.
+
+        Only generations strictly below the one read when the sweep starts
+        are removed, so a clear on another worker while the sweep runs never
+        costs the newer generation its entries. Every SCAN and UNLINK goes
+        through the circuit breaker, so a stalled Redis ends the sweep.
+        """
+        removed = 0
+        try:
+            value = await self._call("get", lambda: self.redis_client.get(GENERATION_KEY))
+            below = int(value) if value else 0
+            cursor = 0
+            while True:
+                cursor, keys = await self._call("scan", lambda: self.redis_client.scan(
+                    cursor, match=f"{KEY_PREFIX}:g*", count=self.sweep_batch_size
+                ))
+                batch = []
+                for key in keys:
+                    generation = _key_generation(key)
+                    if generation is not None and generation < below:
+                        batch.append(key)
+                if batch:
+                    removed += await self._call("unlink", lambda: self.redis_client.unlink(*batch))
+                if cursor == 0:
+                    break
+                # Yield between batches so live traffic is not starved
+                await asyncio.sleep(0)
         except Exception as e:
-            print(f"Error clearing cache: {e}")
-            return False 
\ No newline at end of file
+            logger.warning("Error sweeping old cache generations: %s", e)
+        return removed
@@ -0,0 +1,122 @@
+"""
+Compact, versioned serialization for cache payloads.
+
+Every payload starts with a 4-byte header -- magic ``MC``, format version,
+and a flags byte holding the codec and compression -- so readers can decode
+any entry regardless of the settings of the worker that wrote it.
+msgpack and zstandard are used when installed, with JSON and zlib as
+fallbacks.
+"""
+
+import json
+import zlib
+from typing import Any, Optional
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+MAGIC = b"MC"
+FORMAT_VERSION = 1
+
+CODEC_JSON = 0
+CODEC_MSGPACK = 1
+
+COMPRESSION_NONE = 0
+COMPRESSION_ZLIB = 1
+COMPRESSION_ZSTD = 2
+
+
+class SerializationError(ValueError):
+    """Raised when a payload cannot be decoded."""
+
+
+def _default_codec() -> int:
+    return CODEC_MSGPACK if msgpack is not None else CODEC_JSON
+
+
+def _default_compression() -> int:
+    return COMPRESSION_ZSTD if zstandard is not None else COMPRESSION_ZLIB
+
+
+def encode(
+    value: Any,
+    codec: Optional[int] = None,
+    compression: Optional[int] = None,
+    compress_threshold: int = 512
+) -> bytes:
+    """Serialize a value with a version header.
+
+    Args:
+        value: JSON-compatible value
+        codec (int, optional): CODEC_MSGPACK or CODEC_JSON, defaults to the best available
+        compression (int, optional): COMPRESSION_ZSTD, COMPRESSION_ZLIB or COMPRESSION_NONE,
+            defaults to the best available
+        compress_threshold (int): Bodies smaller than this many bytes are stored uncompressed
+    """
+    codec = _default_codec() if codec is None else codec
+    compression = _default_compression() if compression is None else compression
+
+    if codec == CODEC_MSGPACK:
+        body = msgpack.packb(value, use_bin_type=True)
+    else:
+        body = json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+    if len(body) < compress_threshold:
+        compression = COMPRESSION_NONE
+    if compression == COMPRESSION_ZSTD:
+        body = zstandard.ZstdCompressor(level=3).compress(body)
+    elif compression == COMPRESSION_ZLIB:
+        body = zlib.compress(body, 6)
+
+    return MAGIC + bytes((FORMAT_VERSION, codec << 4 | compression)) + body
+
+
+def decode(data: bytes) -> Any:
+    """Deserialize a payload written by :func:`encode`.
+
+    Payloads without the header are read as plain JSON, so entries written
+    before this format existed still decode.
+
+    Raises:
+        SerializationError: If the payload is corrupt, its header is unknown or a
+            required codec is missing; decoder errors are wrapped in it
+    """
+    try:
+        return _decode(data)
+    except SerializationError:
+        raise
+    except Exception as e:
+        raise SerializationError(f"Undecodable payload: {type(e).__name__}: {e}") from e
+
+
+def _decode(data: bytes) -> Any:
+    if not data.startswith(MAGIC):
+        return json.loads(data)
+    if len(data) < 4:
+        raise SerializationError("Truncated payload header")
+
+    version, flags = data[2], data[3]
+    if version != FORMAT_VERSION:
+        raise SerializationError(f"Unsupported cache format version {version}")
+    codec, compression = flags >> 4, flags & 0x0F
+    body = data[4:]
+
+    if compression == COMPRESSION_ZSTD:
+        if zstandard is None:
+            raise SerializationError("Payload is zstd-compressed but zstandard is not installed")
+        body = zstandard.ZstdDecompressor().decompress(body)
+    elif compression == COMPRESSION_ZLIB:
+        body = zlib.decompress(body)
+
+    if codec == CODEC_MSGPACK:
+        if msgpack is None:
+            raise SerializationError("Payload is msgpack-encoded but msgpack is not installed")
+        return msgpack.unpackb(body, raw=False)
+    return json.loads(body)
@@ -0,0 +1,30 @@
+"""
+Purging old cache generations must never touch the current or a newer one.
+"""
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("redis")
+fakeredis = pytest.importorskip("fakeredis")
+
+from backend.utils.redis_cache import GENERATION_KEY, KEY_PREFIX, RedisCacheManager
+
+
+def test_sweep_only_removes_generations_below_the_current_one():
+    async def scenario():
+        client = fakeredis.FakeAsyncRedis()
+        manager = RedisCacheManager(redis_client=client, sweep_batch_size=3, local_cache_bytes=0)
+        for generation in range(4):
+            for i in range(5):
+                await client.set(f"{KEY_PREFIX}:g{generation}:key{i}", b"1")
+        await client.set(f"{KEY_PREFIX}:meta:query_total", b"7")
+        await client.set(GENERATION_KEY, 2)
+
+        assert await manager._sweep_old_generations() == 10
+        remaining = {key.decode().split(":")[1] for key in await client.keys(f"{KEY_PREFIX}:g*")}
+        assert remaining == {"g2", "g3"}
+        assert await client.get(f"{KEY_PREFIX}:meta:query_total") == b"7"
+
+    asyncio.run(scenario())
@@ -0,0 +1,53 @@
+"""
+Cross-worker index coordination: fail fast without Redis, and catch up on
+versions published while a worker was not subscribed.
+"""
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("redis")
+fakeredis = pytest.importorskip("fakeredis")
+
+from backend.rag.index_sync import IndexSync, IndexSyncUnavailable
+from backend.utils import redis_cache
+from backend.utils.circuit_breaker import CircuitBreaker
+
+
+def test_write_lock_fails_fast_when_the_breaker_is_open():
+    async def scenario():
+        breaker = CircuitBreaker("redis", failure_threshold=1)
+        breaker.record_failure()
+        sync = IndexSync(fakeredis.FakeAsyncRedis(), circuit_breaker=breaker, lock_timeout=60.0)
+
+        with pytest.raises(IndexSyncUnavailable):
+            async with sync.write_lock():
+                pass
+        assert await sync.latest_version() is None
+
+    asyncio.run(asyncio.wait_for(scenario(), timeout=5.0))
+
+
+def test_listener_catches_up_on_subscribe_then_follows_publishes(monkeypatch):
+    monkeypatch.setattr(redis_cache, "SUBSCRIBER_POLL_TIMEOUT", 0.05)
+
+    async def scenario():
+        client = fakeredis.FakeAsyncRedis()
+        publisher, listener = IndexSync(client), IndexSync(client)
+        # Published before the listener subscribed
+        await publisher.publish("v1")
+
+        seen = []
+
+        async def on_version(version):
+            seen.append(version)
+
+        task = asyncio.create_task(listener.listen(on_version))
+        await asyncio.sleep(0.3)
+        await publisher.publish("v2")
+        await asyncio.sleep(0.3)
+        task.cancel()
+        assert seen == ["v1", "v2"]
+
+    asyncio.run(scenario())
@@ -0,0 +1,37 @@
+"""
+The local cache tier must survive an idle invalidation channel and still
+apply invalidations published by other workers.
+"""
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("redis")
+fakeredis = pytest.importorskip("fakeredis")
+
+from backend.utils import redis_cache
+from backend.utils.redis_cache import INVALIDATION_CHANNEL, RedisCacheManager
+
+
+def test_idle_channel_keeps_the_local_tier(monkeypatch):
+    monkeypatch.setattr(redis_cache, "SUBSCRIBER_POLL_TIMEOUT", 0.05)
+
+    async def scenario():
+        client = fakeredis.FakeAsyncRedis()
+        manager = RedisCacheManager(redis_client=client)
+        await manager.start_invalidation_listener()
+        await asyncio.sleep(0.2)  # Subscribed, and the tier reset that comes with it is done
+
+        manager.local_cache.set("kept", {"v": 1}, size=10)
+        manager.local_cache.set("dropped", {"v": 2}, size=10)
+        await asyncio.sleep(0.5)  # Many empty polls
+        assert manager.local_cache.get("kept") is not None
+
+        await client.publish(INVALIDATION_CHANNEL, "dropped")
+        await asyncio.sleep(0.2)
+        assert manager.local_cache.get("dropped") is None
+        assert manager.local_cache.get("kept") is not None
+        await manager.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,46 @@
+"""
+Adding to a memory-mapped document store keeps it mapped, and the result
+loads back with the same documents and index version.
+"""
+
+import os
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("faiss")
+pytest.importorskip("langchain_core")
+
+from backend.embeddings.shared_store import MappedDocumentStore
+from backend.embeddings.vector_store import DOCUMENT_STORE_FILE, VectorStoreManager
+
+
+def make_docs(start, count):
+    return [{"content": f"chunk {i}", "metadata": {"source": "test"}} for i in range(start, start + count)]
+
+
+def test_add_to_mapped_store_and_reload(tmp_path):
+    directory = str(tmp_path)
+    store = VectorStoreManager(dimension=4)
+    store.add_embedded_documents(make_docs(0, 3), np.random.rand(3, 4).astype("float32"))
+    store.save(directory)
+
+    mapped = VectorStoreManager(dimension=4)
+    mapped.load(directory, mmap_documents=True)
+    mapped.add_embedded_documents(make_docs(3, 2), np.random.rand(2, 4).astype("float32"))
+    assert isinstance(mapped.documents, MappedDocumentStore)
+    assert [doc["content"] for doc in mapped.documents] == [f"chunk {i}" for i in range(5)]
+
+    mapped.save(directory)
+    assert isinstance(mapped.documents, MappedDocumentStore)
+    assert mapped.documents.path.endswith(DOCUMENT_STORE_FILE)
+    # Not pickled from the mapped store, and no stale pickle left behind
+    assert not os.path.exists(os.path.join(directory, "documents.pkl"))
+    assert not [name for name in os.listdir(directory) if name.endswith(".pending")]
+
+    for mmap in (False, True):
+        reloaded = VectorStoreManager(dimension=4)
+        reloaded.load(directory, mmap_documents=mmap)
+        assert len(reloaded.documents) == 5
+        assert reloaded.index.ntotal == 5
+        assert reloaded.index_version == mapped.index_version
@@ -0,0 +1,61 @@
+"""
+The embeddings client must bound every request to Ollama with a timeout.
+"""
+
+import pytest
+
+requests = pytest.importorskip("requests")
+pytest.importorskip("langchain_core")
+
+from backend.embeddings.ollama_embeddings import OllamaEmbeddingClient
+
+
+class FakeResponse:
+    status_code = 200
+    text = ""
+
+    def json(self):
+        return {"embedding": [0.1, 0.2]}
+
+
+@pytest.fixture
+def posts(monkeypatch):
+    calls = []
+
+    def fake_post(url, **kwargs):
+        calls.append((url, kwargs))
+        return FakeResponse()
+
+    monkeypatch.setattr(requests, "post", fake_post)
+    return calls
+
+
+def test_every_request_has_the_timeout(posts):
+    client = OllamaEmbeddingClient(model="mistral", base_url="http://ollama:11434/", request_timeout=7.5)
+    assert client.embed_documents(["a", "b"]) == [[0.1, 0.2], [0.1, 0.2]]
+    assert client.embed_query("c") == [0.1, 0.2]
+
+    assert len(posts) == 3
+    for url, kwargs in posts:
+        assert url == "http://ollama:11434/api/embeddings"
+        assert kwargs["timeout"] == 7.5
+
+
+def test_prompts_keep_the_ollama_embeddings_prefixes(posts):
+    # Same prompts as langchain_community's OllamaEmbeddings, so saved indexes stay valid
+    client = OllamaEmbeddingClient(model="mistral")
+    client.embed_documents(["doc"])
+    client.embed_query("question")
+    assert [kwargs["json"] for _, kwargs in posts] == [
+        {"model": "mistral", "prompt": "passage: doc"},
+        {"model": "mistral", "prompt": "query: question"},
+    ]
+
+
+def test_timeouts_surface_as_value_errors(monkeypatch):
+    def timing_out_post(url, **kwargs):
+        raise requests.exceptions.Timeout("read timed out")
+
+    monkeypatch.setattr(requests, "post", timing_out_post)
+    with pytest.raises(ValueError, match="read timed out"):
+        OllamaEmbeddingClient(model="mistral").embed_query("question")
@@ -0,0 +1,76 @@
+"""
+Cache keys and index versions must be identical in every process.
+
+Each check runs the same computation in two interpreters with different
+PYTHONHASHSEED values (as two workers, or a worker before and after a
+restart, would have) and compares the output.
+"""
+
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_with_seed(code: str, seed: str) -> str:
+    env = dict(os.environ, PYTHONHASHSEED=seed)
+    result = subprocess.run(
+        [sys.executable, "-c", textwrap.dedent(code)],
+        cwd=SRC_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    return result.stdout.strip()
+
+
+def assert_same_across_processes(code: str):
+    outputs = {run_with_seed(code, seed) for seed in ("1", "2")}
+    assert len(outputs) == 1, outputs
+
+
+def test_index_content_version_is_stable_across_processes():
+    assert_same_across_processes("""
+        from backend.utils.hashing import index_content_version
+        print(index_content_version("mistral", ["chunk one", "chunk two", "ünïcode"]))
+    """)
+
+
+def test_cache_key_is_stable_across_processes():
+    pytest.importorskip("redis")
+    assert_same_across_processes("""
+        from backend.utils.redis_cache import RedisCacheManager
+        print(RedisCacheManager._generate_cache_key(
+            None,
+            "database connection pool exhausted",
+            {"severity": "high", "component": "database", "tags": ["db", "pool"]},
+            {"model": "mistral", "prompt": "v1:abc", "index": "0123"},
+            generation=3
+        ))
+    """)
+
+
+def test_index_version_matches_after_ingest_and_after_load(tmp_path):
+    pytest.importorskip("faiss")
+    pytest.importorskip("numpy")
+    pytest.importorskip("langchain_core")
+    # One process ingests and saves; others load the saved files, in both document modes
+    ingested = run_with_seed(f"""
+        import numpy as np
+        from backend.embeddings.vector_store import VectorStoreManager
+        store = VectorStoreManager(dimension=8)
+        docs = [{{"content": f"chunk {{i}}", "metadata": {{"source": "test"}}}} for i in range(5)]
+        store.add_embedded_documents(docs[:3], np.random.rand(3, 8).astype("float32"))
+        store.add_embedded_documents(docs[3:], np.random.rand(2, 8).astype("float32"))
+        store.save({str(tmp_path)!r})
+        print(store.index_version)
+    """, "1")
+    for seed, mmap in (("2", False), ("3", True)):
+        loaded = run_with_seed(f"""
+            from backend.embeddings.vector_store import VectorStoreManager
+            store = VectorStoreManager(dimension=8)
+            store.load({str(tmp_path)!r}, mmap_documents={mmap})
+            print(store.index_version)
+        """, seed)
+        assert loaded == ingested